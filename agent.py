@@ -1,17 +1,40 @@
 import os
 import json
+import asyncio
 import logging
 import sys
 import time
+import threading
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import uuid
+import weakref
 from autogen import AssistantAgent, UserProxyAgent, GroupChat, GroupChatManager
 from langchain.memory import ConversationBufferMemory
 from langchain.schema import HumanMessage, AIMessage
-from tenacity import retry, stop_after_attempt, wait_fixed
+
+from memory.journal import JournalStore
+from memory.context_builder import ContextWindowBuilder
+from memory.write_behind import WriteBehindFlusher, progress_flusher
+from memory.progress_store import SQLiteProgressStore
+from memory.progress_report import (
+    ProgressReportCache, build_progress_report, report_digest, summary_prompt, parse_summary, fallback_summary
+)
+from llm_providers.async_openai_provider import AsyncOpenAIProvider
+from llm_providers.stub_provider import StubProvider
+from llm_providers.client_registry import client_registry
+from services.response_cache import ResponseCache, MemoryCacheBackend, SQLiteCacheBackend
+from services.agent_pool import AgentPool
+from services.problem_bank import ProblemBank, SUBJECT_TOPICS
+from services.problem_registry import ProblemRegistry
+from services.answer_checker import AnswerChecker
+from services.query_classifier import TieredClassifier, TfidfClassifier
+from utils.single_flight import SingleFlight
+from utils.structured_output import JSON_MODE, StructuredOutputError, parse_json
+from utils.resilience import circuit_breakers, endpoint_name, llm_retry
+from utils.exceptions import ServiceUnavailableException
 
 
 # Set up logging
@@ -33,6 +56,47 @@ llm_config = {
     "cache_seed": 42
 }
 
+# Azure OpenAI deployment used by extract_subject_and_topic
+classifier_config = {
+    "model": "gpt-4o",
+    "api_key": "",
+    "base_url": "https://idkrag.openai.azure.com/",
+    "api_type": "azure",
+    "api_version": "2024-02-01"
+}
+
+# Token budget for conversation history pasted into tutor prompts
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+
+# Progress goes to per-student JSON files unless PROGRESS_BACKEND=sqlite
+progress_store = (
+    SQLiteProgressStore(os.getenv("PROGRESS_DB_PATH", "data/progress_data/progress.db"))
+    if os.getenv("PROGRESS_BACKEND", "json") == "sqlite" else None
+)
+
+# Async LLM client for the API request path; the semaphore caps in-flight calls.
+# LLM_PROVIDER=stub replays a canned reply for offline frontend work and tests.
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "16"))
+async_llm = (
+    StubProvider() if os.getenv("LLM_PROVIDER") == "stub"
+    else AsyncOpenAIProvider(llm_config, max_concurrency=MAX_CONCURRENT_LLM_CALLS)
+)
+
+# Ask for JSON mode on calls that expect JSON; LLM_JSON_MODE=0 for deployments without it
+json_mode = JSON_MODE if os.getenv("LLM_JSON_MODE", "1") != "0" else {}
+
+# Transient LLM failures are retried with jittered backoff inside the request
+# deadline, and the endpoint's breaker fails fast while it is down
+llm_breaker = circuit_breakers.get(endpoint_name(llm_config["config_list"][0]))
+
+
+def llm_reply(agent, prompt: str) -> str:
+    """A reply from an AutoGen agent, under the tutor endpoint's retry policy and breaker"""
+    return llm_retry.call(agent.generate_reply, [{"content": prompt, "role": "user"}], breaker=llm_breaker)
+
+
+async def a_llm_reply(messages: List[Dict[str, str]], **kwargs) -> str:
+    return await llm_retry.a_call(async_llm.generate_reply, messages, breaker=llm_breaker, **kwargs)
 
 
 # Create directories
@@ -61,9 +125,12 @@ class AgentConfig:
 
 # Conversation Memory (LangChain)
 class LangChainConversationMemory:
-    def __init__(self, session_id: str, storage_path: str = "data/conversation_history"):
+    def __init__(self, session_id: str, storage_path: str = "data/conversation_history",
+                 storage_mode: str = "journal", compact_every: int = 200,
+                 context_token_budget: int = 1500):
         self.session_id = session_id
         self.storage_path = storage_path
+        self.storage_mode = storage_mode
         self.memory = ConversationBufferMemory(return_messages=True)
         self.metadata = {
             "session_id": session_id,
@@ -71,11 +138,32 @@ class LangChainConversationMemory:
             "subjects": [],
             "topics": []
         }
+        # Prompts get the recent turns plus a rolling summary, not the whole buffer
+        self.context_builder = ContextWindowBuilder(token_budget=context_token_budget)
         os.makedirs(self.storage_path, exist_ok=True)
+        # "journal" appends one JSONL record per message; "json" rewrites the whole file
+        self.journal = JournalStore(os.path.join(self.storage_path, session_id), compact_every) \
+            if storage_mode == "journal" else None
         self._load()
 
     def add_message(self, role: str, content: str, metadata: Optional[Dict[str, str]] = None):
-        if role == "student":
+        if self.journal is not None:
+            record = {
+                "role": "human" if role == "student" else "assistant",
+                "content": content,
+                "metadata": metadata or {}
+            }
+            self.journal.append(
+                record,
+                apply=lambda: self._apply_message(record["role"], content, metadata),
+                snapshot_fn=self._snapshot
+            )
+        else:
+            self._apply_message("human" if role == "student" else "assistant", content, metadata)
+            self._save()
+
+    def _apply_message(self, role: str, content: str, metadata: Optional[Dict[str, str]] = None):
+        if role == "human":
             self.memory.chat_memory.add_message(HumanMessage(content=content))
         else:
             self.memory.chat_memory.add_message(AIMessage(content=content))
@@ -84,7 +172,6 @@ class LangChainConversationMemory:
                 self.metadata["subjects"].append(metadata["subject"])
             if "topic" in metadata and metadata["topic"] not in self.metadata["topics"]:
                 self.metadata["topics"].append(metadata["topic"])
-        self._save()
 
     def get_messages(self) -> List[Dict[str, Any]]:
         return [
@@ -92,38 +179,42 @@ class LangChainConversationMemory:
             for msg in self.memory.chat_memory.messages
         ]
 
-    def get_context(self) -> str:
-        return self.memory.buffer
+    def get_context(self, max_tokens: Optional[int] = None) -> str:
+        return self.context_builder.build(self.memory.chat_memory.messages, max_tokens)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            "metadata": {**self.metadata, "subjects": list(self.metadata["subjects"]),
+                         "topics": list(self.metadata["topics"])},
+            "messages": self.get_messages()
+        }
 
     def _save(self):
         filepath = os.path.join(self.storage_path, f"{self.session_id}.json")
         try:
-            data = {
-                "metadata": self.metadata,
-                "messages": [
-                    {"role": "human" if isinstance(msg, HumanMessage) else "assistant", "content": msg.content}
-                    for msg in self.memory.chat_memory.messages
-                ]
-            }
             with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+                json.dump(self._snapshot(), f, indent=2)
         except Exception as e:
             logger.error(f"Failed to save conversation: {e}")
 
     def _load(self):
         filepath = os.path.join(self.storage_path, f"{self.session_id}.json")
-        if os.path.exists(filepath):
-            try:
+        try:
+            if self.journal is not None:
+                data = self.journal.load_snapshot()
+            elif os.path.exists(filepath):
                 with open(filepath, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                self.metadata = data.get("metadata", self.metadata)
-                for msg in data.get("messages", []):
-                    if msg["role"] == "human":
-                        self.memory.chat_memory.add_message(HumanMessage(content=msg["content"]))
-                    else:
-                        self.memory.chat_memory.add_message(AIMessage(content=msg["content"]))
-            except Exception as e:
-                logger.error(f"Failed to load conversation: {e}")
+            else:
+                return
+            self.metadata = data.get("metadata", self.metadata)
+            for msg in data.get("messages", []):
+                self._apply_message(msg["role"], msg["content"])
+            if self.journal is not None:
+                for record in self.journal.replay(data.get("journal_seq", 0)):
+                    self._apply_message(record["role"], record["content"], record.get("metadata"))
+        except Exception as e:
+            logger.error(f"Failed to load conversation: {e}")
 
 # Progress Memory
 @dataclass
@@ -145,13 +236,32 @@ class LearningSession:
 
 
 class ProgressMemory:
-    def __init__(self, student_id: str, storage_path: str = "data/progress_data"):
+    def __init__(self, student_id: str, storage_path: str = "data/progress_data",
+                 flusher: Optional[WriteBehindFlusher] = progress_flusher,
+                 store: Optional[SQLiteProgressStore] = progress_store,
+                 on_change: Optional[Callable[[str], None]] = None):
         self.student_id = student_id
         self.storage_path = storage_path
         self.progress_data: Dict[str, Dict[str, LearningProgress]] = defaultdict(dict)
         self.learning_sessions: List[LearningSession] = []
+        # Mutations are persisted by the write-behind flusher; None saves synchronously
+        self.flusher = flusher
+        # With a store, each mutation is a single-row write and no JSON file is kept
+        self.store = store
+        # Called with the student id after every change, e.g. to drop cached views
+        self.on_change = on_change
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._version = 0
+        self._saved_version = 0
+        # Running analytics totals, updated per attempt instead of recomputed
+        self._total_attempts = 0
+        self._weighted_score = 0.0
+        self._analytics: Optional[Dict[str, Any]] = None
+        self._analytics_version = -1
         os.makedirs(self.storage_path, exist_ok=True)
         self._load()
+        self._rebuild_aggregates()
 
     def start_session(self, session_id: str) -> LearningSession:
         print(f"🔹 [ProgressTracker] Starting new learning session: {session_id}")
@@ -162,67 +272,162 @@ class ProgressMemory:
             questions_asked=0,
             questions_answered_correctly=0
         )
-        self.learning_sessions.append(session)
-        self._save()
+        with self._lock:
+            # A stored session reloaded after a restart resumes its record
+            for existing in self.learning_sessions:
+                if existing.session_id == session_id:
+                    return existing
+            if self.store is not None:
+                session = LearningSession(**self.store.start_session(self.student_id, asdict(session)))
+            self.learning_sessions.append(session)
+            self._mark_dirty()
         return session
 
     def update_progress(self, subject: str, topic: str, performance_score: float, was_successful: bool):
         print(f"🔹 [ProgressTracker] Updating progress for {subject}/{topic} - "
               f"Score: {performance_score:.2f}, Successful: {was_successful}")
-        if subject not in self.progress_data:
-            self.progress_data[subject] = {}
-        if topic not in self.progress_data[subject]:
-            self.progress_data[subject][topic] = LearningProgress(subject, topic, 0.0, 0, 0)
-        progress = self.progress_data[subject][topic]
-        progress.attempts += 1
-        if was_successful:
-            progress.successful_attempts += 1
-        progress.skill_level = (progress.skill_level * 0.7) + (performance_score * 0.3)
-        logger.info(f"Updated progress: {subject}/{topic}, skill={progress.skill_level:.2f}")
-        self._save()
+        with self._lock:
+            previous = self.progress_data.get(subject, {}).get(topic)
+            old_attempts, old_skill = (previous.attempts, previous.skill_level) if previous else (0, 0.0)
+            if self.store is not None:
+                row = self.store.record_attempt(self.student_id, subject, topic, performance_score, was_successful)
+                self.progress_data[subject][topic] = LearningProgress(**row)
+                self._count_attempt(old_attempts, old_skill, self.progress_data[subject][topic])
+                logger.info(f"Updated progress: {subject}/{topic}, skill={row['skill_level']:.2f}")
+                self._mark_dirty()
+                return
+            if subject not in self.progress_data:
+                self.progress_data[subject] = {}
+            if topic not in self.progress_data[subject]:
+                self.progress_data[subject][topic] = LearningProgress(subject, topic, 0.0, 0, 0)
+            progress = self.progress_data[subject][topic]
+            progress.attempts += 1
+            if was_successful:
+                progress.successful_attempts += 1
+            progress.skill_level = (progress.skill_level * 0.7) + (performance_score * 0.3)
+            self._count_attempt(old_attempts, old_skill, progress)
+            logger.info(f"Updated progress: {subject}/{topic}, skill={progress.skill_level:.2f}")
+            self._mark_dirty()
 
     def update_session(self, session_id: str, subject: str, topic: str, question_asked: bool = False, correct_answer: bool = False):
         print(f"🔹 [ProgressTracker] Updating session {session_id} - "
               f"Subject: {subject}, Question: {question_asked}, Correct: {correct_answer}")
-        for session in self.learning_sessions:
-            if session.session_id == session_id:
-                if subject not in session.subjects_covered:
-                    session.subjects_covered.append(subject)
-                if question_asked:
-                    session.questions_asked += 1
-                if correct_answer:
-                    session.questions_answered_correctly += 1
-                logger.info(f"Updated session {session_id}: subject={subject}, questions_asked={session.questions_asked}")
-                self._save()
-                break
+        with self._lock:
+            for i, session in enumerate(self.learning_sessions):
+                if session.session_id == session_id:
+                    if self.store is not None:
+                        row = self.store.update_session(session_id, subject, question_asked, correct_answer)
+                        if row is not None:
+                            self.learning_sessions[i] = session = LearningSession(**row)
+                        logger.info(f"Updated session {session_id}: subject={subject}, questions_asked={session.questions_asked}")
+                        self._mark_dirty()
+                        break
+                    if subject not in session.subjects_covered:
+                        session.subjects_covered.append(subject)
+                    if question_asked:
+                        session.questions_asked += 1
+                    if correct_answer:
+                        session.questions_answered_correctly += 1
+                    logger.info(f"Updated session {session_id}: subject={subject}, questions_asked={session.questions_asked}")
+                    self._mark_dirty()
+                    break
 
     def get_progress_report(self) -> Dict[str, Any]:
         print("🔹 [ProgressTracker] Generating progress report")
-        return {
-            "student_id": self.student_id,
-            "subjects": {s: {t: asdict(p) for t, p in topics.items()} for s, topics in self.progress_data.items()},
-            "sessions": [asdict(s) for s in self.learning_sessions],
-            "timestamp": datetime.now().isoformat()
-        }
+        with self._lock:
+            return {
+                "student_id": self.student_id,
+                "subjects": {s: {t: asdict(p) for t, p in topics.items()} for s, topics in self.progress_data.items()},
+                "sessions": [asdict(s) for s in self.learning_sessions],
+                "timestamp": datetime.now().isoformat()
+            }
+
+    @property
+    def version(self) -> int:
+        """Incremented on every change; lets callers cache derived views"""
+        return self._version
+
+    def get_analytics(self) -> Dict[str, Any]:
+        """Analytics from the running totals; rebuilt at most once per change"""
+        with self._lock:
+            if self._analytics_version != self._version:
+                total_sessions = len(self.learning_sessions)
+                skill_progression = {
+                    subject: {topic: p.skill_level for topic, p in topics.items()}
+                    for subject, topics in self.progress_data.items() if topics
+                }
+                self._analytics = {
+                    "total_sessions": total_sessions,
+                    "total_problems_solved": self._total_attempts,
+                    "average_score": self._weighted_score / max(self._total_attempts, 1),
+                    "subjects_studied": list(skill_progression),
+                    "skill_progression": skill_progression,
+                    "time_spent_learning": total_sessions * 30  # Estimate 30 minutes per session
+                }
+                self._analytics_version = self._version
+            return dict(self._analytics)
+
+    def flush(self):
+        """Persist pending changes now instead of waiting for the flusher"""
+        if self.store is not None:
+            return  # Already written by each mutation
+        if self.flusher is not None:
+            self.flusher.discard(self)
+        self._save()
+
+    def _count_attempt(self, old_attempts: int, old_skill: float, current: LearningProgress):
+        """Swap a topic's old contribution to the running totals for its new one"""
+        self._total_attempts += current.attempts - old_attempts
+        self._weighted_score += current.skill_level * current.attempts - old_skill * old_attempts
+
+    def _rebuild_aggregates(self):
+        progress = [p for topics in self.progress_data.values() for p in topics.values()]
+        self._total_attempts = sum(p.attempts for p in progress)
+        self._weighted_score = sum(p.skill_level * p.attempts for p in progress)
+
+    def _mark_dirty(self):
+        self._version += 1
+        if self.on_change is not None:
+            self.on_change(self.student_id)
+        if self.store is not None:
+            return
+        if self.flusher is not None:
+            self.flusher.mark_dirty(self)
+        else:
+            self._save()
 
     def _save(self):
         filepath = os.path.join(self.storage_path, f"{self.student_id}_progress.json")
         try:
-            data = {
-                "student_id": self.student_id,
-                "progress_data": {
-                    s: {t: asdict(p) for t, p in topics.items()}
-                    for s, topics in self.progress_data.items()
-                },
-                "learning_sessions": [asdict(s) for s in self.learning_sessions]
-            }
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+            with self._lock:
+                version = self._version
+                data = {
+                    "student_id": self.student_id,
+                    "progress_data": {
+                        s: {t: asdict(p) for t, p in topics.items()}
+                        for s, topics in self.progress_data.items()
+                    },
+                    "learning_sessions": [asdict(s) for s in self.learning_sessions]
+                }
+            with self._write_lock:
+                # A newer snapshot may already have been written by another thread
+                if version <= self._saved_version:
+                    return
+                tmp_path = f"{filepath}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_path, filepath)
+                self._saved_version = version
         except Exception as e:
             logger.error(f"Failed to save progress: {e}")
 
     def _load(self):
         filepath = os.path.join(self.storage_path, f"{self.student_id}_progress.json")
+        if self.store is not None and self.store.has_student(self.student_id):
+            for row in self.store.load_progress(self.student_id):
+                self.progress_data[row["subject"]][row["topic"]] = LearningProgress(**row)
+            self.learning_sessions = [LearningSession(**row) for row in self.store.load_sessions(self.student_id)]
+            return
         if os.path.exists(filepath):
             try:
                 with open(filepath, "r", encoding="utf-8") as f:
@@ -236,25 +441,81 @@ class ProgressMemory:
                     LearningSession(**session)
                     for session in data.get("learning_sessions", [])
                 ]
+                if self.store is not None:
+                    # First load with the store enabled: migrate the JSON file
+                    self.store.import_student(
+                        self.student_id,
+                        [asdict(p) for topics in self.progress_data.values() for p in topics.values()],
+                        [asdict(s) for s in self.learning_sessions]
+                    )
             except Exception as e:
                 logger.error(f"Failed to load progress: {e}")
 
 
-# Current Problem Storage
-current_problems: Dict[str, Dict[str, Any]] = {}
-
-
-def extract_subject_and_topic(query: str) -> tuple:
+class ProgressMemoryRegistry:
+    """One ProgressMemory per student, shared by all of that student's sessions.
+
+    Memories stay alive while any session holds them, and the most recently
+    used ``max_idle`` stay cached afterwards so analytics for a returning
+    student don't reload their progress file. ``on_change`` is called with
+    the student id whenever one of the memories changes.
+    """
+
+    def __init__(self, max_idle: int = 1000, on_change: Optional[Callable[[str], None]] = None):
+        self.max_idle = max_idle
+        self.on_change = on_change
+        self._live: "weakref.WeakValueDictionary[str, ProgressMemory]" = weakref.WeakValueDictionary()
+        self._recent: "OrderedDict[str, ProgressMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, student_id: str) -> ProgressMemory:
+        with self._lock:
+            memory = self._live.get(student_id)
+            if memory is None:
+                memory = ProgressMemory(student_id, on_change=self._changed)
+                self._live[student_id] = memory
+            self._recent[student_id] = memory
+            self._recent.move_to_end(student_id)
+            while len(self._recent) > self.max_idle:
+                self._recent.popitem(last=False)
+            return memory
+
+    def _changed(self, student_id: str):
+        if self.on_change is not None:
+            self.on_change(student_id)
+
+
+progress_memories = ProgressMemoryRegistry(int(os.getenv("PROGRESS_MEMORY_CACHE_SIZE", "1000")))
+
+# Identical explanation requests in flight at the same time share one LLM call
+explanation_flights = SingleFlight()
+
+# Finished progress reports, reused until the student's progress changes
+progress_reports = ProgressReportCache()
+
+# Open practice problems by problem_id; several can be outstanding per session.
+# PROBLEM_BACKEND=sqlite keeps them gradable across restarts and workers.
+problem_registry = ProblemRegistry(
+    ttl=float(os.getenv("PROBLEM_TTL", str(24 * 3600))),
+    max_problems=int(os.getenv("PROBLEM_REGISTRY_SIZE", "100000")),
+    path=os.getenv("PROBLEM_DB_PATH", "data/problems/problems.db")
+    if os.getenv("PROBLEM_BACKEND", "memory") == "sqlite" else None
+)
+
+# Clear-cut answers are graded locally; LOCAL_ANSWER_CHECK=0 sends every one to the model
+answer_checker = AnswerChecker(enabled=os.getenv("LOCAL_ANSWER_CHECK", "1") != "0")
+
+# Explanations shared across students, keyed by subject/topic/difficulty/style and conversation context
+explanation_cache = ResponseCache(
+    backend=SQLiteCacheBackend("data/cache/explanations.db")
+    if os.getenv("EXPLANATION_CACHE_BACKEND", "memory") == "sqlite" else MemoryCacheBackend(),
+    ttl=float(os.getenv("EXPLANATION_CACHE_TTL", str(24 * 3600)))
+)
+
+
+def classify_query_with_llm(query: str) -> tuple:
     """Extract subject and topic from user query using Azure OpenAI"""
     print("🔹 [AI Classifier] Analyzing query for subject and topic")
-    from openai import AzureOpenAI
-    
-    # Create Azure OpenAI client
-    client = AzureOpenAI(
-        api_key= "",
-        api_version="2024-02-01",
-        azure_endpoint="https://idkrag.openai.azure.com/"
-    )
     
     # System message to guide the model
     system_prompt = """You are an expert educational classifier. Analyze the student's query and extract:
@@ -271,86 +532,46 @@ Return ONLY a JSON object with this structure:
     "style": "learning style"
 }"""
 
-    try:
-        # Get response from Azure OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": query}
-            ],
-            temperature=0.2,
-            max_tokens=200
-        )
-        
-        # Extract JSON from response
-        content = response.choices[0].message.content
-        json_start = content.find('{')
-        json_end = content.rfind('}') + 1
-        json_str = content[json_start:json_end]
-        
-        # Parse JSON
-        data = json.loads(json_str)
-        
-        # Extract values with defaults
-        subject = data.get("subject", "General")
-        topic = data.get("topic", "General")
-        difficulty = data.get("difficulty", "medium")
-        style = data.get("style", "visual")
-        
-        print(f"🔹 [AI Classifier] Identified: Subject={subject}, Topic={topic}, "
-              f"Difficulty={difficulty}, Style={style}")
-        return subject, topic, difficulty, style
-        
-    except Exception as e:
-        logger.error(f"AI classification failed: {e}")
-        # Fallback to rule-based method
-        query_lower = query.lower()
-        
-        # Subject detection
-        if any(word in query_lower for word in ['math', 'algebra', 'geometry', 'calculus', 'equation']):
-            subject = "Mathematics"
-        elif any(word in query_lower for word in ['physics', 'force', 'motion', 'energy']):
-            subject = "Physics"
-        elif any(word in query_lower for word in ['chemistry', 'chemical', 'reaction', 'element']):
-            subject = "Chemistry"
-        elif any(word in query_lower for word in ['biology', 'cell', 'organism', 'gene']):
-            subject = "Biology"
-        else:
-            subject = "General"
-        
-        # Topic detection
-        topic = "General"
-        if "quadratic" in query_lower:
-            topic = "Quadratic Equations"
-        elif "linear" in query_lower:
-            topic = "Linear Equations"
-        elif "factor" in query_lower:
-            topic = "Factoring"
-        elif "derivative" in query_lower:
-            topic = "Derivatives"
-        elif "integral" in query_lower:
-            topic = "Integration"
-        elif len(query.split()) >= 2:
-            topic = " ".join(query.split()[-2:]).title()
-        
-        # Difficulty detection
-        difficulty = "medium"
-        if "easy" in query_lower or "beginner" in query_lower:
-            difficulty = "easy"
-        elif "hard" in query_lower or "advanced" in query_lower:
-            difficulty = "hard"
-            
-        # Learning style detection
-        style = "visual"
-        if "auditory" in query_lower or "listen" in query_lower:
-            style = "auditory"
-        elif "kinesthetic" in query_lower or "hands-on" in query_lower:
-            style = "kinesthetic"
-        
-        print(f"🔹 [AI Classifier] Fallback identified: Subject={subject}, Topic={topic}, "
-              f"Difficulty={difficulty}, Style={style}")
-        return subject, topic, difficulty, style
+    # Reuse the pooled Azure OpenAI client
+    client = client_registry.get_client(classifier_config, timeout=30)
+    response = llm_retry.call(
+        client.chat.completions.create,
+        breaker=circuit_breakers.get(endpoint_name(classifier_config)),
+        model=classifier_config["model"],
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": query}
+        ],
+        temperature=0.2,
+        max_tokens=200,
+        **json_mode
+    )
+    
+    data = parse_json(response.choices[0].message.content, dict)
+    
+    # Extract values with defaults
+    subject = data.get("subject", "General")
+    topic = data.get("topic", "General")
+    difficulty = data.get("difficulty", "medium")
+    style = data.get("style", "visual")
+    
+    print(f"🔹 [AI Classifier] Identified: Subject={subject}, Topic={topic}, "
+          f"Difficulty={difficulty}, Style={style}")
+    return subject, topic, difficulty, style
+
+
+# Keyword and TF-IDF tiers answer confident queries locally; the rest go to the LLM
+subject_classifier = TieredClassifier(
+    classify_query_with_llm,
+    threshold=float(os.getenv("CLASSIFIER_CONFIDENCE", "0.75")),
+    cache_size=int(os.getenv("CLASSIFIER_CACHE_SIZE", "10000")),
+    tfidf=TfidfClassifier(os.getenv("CLASSIFIER_LOG_PATH", "data/classifier/queries.jsonl") or None)
+)
+
+
+def extract_subject_and_topic(query: str) -> tuple:
+    """Extract subject, topic, difficulty and style from a user query"""
+    return subject_classifier.classify(query)
 
 def solve_problem_interactive(problem_data: Dict[str, Any], session_id: str, conv_memory, progress_memory, evaluate_solution_func):
     """Interactive problem solving workflow"""
@@ -430,7 +651,7 @@ def evaluate_and_show_results(problem_data, solution, session_id, conv_memory, p
     time.sleep(1)
     
     # Evaluate the solution
-    evaluation = evaluate_solution_func(session_id, solution)
+    evaluation = evaluate_solution_func(session_id, solution, problem_data.get("problem_id"))
     
     if "error" in evaluation:
         print(f"Error during evaluation: {evaluation['error']}")
@@ -472,119 +693,337 @@ def evaluate_and_show_results(problem_data, solution, session_id, conv_memory, p
 
 
 # Create Agents
-def create_educational_agents(student_id: str, session_id: str):
-    print(f"🔹 [System] Creating agents for session: {session_id}")
-    progress_memory = ProgressMemory(student_id)
-    conv_memory = LangChainConversationMemory(session_id)
-    progress_memory.start_session(session_id)
+def create_agent_shell() -> Dict[str, Any]:
+    """Build the session-independent agents; functions are bound per session"""
+    # AutoGen agents share the registry's keep-alive connection pool
+    agent_llm_config = client_registry.with_http_client(llm_config)
 
     print("🔹 [System] Initializing Educational Tutor")
     tutor = AssistantAgent(
         name="Educational_Tutor",
         system_message=AgentConfig.get_tutor_system_message(),
-        llm_config=llm_config,
+        llm_config=agent_llm_config,
         human_input_mode="NEVER",
         max_consecutive_auto_reply=5
     )
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
-    def explain_concept(subject: str, topic: str, difficulty_level: str = "medium", learning_style: str = "visual"):
-        print(f"🔹 [Educational_Tutor] Explaining {topic} in {subject} (Difficulty: {difficulty_level}, Style: {learning_style})")
-        context = conv_memory.get_context()
-        prompt = f"""Using this conversation history:
+    print("🔹 [System] Initializing Progress Tracker")
+    progress_tracker = AssistantAgent(
+        name="Progress_Tracker",
+        system_message=AgentConfig.get_progress_tracker_system_message(),
+        llm_config=agent_llm_config,
+        human_input_mode="NEVER"
+    )
+
+    return {"tutor": tutor, "progress_tracker": progress_tracker}
+
+
+def create_group_chat(tutor: AssistantAgent, progress_tracker: AssistantAgent) -> Dict[str, Any]:
+    """Build the student agent, group chat and manager around a session's agents"""
+    print("🔹 [System] Initializing Student Agent")
+    student = UserProxyAgent(
+        name="Student_Learner",
+        system_message=AgentConfig.get_student_system_message(),
+        max_consecutive_auto_reply=3,
+        code_execution_config=False
+    )
+
+    def custom_speaker_selection(last_speaker, groupchat):
+        agents = groupchat.agents
+        last_message = groupchat.messages[-1]["content"].strip() if groupchat.messages else ""
+        if last_speaker == student and not last_message:
+            return tutor  # Skip empty student responses
+        next_agent = agents[(agents.index(last_speaker) + 1) % len(agents)]
+        print(f"🔹 [GroupChatManager] Next speaker: {next_agent.name}")
+        return next_agent
+
+    groupchat = GroupChat(
+        agents=[student, tutor, progress_tracker],
+        messages=[],
+        max_round=20,
+        speaker_selection_method=custom_speaker_selection
+    )
+
+    print("🔹 [System] Initializing Group Chat Manager")
+    manager = GroupChatManager(
+        groupchat=groupchat,
+        llm_config=client_registry.with_http_client(llm_config),
+        name="Education_Manager"
+    )
+
+    return {"student": student, "groupchat": groupchat, "manager": manager}
+
+
+class SessionAgents(dict):
+    """Session agents dict that builds the group-chat objects on first access.
+
+    The REST API only calls the bound functions, so "student", "groupchat"
+    and "manager" are not created unless a group-chat flow asks for them.
+    """
+
+    LAZY_KEYS = ("student", "groupchat", "manager")
+
+    def __missing__(self, key):
+        if key not in self.LAZY_KEYS:
+            raise KeyError(key)
+        self.update(create_group_chat(self["tutor"], self["progress_tracker"]))
+        return self[key]
+
+
+# Problems requested per LLM call; bigger requests fan out concurrently
+PROBLEM_BATCH_SIZE = max(1, int(os.getenv("PROBLEM_BATCH_SIZE", "3")))
+
+
+def problems_prompt(subject: str, topic: str, count: int, difficulty: str, context: str = "") -> str:
+    history = f"Using this conversation history:\n{context}\n\n" if context else ""
+    return f"""{history}Generate {count} different practice problem(s) for {topic} in {subject} at {difficulty} difficulty. For each problem, include:
+- Question (e.g., 'Solve x^2 - 7x + 10 = 0')
+- Correct answer (e.g., 'x = 2, x = 5')
+- Solution (step-by-step explanation)
+
+Return ONLY a valid JSON object whose "problems" array has exactly {count} entries of this structure:
+{{
+    "problems": [
+        {{
+            "question": "the problem statement",
+            "correct_answer": "the correct answer",
+            "solution": "step-by-step solution explanation"
+        }}
+    ]
+}}"""
+
+
+def parse_problems(response: str) -> List[Dict[str, Any]]:
+    """Valid problems from a {"problems": [...]} object, a bare array or a single problem"""
+    try:
+        parsed = parse_json(response)
+    except StructuredOutputError as e:
+        logger.error(f"Unparseable problems response: {e}")
+        return []
+    if isinstance(parsed, dict):
+        parsed = parsed.get("problems", [parsed])
+    candidates = parsed if isinstance(parsed, list) else []
+    return [
+        p for p in candidates
+        if isinstance(p, dict) and str(p.get("question", "")).strip() and str(p.get("correct_answer", "")).strip()
+    ]
+
+
+def problem_batches(count: int, batch_size: int = PROBLEM_BATCH_SIZE) -> List[int]:
+    """Problems per LLM call; larger requests are split into batches of at most ``batch_size``"""
+    return [min(batch_size, count - i) for i in range(0, count, batch_size)]
+
+
+async def a_generate_bank_problems(subject: str, topic: str, difficulty: str, count: int) -> List[Dict[str, Any]]:
+    """Session-independent problems for the problem bank"""
+    response = await a_llm_reply([
+        {"role": "system", "content": AgentConfig.get_tutor_system_message()},
+        {"role": "user", "content": problems_prompt(subject, topic, count, difficulty)}
+    ], **json_mode)
+    return parse_problems(response)
+
+
+# Ready-made problems for every curriculum topic, refilled in the background.
+# Off by default since stocking every bucket costs LLM calls up front.
+PROBLEM_BANK_SIZE = int(os.getenv("PROBLEM_BANK_SIZE", "0"))
+PROBLEM_BANK_DIFFICULTIES = [d.strip() for d in os.getenv("PROBLEM_BANK_DIFFICULTIES", "easy,medium,hard").split(",")]
+problem_bank = ProblemBank(
+    a_generate_bank_problems,
+    [(subject, topic, difficulty) for subject, topics in SUBJECT_TOPICS.items()
+     for topic in topics for difficulty in PROBLEM_BANK_DIFFICULTIES],
+    size=PROBLEM_BANK_SIZE,
+    batch_size=PROBLEM_BATCH_SIZE,
+    path=os.getenv("PROBLEM_BANK_PATH", "data/problem_bank/problems.json") if PROBLEM_BANK_SIZE > 0 else None
+)
+
+
+# Pre-built shells so session creation doesn't pay for agent construction
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "4"))
+agent_pool = AgentPool(create_agent_shell, size=AGENT_POOL_SIZE)
+
+
+def create_educational_agents(student_id: str, session_id: str):
+    print(f"🔹 [System] Creating agents for session: {session_id}")
+    progress_memory = progress_memories.get(student_id)
+    conv_memory = LangChainConversationMemory(session_id, context_token_budget=CONTEXT_TOKEN_BUDGET)
+    progress_memory.start_session(session_id)
+
+    shell = agent_pool.acquire()
+    tutor = shell["tutor"]
+    progress_tracker = shell["progress_tracker"]
+
+    def tutor_messages(prompt: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": tutor.system_message},
+            {"role": "user", "content": prompt}
+        ]
+
+    def explain_prompt(subject: str, topic: str, difficulty_level: str, learning_style: str, context: str) -> str:
+        return f"""Using this conversation history:
 {context}
 
 Explain {topic} in {subject} at {difficulty_level} difficulty for a high-school student, using a {learning_style} learning style. Provide:
 1. Step-by-step breakdown
 2. One example
 3. One practice question"""
+
+    def record_explanation(subject: str, topic: str, response: str):
+        # Writes the journal and progress files; async callers run it in a thread
+        conv_memory.add_message("tutor", response, {"subject": subject, "topic": topic})
+        progress_memory.update_progress(subject, topic, 0.6, True)
+        progress_memory.update_session(session_id, subject, topic, question_asked=True)
+
+    def explain_concept(subject: str, topic: str, difficulty_level: str = "medium", learning_style: str = "visual"):
+        print(f"🔹 [Educational_Tutor] Explaining {topic} in {subject} (Difficulty: {difficulty_level}, Style: {learning_style})")
+        # The explanation is written for this conversation, so only the same history may reuse it
+        context = conv_memory.get_context()
+        cached = explanation_cache.get(subject, topic, difficulty_level, learning_style, context)
+        if cached is not None:
+            record_explanation(subject, topic, cached)
+            return cached
+        prompt = explain_prompt(subject, topic, difficulty_level, learning_style, context)
         
-        try:
+        def generate():
             print(f"🔹 [Educational_Tutor] Generating explanation...")
-            response = tutor.generate_reply([{"content": prompt, "role": "user"}])
-            conv_memory.add_message("tutor", response, {"subject": subject, "topic": topic})
-            progress_memory.update_progress(subject, topic, 0.6, True)
-            progress_memory.update_session(session_id, subject, topic, question_asked=True)
+            response = llm_reply(tutor, prompt)
+            explanation_cache.set(subject, topic, difficulty_level, learning_style, response, context)
+            return response
+        
+        try:
+            # Students asking for the same explanation with the same history share one call
+            key = explanation_cache.key(subject, topic, difficulty_level, learning_style, context)
+            response = explanation_flights.do(key, generate)
+            record_explanation(subject, topic, response)
             return response
+        except ServiceUnavailableException:
+            raise
         except Exception as e:
             logger.error(f"Error in explain_concept: {e}")
             return f"Sorry, I encountered an error while explaining {topic}. Please try again."
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
-    def create_practice_problems(subject: str, topic: str, count: int = 1, difficulty: str = "medium") -> Dict[str, Any]:
-        print(f"🔹 [Educational_Tutor] Creating {count} practice problem(s) for {topic} in {subject} (Difficulty: {difficulty})")
+    async def a_explain_concept(subject: str, topic: str, difficulty_level: str = "medium", learning_style: str = "visual"):
+        print(f"🔹 [Educational_Tutor] Explaining {topic} in {subject} (Difficulty: {difficulty_level}, Style: {learning_style})")
         context = conv_memory.get_context()
-        prompt = f"""Using this conversation history:
-{context}
+        cached = explanation_cache.get(subject, topic, difficulty_level, learning_style, context)
+        if cached is not None:
+            await asyncio.to_thread(record_explanation, subject, topic, cached)
+            return cached
+        prompt = explain_prompt(subject, topic, difficulty_level, learning_style, context)
+        
+        async def generate():
+            response = await a_llm_reply(tutor_messages(prompt))
+            explanation_cache.set(subject, topic, difficulty_level, learning_style, response, context)
+            return response
+        
+        try:
+            # Students asking for the same explanation with the same history share one call
+            key = explanation_cache.key(subject, topic, difficulty_level, learning_style, context)
+            response = await explanation_flights.a_do(key, generate)
+            await asyncio.to_thread(record_explanation, subject, topic, response)
+            return response
+        except ServiceUnavailableException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in a_explain_concept: {e}")
+            return f"Sorry, I encountered an error while explaining {topic}. Please try again."
 
-Generate {count} practice problem(s) for {topic} in {subject} at {difficulty} difficulty. For each problem, include:
-- Question (e.g., 'Solve x^2 - 7x + 10 = 0')
-- Correct answer (e.g., 'x = 2, x = 5')
-- Solution (step-by-step explanation)
+    async def a_stream_explanation(subject: str, topic: str, difficulty_level: str = "medium",
+                                   learning_style: str = "visual"):
+        """Yield the explanation as it is generated; memories are updated once it completes"""
+        print(f"🔹 [Educational_Tutor] Streaming {topic} in {subject} (Difficulty: {difficulty_level}, Style: {learning_style})")
+        context = conv_memory.get_context()
+        cached = explanation_cache.get(subject, topic, difficulty_level, learning_style, context)
+        if cached is not None:
+            yield cached
+            await asyncio.to_thread(record_explanation, subject, topic, cached)
+            return
+        prompt = explain_prompt(subject, topic, difficulty_level, learning_style, context)
+        
+        chunks = []
+        async for chunk in llm_retry.a_stream(async_llm.stream_reply(tutor_messages(prompt)), llm_breaker):
+            chunks.append(chunk)
+            yield chunk
+        # Not reached if the client disconnects or the stream fails part way
+        response = "".join(chunks)
+        explanation_cache.set(subject, topic, difficulty_level, learning_style, response, context)
+        await asyncio.to_thread(record_explanation, subject, topic, response)
+
+    def register_problem(subject: str, topic: str, difficulty: str, problem: Dict[str, Any]) -> Dict[str, Any]:
+        full_problem_data = {
+            "problem_id": str(uuid.uuid4()),
+            "subject": subject,
+            "topic": topic,
+            "difficulty": difficulty,
+            "problem": problem.get("question", ""),
+            "correct_answer": problem.get("correct_answer", ""),
+            "solution": problem.get("solution", ""),
+            "timestamp": datetime.now().isoformat()
+        }
+        conv_memory.add_message("tutor", json.dumps(problem, indent=2), {"subject": subject, "topic": topic})
+        progress_memory.update_session(session_id, subject, topic, question_asked=True)
+        return full_problem_data
+
+    def handle_problems_response(subject: str, topic: str, difficulty: str, responses: List[str],
+                                 banked: List[Dict[str, Any]], count: int) -> Dict[str, Any]:
+        generated = [problem for response in responses for problem in parse_problems(response)]
+        # The model may return more than it was asked for; extras would sit open in the registry
+        problems = [register_problem(subject, topic, difficulty, problem) for problem in (banked + generated)[:count]]
+        if not problems:
+            return {"error": f"No valid problems in response: {responses}"}
+        for problem in problems:
+            problem_registry.register(session_id, problem)
+        return {"problems": problems}
 
-Return ONLY a valid JSON object with this exact structure:
-{{
-    "question": "the problem statement",
-    "correct_answer": "the correct answer",
-    "solution": "step-by-step solution explanation"
-}}"""
+    def create_practice_problems(subject: str, topic: str, count: int = 1, difficulty: str = "medium") -> Dict[str, Any]:
+        """Blocking variant for the CLI and sync service methods; batches run one after another.
+        
+        The API uses a_create_practice_problems, which generates them concurrently.
+        """
+        print(f"🔹 [Educational_Tutor] Creating {count} practice problem(s) for {topic} in {subject} (Difficulty: {difficulty})")
+        banked = problem_bank.take(subject, topic, difficulty, count)
+        context = conv_memory.get_context() if len(banked) < count else ""
         
         try:
             print(f"🔹 [Educational_Tutor] Generating practice problems...")
-            response = tutor.generate_reply([{"content": prompt, "role": "user"}])
-            
-            # Extract JSON from response
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            
-            if json_start != -1 and json_end > json_start:
-                try:
-                    problem_data = json.loads(response[json_start:json_end])
-                    
-                    # Ensure it's a single problem format
-                    if isinstance(problem_data, list) and len(problem_data) > 0:
-                        problem_data = problem_data[0]
-                    
-                    # Create full problem data with subject and topic
-                    full_problem_data = {
-                        "subject": subject,
-                        "topic": topic,
-                        "problem": problem_data.get("question", ""),
-                        "correct_answer": problem_data.get("correct_answer", ""),
-                        "solution": problem_data.get("solution", ""),
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    
-                    # Store the problem for evaluation
-                    current_problems[session_id] = full_problem_data
-                    
-                    # Add to conversation memory
-                    conv_memory.add_message("tutor", json.dumps(problem_data, indent=2), {"subject": subject, "topic": topic})
-                    progress_memory.update_session(session_id, subject, topic, question_asked=True)
-                    
-                    return full_problem_data
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON decode error: {e}")
-                    return {"error": f"Invalid JSON response: {response}"}
-            else:
-                logger.error(f"No JSON found in response: {response}")
-                return {"error": f"No valid JSON in response: {response}"}
-                
+            responses = [
+                llm_reply(tutor, problems_prompt(subject, topic, n, difficulty, context))
+                for n in problem_batches(count - len(banked))
+            ]
+            return handle_problems_response(subject, topic, difficulty, responses, banked, count)
+        except ServiceUnavailableException:
+            raise
         except Exception as e:
             logger.error(f"Error in create_practice_problems: {e}")
             return {"error": f"Failed to create practice problems: {str(e)}"}
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
-    def evaluate_solution(session_id_param: str, student_solution: str) -> Dict[str, Any]:
-        print(f"🔹 [Educational_Tutor] Evaluating solution for session: {session_id_param}")
-        if session_id_param not in current_problems:
-            return {"error": "No problem assigned. Request a practice problem first."}
+    async def a_create_practice_problems(subject: str, topic: str, count: int = 1, difficulty: str = "medium") -> Dict[str, Any]:
+        print(f"🔹 [Educational_Tutor] Creating {count} practice problem(s) for {topic} in {subject} (Difficulty: {difficulty})")
+        # Stocked problems are served first; only the shortfall goes to the model
+        banked = problem_bank.take(subject, topic, difficulty, count)
+        context = conv_memory.get_context() if len(banked) < count else ""
         
-        problem_data = current_problems[session_id_param]
+        try:
+            results = await asyncio.gather(*[
+                a_llm_reply(tutor_messages(problems_prompt(subject, topic, n, difficulty, context)), **json_mode)
+                for n in problem_batches(count - len(banked))
+            ], return_exceptions=True)
+            # Keep the batches that succeeded
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Problem batch failed: {result}")
+            responses = [result for result in results if not isinstance(result, Exception)]
+            if not responses and not banked and isinstance(results[0], ServiceUnavailableException):
+                raise results[0]
+            return await asyncio.to_thread(handle_problems_response, subject, topic, difficulty, responses, banked, count)
+        except ServiceUnavailableException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in a_create_practice_problems: {e}")
+            return {"error": f"Failed to create practice problems: {str(e)}"}
+
+    def evaluation_prompt(problem_data: Dict[str, Any], student_solution: str) -> str:
         context = conv_memory.get_context()
-        
-        prompt = f"""Using this conversation history:
+        return f"""Using this conversation history:
 {context}
 
 Evaluate the student's solution to the following problem:
@@ -601,60 +1040,99 @@ Provide feedback in JSON format with this exact structure:
 }}
 
 The performance_score should be a float between 0.0 and 1.0."""
+
+    def record_evaluation(session_id_param: str, problem_data: Dict[str, Any], evaluation: Dict[str, Any]) -> Dict[str, Any]:
+        # Log the evaluation
+        conv_memory.add_message("tutor", json.dumps(evaluation, indent=2), 
+                              {"subject": problem_data["subject"], "topic": problem_data["topic"]})
+        
+        # Update progress
+        progress_memory.update_progress(
+            problem_data["subject"],
+            problem_data["topic"],
+            evaluation.get("performance_score", 0.5),
+            evaluation.get("is_correct", False)
+        )
+        
+        progress_memory.update_session(
+            session_id_param,
+            problem_data["subject"],
+            problem_data["topic"],
+            question_asked=True,
+            correct_answer=evaluation.get("is_correct", False)
+        )
+        
+        return evaluation
+
+    def handle_evaluation_response(session_id_param: str, problem_data: Dict[str, Any], response: str) -> Dict[str, Any]:
+        try:
+            evaluation = parse_json(response, dict)
+        except StructuredOutputError as e:
+            logger.error(f"Unparseable evaluation response: {e}")
+            return {"error": f"Invalid evaluation response: {response}"}
+        
+        # Validate required fields
+        if "is_correct" not in evaluation:
+            evaluation["is_correct"] = False
+        if "performance_score" not in evaluation:
+            evaluation["performance_score"] = 0.5
+        if "feedback" not in evaluation:
+            evaluation["feedback"] = "Unable to evaluate properly."
+        
+        return record_evaluation(session_id_param, problem_data, evaluation)
+
+    def find_problem(session_id_param: str, problem_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The given problem if it belongs to the session, else its latest one"""
+        if problem_id:
+            return problem_registry.get(problem_id, session_id_param)
+        return problem_registry.latest(session_id_param)
+
+    def problem_not_found(problem_id: Optional[str]) -> str:
+        if problem_id:
+            return f"Problem {problem_id} not found or expired. Request a new practice problem."
+        return "No problem assigned. Request a practice problem first."
+
+    def evaluate_solution(session_id_param: str, student_solution: str, problem_id: Optional[str] = None) -> Dict[str, Any]:
+        print(f"🔹 [Educational_Tutor] Evaluating solution for session: {session_id_param}")
+        problem_data = find_problem(session_id_param, problem_id)
+        if problem_data is None:
+            return {"error": problem_not_found(problem_id)}
+        local_evaluation = answer_checker.evaluate(problem_data, student_solution)
+        if local_evaluation is not None:
+            return record_evaluation(session_id_param, problem_data, local_evaluation)
+        
+        prompt = evaluation_prompt(problem_data, student_solution)
         
         try:
             print(f"🔹 [Educational_Tutor] Analyzing solution...")
-            response = tutor.generate_reply([{"content": prompt, "role": "user"}])
-            
-            # Extract JSON from response
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            
-            if json_start != -1 and json_end > json_start:
-                try:
-                    evaluation = json.loads(response[json_start:json_end])
-                    
-                    # Validate required fields
-                    if "is_correct" not in evaluation:
-                        evaluation["is_correct"] = False
-                    if "performance_score" not in evaluation:
-                        evaluation["performance_score"] = 0.5
-                    if "feedback" not in evaluation:
-                        evaluation["feedback"] = "Unable to evaluate properly."
-                    
-                    # Log the evaluation
-                    conv_memory.add_message("tutor", json.dumps(evaluation, indent=2), 
-                                          {"subject": problem_data["subject"], "topic": problem_data["topic"]})
-                    
-                    # Update progress
-                    progress_memory.update_progress(
-                        problem_data["subject"],
-                        problem_data["topic"],
-                        evaluation.get("performance_score", 0.5),
-                        evaluation.get("is_correct", False)
-                    )
-                    
-                    progress_memory.update_session(
-                        session_id_param,
-                        problem_data["subject"],
-                        problem_data["topic"],
-                        question_asked=True,
-                        correct_answer=evaluation.get("is_correct", False)
-                    )
-                    
-                    return evaluation
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON decode error in evaluation: {e}")
-                    return {"error": f"Invalid evaluation response: {response}"}
-            else:
-                logger.error(f"No JSON found in evaluation response: {response}")
-                return {"error": f"No valid JSON in evaluation response: {response}"}
-                
+            response = llm_reply(tutor, prompt)
+            return handle_evaluation_response(session_id_param, problem_data, response)
+        except ServiceUnavailableException:
+            raise
         except Exception as e:
             logger.error(f"Error in evaluate_solution: {e}")
             return {"error": f"Failed to evaluate solution: {str(e)}"}
 
+    async def a_evaluate_solution(session_id_param: str, student_solution: str, problem_id: Optional[str] = None) -> Dict[str, Any]:
+        print(f"🔹 [Educational_Tutor] Evaluating solution for session: {session_id_param}")
+        problem_data = find_problem(session_id_param, problem_id)
+        if problem_data is None:
+            return {"error": problem_not_found(problem_id)}
+        local_evaluation = answer_checker.evaluate(problem_data, student_solution)
+        if local_evaluation is not None:
+            return await asyncio.to_thread(record_evaluation, session_id_param, problem_data, local_evaluation)
+        
+        prompt = evaluation_prompt(problem_data, student_solution)
+        
+        try:
+            response = await a_llm_reply(tutor_messages(prompt), **json_mode)
+            return await asyncio.to_thread(handle_evaluation_response, session_id_param, problem_data, response)
+        except ServiceUnavailableException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in a_evaluate_solution: {e}")
+            return {"error": f"Failed to evaluate solution: {str(e)}"}
+
     # Register functions with the tutor
     tutor.register_function(
         function_map={
@@ -664,102 +1142,85 @@ The performance_score should be a float between 0.0 and 1.0."""
         }
     )
 
-    print("🔹 [System] Initializing Student Agent")
-    student = UserProxyAgent(
-        name="Student_Learner",
-        system_message=AgentConfig.get_student_system_message(),
-        max_consecutive_auto_reply=3,
-        code_execution_config=False
-    )
+    def empty_report() -> Dict[str, Any]:
+        return {
+            "summary": "No progress data available yet. Try solving problems!",
+            "strengths": [],
+            "areas_for_improvement": [],
+            "recommendations": ["Solve practice problems", "Ask clarifying questions"],
+            "timestamp": datetime.now().isoformat()
+        }
 
-    print("🔹 [System] Initializing Progress Tracker")
-    progress_tracker = AssistantAgent(
-        name="Progress_Tracker",
-        system_message=AgentConfig.get_progress_tracker_system_message(),
-        llm_config=llm_config,
-        human_input_mode="NEVER"
-    )
+    def local_report() -> tuple:
+        """Rule-based report for the current progress, or a cached finished one"""
+        version = progress_memory.version
+        cached = progress_reports.get(progress_memory, version)
+        if cached is not None:
+            return version, cached, None
+        report = progress_memory.get_progress_report()
+        if not report["subjects"] and not report["sessions"]:
+            return version, empty_report(), None
+        return version, build_progress_report(report), report_digest(report)
+
+    def finish_report(version: int, report: Dict[str, Any], digest: Dict[str, Any], response: Optional[str]):
+        if response is not None and parse_summary(response):
+            report["summary"] = parse_summary(response)
+            # Only reports with a model summary are cached, so failures get retried
+            progress_reports.put(progress_memory, version, report)
+        else:
+            report["summary"] = fallback_summary(digest)
+        return report
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
     def generate_progress_report():
         print(f"🔹 [Progress_Tracker] Generating progress report")
-        report = progress_memory.get_progress_report()
+        version, report, digest = local_report()
+        if digest is None:
+            return report
         
-        if not report["subjects"] and not report["sessions"]:
-            return {
-                "summary": "No progress data available yet. Try solving problems!",
-                "strengths": [],
-                "areas_for_improvement": [],
-                "recommendations": ["Solve practice problems", "Ask clarifying questions"],
-                "timestamp": datetime.now().isoformat()
-            }
-        
-        prompt = f"""Generate a student-friendly JSON progress report based on:
-{json.dumps(report, indent=2)}
+        response = None
+        try:
+            print(f"🔹 [Progress_Tracker] Summarizing progress...")
+            response = llm_reply(progress_tracker, summary_prompt(digest))
+        except Exception as e:
+            logger.error(f"Error generating progress summary: {e}")
+        return finish_report(version, report, digest, response)
 
-Return a JSON object with this exact structure:
-{{
-    "summary": "Brief summary of overall progress",
-    "strengths": ["list of subjects/topics where skill_level > 0.7"],
-    "areas_for_improvement": ["list of subjects/topics where skill_level < 0.5"],
-    "recommendations": ["list of specific recommendations"],
-    "timestamp": "{datetime.now().isoformat()}"
-}}"""
+    async def a_generate_progress_report():
+        print(f"🔹 [Progress_Tracker] Generating progress report")
+        version, report, digest = local_report()
+        if digest is None:
+            return report
         
+        response = None
         try:
-            print(f"🔹 [Progress_Tracker] Analyzing progress data...")
-            response = progress_tracker.generate_reply([{"content": prompt, "role": "user"}])
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            
-            if json_start != -1 and json_end > json_start:
-                return json.loads(response[json_start:json_end])
-            else:
-                return {"error": "Invalid report format"}
-                
+            response = await a_llm_reply([
+                {"role": "system", "content": progress_tracker.system_message},
+                {"role": "user", "content": summary_prompt(digest)}
+            ])
         except Exception as e:
-            logger.error(f"Error generating progress report: {e}")
-            return {"error": f"Failed to generate report: {str(e)}"}
+            logger.error(f"Error generating progress summary: {e}")
+        return finish_report(version, report, digest, response)
 
     progress_tracker.register_function(
         function_map={"generate_progress_report": generate_progress_report}
     )
 
-    def custom_speaker_selection(last_speaker, groupchat):
-        agents = groupchat.agents
-        last_message = groupchat.messages[-1]["content"].strip() if groupchat.messages else ""
-        if last_speaker == student and not last_message:
-            return tutor  # Skip empty student responses
-        next_agent = agents[(agents.index(last_speaker) + 1) % len(agents)]
-        print(f"🔹 [GroupChatManager] Next speaker: {next_agent.name}")
-        return next_agent
-
-    groupchat = GroupChat(
-        agents=[student, tutor, progress_tracker],
-        messages=[],
-        max_round=20,
-        speaker_selection_method=custom_speaker_selection
-    )
-
-    print("🔹 [System] Initializing Group Chat Manager")
-    manager = GroupChatManager(
-        groupchat=groupchat,
-        llm_config=llm_config,
-        name="Education_Manager"
-    )
-
-    return {
-        "student": student,
+    return SessionAgents({
         "tutor": tutor,
         "progress_tracker": progress_tracker,
-        "manager": manager,
+        "shell": shell,
         "progress_memory": progress_memory,
         "conv_memory": conv_memory,
         "explain_concept": explain_concept,
         "create_practice_problems": create_practice_problems,
         "evaluate_solution": evaluate_solution,
-        "generate_progress_report": generate_progress_report
-    }
+        "generate_progress_report": generate_progress_report,
+        "a_explain_concept": a_explain_concept,
+        "a_stream_explanation": a_stream_explanation,
+        "a_create_practice_problems": a_create_practice_problems,
+        "a_evaluate_solution": a_evaluate_solution,
+        "a_generate_progress_report": a_generate_progress_report
+    })
 
 
 # Main Execution
@@ -798,6 +1259,7 @@ def main():
 
             if action == "6":
                 print("\n=== Session Ended ===")
+                progress_memory.flush()
                 break
 
             if action not in ["1", "2", "3", "4", "5", "6"]:
@@ -851,8 +1313,9 @@ def main():
                     if "error" in problems:
                         print(f"Error: {problems['error']}")
                     else:
-                        print(f"\n Practice Problem:")
-                        print(f"Question: {problems.get('problem', 'N/A')}")
+                        for i, problem in enumerate(problems["problems"], 1):
+                            print(f"\n Practice Problem {i}:")
+                            print(f"Question: {problem.get('problem', 'N/A')}")
                         print(f"(Answer will be revealed after you submit your solution)")
                     
                     conv_memory.add_message("student", query, {"subject": subject, "topic": topic})
@@ -909,6 +1372,7 @@ def main():
                         if "error" in problem_data:
                             print(f"Error generating problem: {problem_data['error']}")
                             continue
+                        problem_data = problem_data["problems"][0]
                         
                         # Display the problem immediately
                         print("\n" + "=" * 60)
@@ -929,10 +1393,10 @@ def main():
                         )
                     
                     elif solve_choice == "2":
-                        if session_id not in current_problems:
+                        problem_data = problem_registry.latest(session_id)
+                        if problem_data is None:
                             print("No saved problems available. Request a new problem first.")
                         else:
-                            problem_data = current_problems[session_id]
                             print("\n Continuing with your saved problem:")
                             # Display the problem
                             print("\n" + "=" * 60)
@@ -1,8 +1,8 @@
 from autogen import AssistantAgent
 from config.agent_config import AgentConfig
-from tenacity import retry, stop_after_attempt, wait_fixed
-import json
+from utils.resilience import circuit_breakers, endpoint_name, llm_retry
 from datetime import datetime
+from memory.progress_report import build_progress_report, report_digest, summary_prompt, parse_summary, fallback_summary
 
 def create_progress_tracker_agent(llm_config, progress_memory):
     progress_tracker = AssistantAgent(
@@ -11,8 +11,8 @@ def create_progress_tracker_agent(llm_config, progress_memory):
         llm_config=llm_config,
         human_input_mode="NEVER"
     )
+    breaker = circuit_breakers.get(endpoint_name(llm_config["config_list"][0]))
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
     def generate_progress_report():
         report = progress_memory.get_progress_report()
         if not report["subjects"] and not report["sessions"]:
@@ -23,21 +23,16 @@ def create_progress_tracker_agent(llm_config, progress_memory):
                 "recommendations": ["Solve practice problems", "Ask clarifying questions"],
                 "timestamp": datetime.now().isoformat()
             }
-        prompt = f"""Generate a student-friendly JSON progress report based on:
-{json.dumps(report, indent=2)}
-
-Return a JSON object with this exact structure:
-{{
-    "summary": "Brief summary of overall progress",
-    "strengths": ["list of subjects/topics where skill_level > 0.7"],
-    "areas_for_improvement": ["list of subjects/topics where skill_level < 0.5"],
-    "recommendations": ["list of specific recommendations"],
-    "timestamp": "{datetime.now().isoformat()}"
-}}"""
-        response = progress_tracker.generate_reply([{"content": prompt, "role": "user"}])
-        json_start = response.find('{')
-        json_end = response.rfind('}') + 1
-        return json.loads(response[json_start:json_end])
+        result = build_progress_report(report)
+        digest = report_digest(report)
+        response = llm_retry.call(
+            progress_tracker.generate_reply, [{"content": summary_prompt(digest), "role": "user"}], breaker=breaker
+        )
+        if response is not None and parse_summary(response):
+            result["summary"] = parse_summary(response)
+        else:
+            result["summary"] = fallback_summary(digest)
+        return result
 
     progress_tracker.register_function(
         function_map={"generate_progress_report": generate_progress_report}
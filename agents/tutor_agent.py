@@ -1,6 +1,8 @@
+import json
 from autogen import AssistantAgent
 from config.agent_config import AgentConfig
-from tenacity import retry, stop_after_attempt, wait_fixed
+from utils.resilience import circuit_breakers, endpoint_name, llm_retry
+from utils.structured_output import parse_json
 
 def create_tutor_agent(llm_config, conv_memory, progress_memory, session_id):
     tutor = AssistantAgent(
@@ -10,8 +12,11 @@ def create_tutor_agent(llm_config, conv_memory, progress_memory, session_id):
         human_input_mode="NEVER",
         max_consecutive_auto_reply=5
     )
+    breaker = circuit_breakers.get(endpoint_name(llm_config["config_list"][0]))
+
+    def reply(prompt: str) -> str:
+        return llm_retry.call(tutor.generate_reply, [{"content": prompt, "role": "user"}], breaker=breaker)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
     def explain_concept(subject: str, topic: str, difficulty_level: str = "medium", learning_style: str = "visual"):
         context = conv_memory.get_context()
         prompt = f"""Using this conversation history:
@@ -21,13 +26,12 @@ Explain {topic} in {subject} at {difficulty_level} difficulty for a high-school
 1. Step-by-step breakdown
 2. One example
 3. One practice question"""
-        response = tutor.generate_reply([{"content": prompt, "role": "user"}])
+        response = reply(prompt)
         conv_memory.add_message("tutor", response, {"subject": subject, "topic": topic})
         progress_memory.update_progress(subject, topic, 0.6, True)
         progress_memory.update_session(session_id, subject, topic, question_asked=True)
         return response
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
     def create_practice_problems(subject: str, topic: str, count: int = 1, difficulty: str = "medium") -> dict:
         context = conv_memory.get_context()
         prompt = f"""Using this conversation history:
@@ -44,15 +48,12 @@ Return ONLY a valid JSON object with this exact structure:
     "correct_answer": "the correct answer",
     "solution": "step-by-step solution explanation"
 }}"""
-        response = tutor.generate_reply([{"content": prompt, "role": "user"}])
-        json_start = response.find('{')
-        json_end = response.rfind('}') + 1
-        problem_data = json.loads(response[json_start:json_end])
+        response = reply(prompt)
+        problem_data = parse_json(response, dict)
         conv_memory.add_message("tutor", json.dumps(problem_data, indent=2), {"subject": subject, "topic": topic})
         progress_memory.update_session(session_id, subject, topic, question_asked=True)
         return problem_data
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
     def evaluate_solution(session_id_param: str, student_solution: str, current_problems: dict) -> dict:
         if session_id_param not in current_problems:
             return {"error": "No problem assigned. Request a practice problem first."}
@@ -73,10 +74,8 @@ Provide feedback in JSON format with this exact structure:
     "feedback": "detailed explanation of correctness, errors, and improvement tips",
     "performance_score": 0.85
 }}"""
-        response = tutor.generate_reply([{"content": prompt, "role": "user"}])
-        json_start = response.find('{')
-        json_end = response.rfind('}') + 1
-        evaluation = json.loads(response[json_start:json_end])
+        response = reply(prompt)
+        evaluation = parse_json(response, dict)
         conv_memory.add_message("tutor", json.dumps(evaluation, indent=2), 
                               {"subject": problem_data["subject"], "topic": problem_data["topic"]})
         progress_memory.update_progress(
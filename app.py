@@ -1,6 +1,6 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
 import uvicorn
 import uuid
@@ -8,31 +8,53 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import os
+import json
 
 # Import models and services
 from models.api_models import *
 from services.agent_service import EducationalAgentService
 from services.session_manager import SessionManager
-from utils.exceptions import AgentException, SessionNotFoundException
+from services.session_store import MemorySessionBackend, SQLiteSessionBackend
+from services.dashboard_cache import DashboardCache
+from services.problem_bank import SUBJECT_TOPICS
+from agent import agent_pool, progress_memories, problem_bank, problem_registry, answer_checker, subject_classifier
+from memory.write_behind import progress_flusher
+from llm_providers.client_registry import client_registry
+from utils.exceptions import AgentException, ServiceUnavailableException, SessionNotFoundException
+from utils.resilience import circuit_breakers, llm_retry, request_deadline
+from utils.structured_output import structured_output
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Global services
-agent_service = EducationalAgentService()
-session_manager = SessionManager()
-executor = ThreadPoolExecutor(max_workers=4)
+# Dashboards are rebuilt only after the student's progress or sessions change
+dashboard_cache = DashboardCache(ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "30")))
+progress_memories.on_change = dashboard_cache.invalidate
+# SQLite lets sessions survive restarts and move between uvicorn workers (one at a time)
+session_manager = SessionManager(
+    backend=SQLiteSessionBackend(os.getenv("SESSION_DB_PATH", "data/sessions/sessions.db"))
+    if os.getenv("SESSION_BACKEND", "memory") == "sqlite" else MemorySessionBackend(),
+    on_change=dashboard_cache.invalidate
+)
+agent_service = EducationalAgentService(session_manager)
+# Retries and backoff stop once a request has run this long, so clients get a 503 instead of hanging
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "60"))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan management"""
     logger.info("Starting Educational Tutor API")
+    agent_pool.start()
+    problem_bank.start()
     yield
     logger.info("Shutting down Educational Tutor API")
-    executor.shutdown(wait=True)
+    await problem_bank.stop()
+    session_manager.stop_cleanup_thread()
+    progress_flusher.stop()
+    await client_registry.aclose()
 
 # Create FastAPI app
 app = FastAPI(
@@ -51,10 +73,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def apply_request_deadline(request: Request, call_next):
+    """Bound the LLM retries made while handling a request to REQUEST_DEADLINE"""
+    with request_deadline(REQUEST_DEADLINE):
+        return await call_next(request)
+
 # Dependency for getting session
 async def get_session(session_id: str) -> Dict[str, Any]:
     """Get session data"""
-    session = session_manager.get_session(session_id)
+    # A session stored by another worker is rebuilt on first use, which builds agents and reads disk
+    session = await asyncio.to_thread(session_manager.get_session, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     return session
@@ -79,15 +108,7 @@ async def create_session(request: CreateSessionRequest):
         student_id = request.student_id or f"student_{uuid.uuid4().hex[:8]}"
         
         # Create session in background
-        loop = asyncio.get_event_loop()
-        session_data = await loop.run_in_executor(
-            executor, 
-            agent_service.create_session, 
-            student_id, 
-            session_id
-        )
-        
-        session_manager.create_session(session_id, student_id, session_data)
+        await asyncio.to_thread(agent_service.create_session, student_id, session_id)
         
         return SessionResponse(
             session_id=session_id,
@@ -112,7 +133,8 @@ async def get_session_info(session_id: str, session: Dict = Depends(get_session)
 @app.delete("/api/sessions/{session_id}")
 async def delete_session(session_id: str, session: Dict = Depends(get_session)):
     """Delete a session"""
-    session_manager.delete_session(session_id)
+    # Closing flushes the session's progress to disk
+    await asyncio.to_thread(agent_service.close_session, session_id)
     return {"message": "Session deleted successfully"}
 
 # Concept Learning Endpoints
@@ -124,11 +146,8 @@ async def explain_concept(
 ):
     """Get explanation for a concept"""
     try:
-        loop = asyncio.get_event_loop()
-        explanation = await loop.run_in_executor(
-            executor,
-            agent_service.explain_concept,
-            session_id,
+        explanation = await agent_service.a_explain_concept(
+            session,
             request.subject,
             request.topic,
             request.difficulty_level,
@@ -143,12 +162,66 @@ async def explain_concept(
             explanation=explanation,
             timestamp=datetime.now().isoformat()
         )
+    except ServiceUnavailableException:
+        raise
     except AgentException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error explaining concept: {e}")
         raise HTTPException(status_code=500, detail="Failed to explain concept")
 
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events message"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.post("/api/sessions/{session_id}/concepts/explain/stream")
+async def stream_concept_explanation(
+    session_id: str, 
+    request: ExplainConceptRequest,
+    session: Dict = Depends(get_session)
+):
+    """Stream a concept explanation as Server-Sent Events.
+    
+    Each chunk arrives as a ``data: {"delta": ...}`` message; a final ``done``
+    event carries the full ConceptExplanationResponse, or an ``error`` event
+    is sent if generation fails part way.
+    """
+    chunks = agent_service.stream_concept_explanation(
+        session,
+        request.subject,
+        request.topic,
+        request.difficulty_level,
+        request.learning_style
+    )
+    
+    async def events():
+        explanation = []
+        try:
+            async for chunk in chunks:
+                explanation.append(chunk)
+                yield sse_event({"delta": chunk})
+        except Exception as e:
+            logger.error(f"Error streaming explanation: {e}")
+            yield sse_event({"detail": "Failed to explain concept"}, event="error")
+            return
+        response = ConceptExplanationResponse(
+            subject=request.subject,
+            topic=request.topic,
+            difficulty_level=request.difficulty_level,
+            learning_style=request.learning_style,
+            explanation="".join(explanation),
+            timestamp=datetime.now().isoformat()
+        )
+        yield sse_event(response.model_dump(), event="done")
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Practice Problem Endpoints
 @app.post("/api/sessions/{session_id}/problems/generate", response_model=PracticeProblemsResponse)
 async def generate_practice_problems(
@@ -158,11 +231,8 @@ async def generate_practice_problems(
 ):
     """Generate practice problems"""
     try:
-        loop = asyncio.get_event_loop()
-        problems = await loop.run_in_executor(
-            executor,
-            agent_service.create_practice_problems,
-            session_id,
+        problems = await agent_service.a_create_practice_problems(
+            session,
             request.subject,
             request.topic,
             request.count,
@@ -176,25 +246,18 @@ async def generate_practice_problems(
             difficulty=request.difficulty,
             problems=[
                 ProblemData(
-                    problem_id=str(uuid.uuid4()),
-                    question=problems.get("problem", ""),
-                    subject=request.subject,
-                    topic=request.topic,
-                    difficulty=request.difficulty,
-                    created_at=datetime.now().isoformat()
-                )
-            ] if not isinstance(problems, list) else [
-                ProblemData(
-                    problem_id=str(uuid.uuid4()),
+                    problem_id=problem["problem_id"],
                     question=problem.get("problem", ""),
                     subject=request.subject,
                     topic=request.topic,
                     difficulty=request.difficulty,
-                    created_at=datetime.now().isoformat()
-                ) for problem in problems
+                    created_at=problem.get("timestamp", datetime.now().isoformat())
+                ) for problem in problems["problems"]
             ],
             generated_at=datetime.now().isoformat()
         )
+    except ServiceUnavailableException:
+        raise
     except AgentException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -209,12 +272,10 @@ async def evaluate_solution(
 ):
     """Evaluate a student's solution"""
     try:
-        loop = asyncio.get_event_loop()
-        evaluation = await loop.run_in_executor(
-            executor,
-            agent_service.evaluate_solution,
-            session_id,
-            request.solution
+        evaluation = await agent_service.a_evaluate_solution(
+            session,
+            request.solution,
+            request.problem_id
         )
         
         if "error" in evaluation:
@@ -228,6 +289,8 @@ async def evaluate_solution(
             feedback=evaluation.get("feedback", ""),
             evaluated_at=datetime.now().isoformat()
         )
+    except ServiceUnavailableException:
+        raise
     except AgentException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -242,12 +305,7 @@ async def get_progress_report(
 ):
     """Get progress report for a session"""
     try:
-        loop = asyncio.get_event_loop()
-        report = await loop.run_in_executor(
-            executor,
-            agent_service.generate_progress_report,
-            session_id
-        )
+        report = await agent_service.a_generate_progress_report(session)
         
         if "error" in report:
             raise AgentException(report["error"])
@@ -261,6 +319,8 @@ async def get_progress_report(
             recommendations=report.get("recommendations", []),
             generated_at=report.get("timestamp", datetime.now().isoformat())
         )
+    except ServiceUnavailableException:
+        raise
     except AgentException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -271,12 +331,7 @@ async def get_progress_report(
 async def get_student_analytics(student_id: str):
     """Get comprehensive analytics for a student"""
     try:
-        loop = asyncio.get_event_loop()
-        analytics = await loop.run_in_executor(
-            executor,
-            agent_service.get_student_analytics,
-            student_id
-        )
+        analytics = await asyncio.to_thread(agent_service.get_student_analytics, student_id)
         
         return StudentAnalyticsResponse(
             student_id=student_id,
@@ -301,13 +356,7 @@ async def get_conversation_history(
 ):
     """Get conversation history for a session"""
     try:
-        loop = asyncio.get_event_loop()
-        history = await loop.run_in_executor(
-            executor,
-            agent_service.get_conversation_history,
-            session_id,
-            limit
-        )
+        history = await asyncio.to_thread(agent_service.get_conversation_history, session_id, limit)
         
         return ConversationHistoryResponse(
             session_id=session_id,
@@ -330,12 +379,7 @@ async def get_conversation_history(
 async def get_user_profile(student_id: str):
     """Get user profile"""
     try:
-        loop = asyncio.get_event_loop()
-        profile = await loop.run_in_executor(
-            executor,
-            agent_service.get_user_profile,
-            student_id
-        )
+        profile = await asyncio.to_thread(agent_service.get_user_profile, student_id)
         
         return UserProfileResponse(
             student_id=student_id,
@@ -352,12 +396,8 @@ async def get_user_profile(student_id: str):
 async def update_user_profile(student_id: str, request: UpdateUserProfileRequest):
     """Update user profile"""
     try:
-        loop = asyncio.get_event_loop()
-        profile = await loop.run_in_executor(
-            executor,
-            agent_service.update_user_profile,
-            student_id,
-            request.learning_preferences
+        profile = await asyncio.to_thread(
+            agent_service.update_user_profile, student_id, request.learning_preferences
         )
         
         return UserProfileResponse(
@@ -375,60 +415,107 @@ async def update_user_profile(student_id: str, request: UpdateUserProfileRequest
 @app.get("/api/subjects", response_model=List[str])
 async def get_available_subjects():
     """Get list of available subjects"""
-    return ["Mathematics", "Physics", "Chemistry", "Biology", "General"]
+    return list(SUBJECT_TOPICS)
 
 @app.get("/api/subjects/{subject}/topics", response_model=List[str])
 async def get_subject_topics(subject: str):
     """Get topics for a specific subject"""
-    topics_map = {
-        "Mathematics": ["Algebra", "Geometry", "Calculus", "Statistics", "Trigonometry"],
-        "Physics": ["Mechanics", "Thermodynamics", "Electromagnetism", "Optics", "Modern Physics"],
-        "Chemistry": ["Organic Chemistry", "Inorganic Chemistry", "Physical Chemistry", "Biochemistry"],
-        "Biology": ["Cell Biology", "Genetics", "Ecology", "Evolution", "Human Biology"],
-        "General": ["Problem Solving", "Critical Thinking", "Study Skills"]
-    }
-    return topics_map.get(subject, [])
+    return SUBJECT_TOPICS.get(subject, [])
+
+@app.get("/api/metrics/cache")
+async def get_cache_metrics():
+    """Get hit/miss counters for the explanation cache"""
+    return agent_service.get_cache_stats()
+
+@app.get("/api/metrics/agent-pool")
+async def get_agent_pool_metrics():
+    """Get hit rate and availability for the pre-built agent pool"""
+    return agent_service.get_agent_pool_stats()
+
+@app.get("/api/metrics/problem-bank")
+async def get_problem_bank_metrics():
+    """Get stock levels and hit rate for the pre-generated problem bank"""
+    return problem_bank.stats()
+
+@app.get("/api/metrics/problem-registry")
+async def get_problem_registry_metrics():
+    """Get counts of open practice problems awaiting evaluation"""
+    return problem_registry.stats()
+
+@app.get("/api/metrics/answer-checker")
+async def get_answer_checker_metrics():
+    """Get how many solutions were graded locally instead of by the LLM"""
+    return answer_checker.stats()
+
+@app.get("/api/metrics/classifier")
+async def get_classifier_metrics():
+    """Get how often each subject classifier tier answered a query"""
+    return subject_classifier.stats()
+
+@app.get("/api/metrics/structured-output")
+async def get_structured_output_metrics():
+    """Get how many LLM replies needed JSON repairs instead of a re-ask"""
+    return structured_output.stats()
+
+@app.get("/api/metrics/circuit-breakers")
+async def get_circuit_breaker_metrics():
+    """Get the state of each LLM endpoint's circuit breaker and the retry counters"""
+    return {"breakers": circuit_breakers.stats(), "retries": llm_retry.stats()}
+
+@app.get("/api/metrics/dashboard-cache")
+async def get_dashboard_cache_metrics():
+    """Get hit/miss counters for the materialized dashboard views"""
+    return dashboard_cache.stats()
 
 # Dashboard endpoint
 @app.get("/api/students/{student_id}/dashboard", response_model=DashboardResponse)
-async def get_dashboard_data(student_id: str):
+async def get_dashboard_data(student_id: str, request: Request):
     """Get dashboard data for a student"""
-    try:
-        loop = asyncio.get_event_loop()
-        analytics = await loop.run_in_executor(
-            executor,
-            agent_service.get_student_analytics,
-            student_id
-        )
-        
-        # Create dashboard summary
-        dashboard_summary = DashboardSummary(
-            recent_activity=[
-                {"type": "session", "description": f"Completed {analytics['total_sessions']} sessions"},
-                {"type": "problems", "description": f"Solved {analytics['total_problems_solved']} problems"},
-                {"type": "subjects", "description": f"Studied {len(analytics['subjects_studied'])} subjects"}
-            ],
-            performance_summary={
-                "average_score": analytics["average_score"],
-                "total_problems": analytics["total_problems_solved"],
-                "subjects_count": len(analytics["subjects_studied"])
-            },
-            recommended_actions=[
-                "Try practicing more problems",
-                "Review challenging topics",
-                "Explore new subjects"
-            ],
-            active_sessions=len(session_manager.get_student_sessions(student_id))
-        )
-        
-        return DashboardResponse(
-            student_id=student_id,
-            summary=dashboard_summary,
-            timestamp=datetime.now().isoformat()
-        )
-    except Exception as e:
-        logger.error(f"Error getting dashboard data: {e}")
-        raise HTTPException(status_code=500, detail="Failed to get dashboard data")
+    view = dashboard_cache.get(student_id)
+    if view is None:
+        try:
+            version = dashboard_cache.version(student_id)
+            analytics = await asyncio.to_thread(agent_service.get_student_analytics, student_id)
+            
+            # Create dashboard summary
+            dashboard_summary = DashboardSummary(
+                recent_activity=[
+                    {"type": "session", "description": f"Completed {analytics['total_sessions']} sessions"},
+                    {"type": "problems", "description": f"Solved {analytics['total_problems_solved']} problems"},
+                    {"type": "subjects", "description": f"Studied {len(analytics['subjects_studied'])} subjects"}
+                ],
+                performance_summary={
+                    "average_score": analytics["average_score"],
+                    "total_problems": analytics["total_problems_solved"],
+                    "subjects_count": len(analytics["subjects_studied"])
+                },
+                recommended_actions=[
+                    "Try practicing more problems",
+                    "Review challenging topics",
+                    "Explore new subjects"
+                ],
+                active_sessions=session_manager.get_student_session_count(student_id)
+            )
+            
+            response = DashboardResponse(
+                student_id=student_id,
+                summary=dashboard_summary,
+                timestamp=datetime.now().isoformat()
+            )
+            view = dashboard_cache.put(
+                student_id, version, response.model_dump_json().encode(),
+                dashboard_summary.model_dump_json().encode()
+            )
+        except Exception as e:
+            logger.error(f"Error getting dashboard data: {e}")
+            raise HTTPException(status_code=500, detail="Failed to get dashboard data")
+    
+    headers = {"ETag": view.etag, "Cache-Control": "private, no-cache"}
+    # If-None-Match uses weak comparison, so a W/ prefix on either side is ignored
+    if_none_match = [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]
+    if "*" in if_none_match or view.etag.removeprefix("W/") in if_none_match:
+        return Response(status_code=304, headers=headers)
+    return Response(content=view.body, media_type="application/json", headers=headers)
 
 # Error handlers
 @app.exception_handler(SessionNotFoundException)
@@ -445,6 +532,14 @@ async def agent_exception_handler(request, exc):
         content={"detail": str(exc)}
     )
 
+@app.exception_handler(ServiceUnavailableException)
+async def service_unavailable_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(circuit_breakers.reset_timeout))}
+    )
+
 if __name__ == "__main__":
     # Ensure Docker is disabled for AutoGen
     os.environ["AUTOGEN_USE_DOCKER"] = "False"
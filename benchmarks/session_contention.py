@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+SessionManager throughput under concurrent access
+
+Worker threads hammer get_session/update_session on random sessions while
+one thread polls get_session_stats and another creates and deletes
+sessions. Reports request throughput and tail latency. --sorted-stats
+replaces the stats poller with the old implementation, which sorted every
+session while holding the lock.
+
+    python benchmarks/session_contention.py --threads 32
+    python benchmarks/session_contention.py --sorted-stats
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.session_manager import SessionManager
+
+
+def sorted_stats(manager: SessionManager):
+    """The previous get_session_stats: sort all sessions under the lock"""
+    with manager._lock:
+        sorted(manager.sessions.values(), key=lambda x: x["created_at"])
+
+
+def run(sessions: int, threads: int, duration: float, legacy_stats: bool = False):
+    manager = SessionManager()
+    manager.stop_cleanup_thread()
+    session_ids = [f"session_{i}" for i in range(sessions)]
+    for i, session_id in enumerate(session_ids):
+        manager.create_session(session_id, f"student_{i % 1000}", {})
+
+    # Threads watch the clock themselves; with this many busy threads the
+    # main thread can be starved of the GIL for a long time after sleeping
+    end = time.perf_counter() + duration
+    latencies = [[] for _ in range(threads)]
+
+    def worker(samples):
+        rng = random.Random()
+        while time.perf_counter() < end:
+            session_id = rng.choice(session_ids)
+            start = time.perf_counter()
+            if rng.random() < 0.8:
+                manager.get_session(session_id)
+            else:
+                manager.update_session(session_id, {"last_action": "explain"})
+            samples.append(time.perf_counter() - start)
+
+    def stats_poller():
+        while time.perf_counter() < end:
+            if legacy_stats:
+                sorted_stats(manager)
+            else:
+                manager.get_session_stats()
+            time.sleep(0.01)
+
+    def churn():
+        i = 0
+        while time.perf_counter() < end:
+            manager.create_session(f"churn_{i}", "student_churn", {})
+            manager.delete_session(f"churn_{i}")
+            i += 1
+
+    pool = [threading.Thread(target=worker, args=(samples,)) for samples in latencies]
+    pool += [threading.Thread(target=stats_poller), threading.Thread(target=churn)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    samples = sorted(s for per_thread in latencies for s in per_thread)
+    p50 = samples[len(samples) // 2] * 1e6
+    p99 = samples[int(len(samples) * 0.99)] * 1e6
+    label = "sorted stats" if legacy_stats else "snapshot stats"
+    print(f"{len(samples) / duration:>10,.0f} ops/s   p50 {p50:7.1f} us   p99 {p99:8.1f} us  {label}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--sorted-stats", action="store_true", help="poll stats the old way")
+    args = parser.parse_args()
+
+    run(args.sessions, args.threads, args.duration, args.sorted_stats)
+
+
+if __name__ == "__main__":
+    main()
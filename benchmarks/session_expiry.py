@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+SessionManager expiry cost with many live sessions
+
+Fills a SessionManager with N sessions, expires a small fraction of them and
+times get_session and cleanup_expired_sessions. The old cleanup parsed
+every session's last_accessed ISO string under the lock; that scan is timed
+on the same sessions as a baseline.
+
+    python benchmarks/session_expiry.py --sessions 100000 --expired 1000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.session_manager import SessionManager
+
+
+def full_scan(manager: SessionManager) -> int:
+    """The previous cleanup: parse and compare every last_accessed timestamp"""
+    now = datetime.now()
+    timeout = timedelta(seconds=manager.session_timeout)
+    return sum(
+        1 for session in manager.sessions.values()
+        if now - datetime.fromisoformat(session["last_accessed"]) > timeout
+    )
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--expired", type=int, default=1000)
+    args = parser.parse_args()
+
+    manager = SessionManager()
+    manager.stop_cleanup_thread()
+
+    _, elapsed = timed(lambda: [
+        manager.create_session(f"session_{i}", f"student_{i % 1000}", {}) for i in range(args.sessions)
+    ])
+    print(f"create {args.sessions} sessions:      {elapsed * 1000:8.1f} ms")
+
+    _, elapsed = timed(lambda: [manager.get_session(f"session_{i}") for i in range(args.sessions)])
+    print(f"get_session (per call):       {elapsed / args.sessions * 1e6:8.2f} us")
+
+    _, elapsed = timed(manager.cleanup_expired_sessions)
+    print(f"cleanup, nothing expired:     {elapsed * 1000:8.3f} ms")
+
+    # Sessions created with a zero timeout are due immediately
+    manager.session_timeout, timeout = 0, manager.session_timeout
+    for i in range(args.expired):
+        manager.create_session(f"expired_{i}", "student_expired", {})
+    manager.session_timeout = timeout
+
+    _, elapsed = timed(full_scan, manager)
+    print(f"full-scan baseline:           {elapsed * 1000:8.1f} ms")
+
+    _, elapsed = timed(manager.cleanup_expired_sessions)
+    print(f"cleanup, {args.expired} expired:        {elapsed * 1000:8.1f} ms")
+    print(f"sessions left:                {manager.get_active_sessions_count():8d}")
+
+
+if __name__ == "__main__":
+    main()
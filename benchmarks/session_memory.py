@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Memory retained per session by create_educational_agents
+
+Creates N sessions in a scratch directory and reports the traced memory
+they keep alive. --eager also builds the group-chat objects (student agent,
+GroupChat and GroupChatManager) for every session, which is what each
+session used to hold before they were created lazily.
+
+    python benchmarks/session_memory.py --sessions 50
+    python benchmarks/session_memory.py --sessions 50 --eager
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import agent
+
+
+def measure(sessions: int, eager: bool) -> float:
+    # Agents are only constructed, never called, so a placeholder key is enough
+    config = agent.llm_config["config_list"][0]
+    config["api_key"] = config["api_key"] or "benchmark"
+    config["base_url"] = config["base_url"] or "https://example.openai.azure.com/"
+    # Bypass the pool so every session owns freshly built agents
+    agent.agent_pool.size = 0
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        # Warm-up session so imports and one-off caches aren't counted
+        agent.create_educational_agents("warmup", "warmup")
+        gc.collect()
+        tracemalloc.start()
+        start, _ = tracemalloc.get_traced_memory()
+
+        held = []
+        for i in range(sessions):
+            agents = agent.create_educational_agents(f"student_{i}", f"session_{i}")
+            if eager:
+                agents["manager"]
+            held.append(agents)
+
+        gc.collect()
+        end, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return (end - start) / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--eager", action="store_true", help="also build the group-chat objects")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        per_session = measure(args.sessions, args.eager)
+        agent.progress_flusher.flush_all()
+        os.chdir(ROOT)
+
+    mode = "eager group chat" if args.eager else "lazy group chat"
+    print(f"{args.sessions} sessions ({mode}): {per_session / 1024:.1f} KiB per session")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from .openai_provider import OpenAIProvider
 from .azure_openai_provider import AzureOpenAIProvider
+from .async_openai_provider import AsyncOpenAIProvider
 from .huggingface_provider import HuggingFaceProvider
 from .gemini_provider import GeminiProvider
+from .stub_provider import StubProvider
 
-__all__ = ['OpenAIProvider', 'AzureOpenAIProvider', 'HuggingFaceProvider', 'GeminiProvider']
\ No newline at end of file
+__all__ = ['OpenAIProvider', 'AzureOpenAIProvider', 'AsyncOpenAIProvider', 'HuggingFaceProvider', 'GeminiProvider', 'StubProvider']
\ No newline at end of file
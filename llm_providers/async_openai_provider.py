@@ -0,0 +1,45 @@
+import asyncio
+
+from .client_registry import client_registry
+
+class AsyncOpenAIProvider:
+    """Async chat completions for Azure or OpenAI, bounded by a semaphore"""
+
+    def __init__(self, config, max_concurrency: int = 16):
+        self.config = config["config_list"][0]
+        self.model = self.config["model"]
+        self.temperature = config.get("temperature", 0.7)
+        self.timeout = config.get("timeout", 120)
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def client(self):
+        # Resolved through the registry on every use: importing with placeholder
+        # credentials doesn't fail, and a client closed in shutdown is replaced
+        return client_registry.get_client(self.config, is_async=True, timeout=self.timeout)
+
+    async def generate_reply(self, messages, **kwargs):
+        async with self.semaphore:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=kwargs.pop("temperature", self.temperature),
+                **kwargs
+            )
+        return response.choices[0].message.content
+
+    async def stream_reply(self, messages, **kwargs):
+        """Yield the completion's text as the model produces it"""
+        async with self.semaphore:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=kwargs.pop("temperature", self.temperature),
+                stream=True,
+                **kwargs
+            )
+            async for chunk in stream:
+                # Azure sends content-filter chunks with no choices
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
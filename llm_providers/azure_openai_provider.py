@@ -1,13 +1,15 @@
-from openai import AzureOpenAI
+from .client_registry import client_registry
 
 class AzureOpenAIProvider:
     def __init__(self, config):
-        self.client = AzureOpenAI(
-            api_key=config["config_list"][0]["api_key"],
-            azure_endpoint=config["config_list"][0]["base_url"],
-            api_version=config["config_list"][0]["api_version"]
-        )
-        self.model = config["config_list"][0]["model"]
+        self.config = config["config_list"][0]
+        self.timeout = config.get("timeout")
+        self.model = self.config["model"]
+
+    @property
+    def client(self):
+        # The registry owns the client, so one closed in shutdown is replaced
+        return client_registry.get_client(self.config, timeout=self.timeout)
 
     def generate_reply(self, messages):
         response = self.client.chat.completions.create(
@@ -15,4 +17,15 @@ class AzureOpenAIProvider:
             messages=messages,
             temperature=0.7
         )
-        return response.choices[0].message.content
\ No newline at end of file
+        return response.choices[0].message.content
+
+    def stream_reply(self, messages):
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.7,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
@@ -0,0 +1,107 @@
+import os
+import hashlib
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from openai import OpenAI, AzureOpenAI, AsyncOpenAI, AsyncAzureOpenAI
+
+
+class SharedHTTPClient(httpx.Client):
+    """Keep-alive HTTP client that survives AutoGen's deepcopy of llm_config"""
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class SharedAsyncHTTPClient(httpx.AsyncClient):
+    """Async counterpart of SharedHTTPClient"""
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class ClientRegistry:
+    """Long-lived LLM clients keyed by provider config.
+
+    All clients share one sync and one async connection pool, so repeated
+    calls reuse open HTTP keep-alive connections instead of paying for a new
+    TCP/TLS handshake each time.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 60.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._clients: Dict[Tuple, Any] = {}
+        self._http_client: Optional[SharedHTTPClient] = None
+        self._async_http_client: Optional[SharedAsyncHTTPClient] = None
+        self._lock = threading.Lock()
+
+    def http_client(self) -> SharedHTTPClient:
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = SharedHTTPClient(limits=self.limits, timeout=None)
+            return self._http_client
+
+    def async_http_client(self) -> SharedAsyncHTTPClient:
+        with self._lock:
+            if self._async_http_client is None:
+                self._async_http_client = SharedAsyncHTTPClient(limits=self.limits, timeout=None)
+            return self._async_http_client
+
+    def get_client(self, config: Dict[str, Any], is_async: bool = False, timeout: Optional[float] = None):
+        """Return the shared OpenAI/AzureOpenAI client for one ``config_list`` entry"""
+        key = (
+            config.get("api_type", "openai"),
+            config.get("base_url"),
+            config.get("api_version"),
+            hashlib.sha256((config.get("api_key") or "").encode()).hexdigest(),
+            timeout,
+            is_async
+        )
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        http_client = self.async_http_client() if is_async else self.http_client()
+        # Retries and backoff are handled by utils.resilience, not inside the client
+        kwargs = {"api_key": config["api_key"], "http_client": http_client, "max_retries": 0}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        if config.get("api_type") == "azure":
+            client_cls = AsyncAzureOpenAI if is_async else AzureOpenAI
+            client = client_cls(azure_endpoint=config["base_url"], api_version=config["api_version"], **kwargs)
+        else:
+            client_cls = AsyncOpenAI if is_async else OpenAI
+            client = client_cls(base_url=config.get("base_url") or None, **kwargs)
+
+        with self._lock:
+            return self._clients.setdefault(key, client)
+
+    def with_http_client(self, llm_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy an AutoGen llm_config so its agents use the shared connection pool"""
+        return {**llm_config, "http_client": self.http_client(), "max_retries": 0}
+
+    def close(self):
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+            self._clients.clear()
+
+    async def aclose(self):
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+            self._async_http_client = None
+        self.close()
+
+
+client_registry = ClientRegistry(
+    max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+)
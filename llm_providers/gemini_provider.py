@@ -1,4 +1,4 @@
-import requests
+from .client_registry import client_registry
 
 class GeminiProvider:
     def __init__(self, config):
@@ -9,5 +9,5 @@ class GeminiProvider:
     def generate_reply(self, messages):
         input_text = messages[-1]["content"]
         headers = {"Authorization": f"Bearer {self.api_key}"}
-        response = requests.post(f"{self.base_url}{self.model}", headers=headers, json={"prompt": input_text})
+        response = client_registry.http_client().post(f"{self.base_url}{self.model}", headers=headers, json={"prompt": input_text})
         return response.json()["generated_text"]
\ No newline at end of file
@@ -0,0 +1,29 @@
+import asyncio
+
+
+class StubProvider:
+    """Offline stand-in for AsyncOpenAIProvider that replays a canned reply.
+
+    ``reply`` is a string or a callable taking the messages. Streaming splits
+    it into chunks of ``chunk_size`` characters, ``delay`` seconds apart.
+    """
+
+    def __init__(self, reply="This is a stub reply.", chunk_size: int = 8, delay: float = 0.0):
+        self.reply = reply
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.calls = 0
+
+    def _reply(self, messages) -> str:
+        self.calls += 1
+        return self.reply(messages) if callable(self.reply) else self.reply
+
+    async def generate_reply(self, messages, **kwargs):
+        return self._reply(messages)
+
+    async def stream_reply(self, messages, **kwargs):
+        text = self._reply(messages)
+        for i in range(0, len(text), self.chunk_size):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield text[i:i + self.chunk_size]
@@ -1,4 +1,7 @@
 
-from .conversation_memory import EnhancedConversationMemory
+from .conversation_memory import LangChainConversationMemory
 from .progress_memory import ProgressMemory
-__all__ = ['EnhancedConversationMemory', 'ProgressMemory']
\ No newline at end of file
+from .journal import JournalStore
+from .progress_store import SQLiteProgressStore
+from .progress_report import ProgressReportCache, build_progress_report
+__all__ = ['LangChainConversationMemory', 'ProgressMemory', 'JournalStore', 'SQLiteProgressStore', 'ProgressReportCache', 'build_progress_report']
\ No newline at end of file
@@ -0,0 +1,115 @@
+import re
+import threading
+from typing import List, Optional
+
+from langchain.schema import BaseMessage, HumanMessage
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return max(1, len(text) // 4)
+
+
+def _line_cost(text: str) -> int:
+    """Tokens a line takes in the rendered context, counting its separator and rounding up"""
+    return (len(text) + 4) // 4
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 3)].rstrip() + "..."
+
+
+SUMMARY_HEADER = "Earlier in this session (summary):"
+
+# A recent turn cut shorter than this says nothing useful
+MIN_TURN_TOKENS = 8
+
+
+class ContextWindowBuilder:
+    """Prompt context bounded by a token budget.
+
+    The last ``recent_turns`` messages are included verbatim, newest first,
+    truncated when they overflow their share of the budget. Older messages are folded, once each,
+    into a rolling summary of one short line per message; the newest summary
+    lines fill whatever budget is left, and only the newest
+    ``max_summary_lines`` are kept. The rendered context is cached until the
+    conversation grows.
+    """
+
+    def __init__(self, token_budget: int = 1500, recent_turns: int = 6, summary_line_chars: int = 160,
+                 max_summary_lines: int = 200):
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.summary_line_chars = summary_line_chars
+        self.max_summary_lines = max_summary_lines
+        self._summary_lines: List[str] = []
+        self._summarized = 0
+        self._cache_key = None
+        self._cached = ""
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _speaker(message: BaseMessage) -> str:
+        return "Student" if isinstance(message, HumanMessage) else "Tutor"
+
+    def _summarize(self, message: BaseMessage) -> str:
+        text = " ".join(message.content.split())
+        # First sentence is usually the gist: the question asked or the topic explained
+        first = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+        if len(first) > self.summary_line_chars:
+            first = first[:self.summary_line_chars - 3].rstrip() + "..."
+        return f"- {self._speaker(message)}: {first}"
+
+    def build(self, messages: List[BaseMessage], token_budget: Optional[int] = None) -> str:
+        budget = token_budget or self.token_budget
+        with self._lock:
+            cache_key = (len(messages), budget)
+            if cache_key == self._cache_key:
+                return self._cached
+
+            boundary = max(0, len(messages) - self.recent_turns)
+            if boundary < self._summarized:
+                # History shrank (e.g. memory cleared); start the summary over
+                self._summary_lines, self._summarized = [], 0
+            for message in messages[self._summarized:boundary]:
+                self._summary_lines.append(self._summarize(message))
+            self._summarized = boundary
+            # Older lines would never fit the budget again; don't keep them forever
+            del self._summary_lines[:-self.max_summary_lines]
+
+            # Recent turns may use up to 3/4 of the budget, and no single
+            # turn more than half of that, so one long explanation cannot
+            # crowd out everything else.
+            recent_budget = budget * 3 // 4
+            per_message = max(1, recent_budget // 2)
+            remaining = recent_budget
+            recent: List[str] = []
+            for message in reversed(messages[boundary:]):
+                allowance = min(per_message, remaining)
+                if allowance < min(MIN_TURN_TOKENS, per_message):
+                    break
+                # One token less leaves room for the separator
+                line = _truncate(f"{self._speaker(message)}: {message.content}", allowance - 1)
+                recent.append(line)
+                remaining -= _line_cost(line)
+            remaining += budget - recent_budget
+
+            summary: List[str] = []
+            for line in reversed(self._summary_lines):
+                cost = _line_cost(line) + (0 if summary else _line_cost(SUMMARY_HEADER))
+                if cost > remaining:
+                    break
+                summary.append(line)
+                remaining -= cost
+
+            parts = []
+            if summary:
+                parts.append(SUMMARY_HEADER + "\n" + "\n".join(reversed(summary)))
+            if recent:
+                parts.append("\n".join(reversed(recent)))
+            self._cached = "\n\n".join(parts)
+            self._cache_key = cache_key
+            return self._cached
@@ -6,12 +6,18 @@ from langchain.memory import ConversationBufferMemory
 from langchain.schema import HumanMessage, AIMessage
 import logging
 
+from .journal import JournalStore
+from .context_builder import ContextWindowBuilder
+
 logger = logging.getLogger(__name__)
 
 class LangChainConversationMemory:
-    def __init__(self, session_id: str, storage_path: str = "data/conversation_history"):
+    def __init__(self, session_id: str, storage_path: str = "data/conversation_history",
+                 storage_mode: str = "journal", compact_every: int = 200,
+                 context_token_budget: int = 1500):
         self.session_id = session_id
         self.storage_path = storage_path
+        self.storage_mode = storage_mode
         self.memory = ConversationBufferMemory(return_messages=True)
         self.metadata = {
             "session_id": session_id,
@@ -19,11 +25,32 @@ class LangChainConversationMemory:
             "subjects": [],
             "topics": []
         }
+        # Prompts get the recent turns plus a rolling summary, not the whole buffer
+        self.context_builder = ContextWindowBuilder(token_budget=context_token_budget)
         os.makedirs(self.storage_path, exist_ok=True)
+        # "journal" appends one JSONL record per message; "json" rewrites the whole file
+        self.journal = JournalStore(os.path.join(self.storage_path, session_id), compact_every) \
+            if storage_mode == "journal" else None
         self._load()
 
     def add_message(self, role: str, content: str, metadata: Optional[Dict[str, str]] = None):
-        if role == "student":
+        if self.journal is not None:
+            record = {
+                "role": "human" if role == "student" else "assistant",
+                "content": content,
+                "metadata": metadata or {}
+            }
+            self.journal.append(
+                record,
+                apply=lambda: self._apply_message(record["role"], content, metadata),
+                snapshot_fn=self._snapshot
+            )
+        else:
+            self._apply_message("human" if role == "student" else "assistant", content, metadata)
+            self._save()
+
+    def _apply_message(self, role: str, content: str, metadata: Optional[Dict[str, str]] = None):
+        if role == "human":
             self.memory.chat_memory.add_message(HumanMessage(content=content))
         else:
             self.memory.chat_memory.add_message(AIMessage(content=content))
@@ -32,7 +59,6 @@ class LangChainConversationMemory:
                 self.metadata["subjects"].append(metadata["subject"])
             if "topic" in metadata and metadata["topic"] not in self.metadata["topics"]:
                 self.metadata["topics"].append(metadata["topic"])
-        self._save()
 
     def get_messages(self) -> List[Dict[str, Any]]:
         return [
@@ -40,35 +66,39 @@ class LangChainConversationMemory:
             for msg in self.memory.chat_memory.messages
         ]
 
-    def get_context(self) -> str:
-        return self.memory.buffer
+    def get_context(self, max_tokens: Optional[int] = None) -> str:
+        return self.context_builder.build(self.memory.chat_memory.messages, max_tokens)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            "metadata": {**self.metadata, "subjects": list(self.metadata["subjects"]),
+                         "topics": list(self.metadata["topics"])},
+            "messages": self.get_messages()
+        }
 
     def _save(self):
         filepath = os.path.join(self.storage_path, f"{self.session_id}.json")
         try:
-            data = {
-                "metadata": self.metadata,
-                "messages": [
-                    {"role": "human" if isinstance(msg, HumanMessage) else "assistant", "content": msg.content}
-                    for msg in self.memory.chat_memory.messages
-                ]
-            }
             with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+                json.dump(self._snapshot(), f, indent=2)
         except Exception as e:
             logger.error(f"Failed to save conversation: {e}")
 
     def _load(self):
         filepath = os.path.join(self.storage_path, f"{self.session_id}.json")
-        if os.path.exists(filepath):
-            try:
+        try:
+            if self.journal is not None:
+                data = self.journal.load_snapshot()
+            elif os.path.exists(filepath):
                 with open(filepath, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                self.metadata = data.get("metadata", self.metadata)
-                for msg in data.get("messages", []):
-                    if msg["role"] == "human":
-                        self.memory.chat_memory.add_message(HumanMessage(content=msg["content"]))
-                    else:
-                        self.memory.chat_memory.add_message(AIMessage(content=msg["content"]))
-            except Exception as e:
-                logger.error(f"Failed to load conversation: {e}")
\ No newline at end of file
+            else:
+                return
+            self.metadata = data.get("metadata", self.metadata)
+            for msg in data.get("messages", []):
+                self._apply_message(msg["role"], msg["content"])
+            if self.journal is not None:
+                for record in self.journal.replay(data.get("journal_seq", 0)):
+                    self._apply_message(record["role"], record["content"], record.get("metadata"))
+        except Exception as e:
+            logger.error(f"Failed to load conversation: {e}")
\ No newline at end of file
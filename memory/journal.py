@@ -0,0 +1,124 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, Any, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JournalStore:
+    """Append-only JSONL journal with a compacted JSON snapshot.
+
+    Every record is appended to ``<base>.jsonl`` with a monotonically
+    increasing ``seq``. Once the journal grows past ``compact_every`` records
+    a background thread folds the current state into ``<base>.json`` and the
+    journal starts over. The snapshot stores the last ``seq`` it covers, so
+    replaying after a crash mid-compaction never applies a record twice.
+
+    Call ``load_snapshot`` and drain ``replay`` before the first ``append`` so
+    new records continue the existing sequence.
+    """
+
+    def __init__(self, base_path: str, compact_every: int = 200):
+        self.snapshot_path = f"{base_path}.json"
+        self.journal_path = f"{base_path}.jsonl"
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._seq = 0
+        self._pending = 0
+        self._compacting = False
+
+    def load_snapshot(self) -> Dict[str, Any]:
+        """Load the compacted snapshot, or an empty dict if there is none"""
+        if not os.path.exists(self.snapshot_path):
+            return {}
+        with open(self.snapshot_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._seq = max(self._seq, data.get("journal_seq", 0))
+        return data
+
+    def replay(self, after_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield journal records newer than ``after_seq`` in append order"""
+        for path in (f"{self.journal_path}.compacting", self.journal_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-append
+                        logger.warning(f"Skipping corrupt journal line in {path}")
+                        continue
+                    seq = record.get("seq", 0)
+                    self._seq = max(self._seq, seq)
+                    if path == self.journal_path:
+                        self._pending += 1
+                    if seq > after_seq:
+                        yield record
+
+    def append(
+        self,
+        record: Dict[str, Any],
+        apply: Optional[Callable[[], None]] = None,
+        snapshot_fn: Optional[Callable[[], Dict[str, Any]]] = None
+    ):
+        """Append one record; schedule compaction via ``snapshot_fn`` when due
+
+        ``apply`` runs under the journal lock so the in-memory change and its
+        record are atomic with respect to a concurrent compaction.
+        """
+        with self._lock:
+            if apply is not None:
+                apply()
+            self._seq += 1
+            record = {"seq": self._seq, **record}
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            self._pending += 1
+            due = snapshot_fn is not None and self._pending >= self.compact_every and not self._compacting
+            if due:
+                self._compacting = True
+        if due:
+            threading.Thread(target=self.compact, args=(snapshot_fn,), daemon=True).start()
+
+    def compact(self, snapshot_fn: Callable[[], Dict[str, Any]]):
+        """Fold the journal into the snapshot file"""
+        compacting_path = f"{self.journal_path}.compacting"
+        try:
+            with self._compact_lock:
+                self._compact(snapshot_fn, compacting_path)
+        except Exception as e:
+            logger.error(f"Failed to compact journal {self.journal_path}: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def _compact(self, snapshot_fn: Callable[[], Dict[str, Any]], compacting_path: str):
+        with self._lock:
+            # Capture state and rotate the journal together so that every
+            # record is either in the snapshot or in the fresh journal.
+            data = snapshot_fn()
+            data["journal_seq"] = self._seq
+            if os.path.exists(compacting_path) and os.path.exists(self.journal_path):
+                # A previous compaction failed part-way; keep its records
+                with open(self.journal_path, "r", encoding="utf-8") as src, \
+                        open(compacting_path, "a", encoding="utf-8") as dst:
+                    dst.write(src.read())
+                os.remove(self.journal_path)
+            elif os.path.exists(self.journal_path):
+                os.replace(self.journal_path, compacting_path)
+            self._pending = 0
+
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.snapshot_path)
+        if os.path.exists(compacting_path):
+            os.remove(compacting_path)
+        logger.debug(f"Compacted journal {self.journal_path} at seq {data['journal_seq']}")
@@ -1,10 +1,14 @@
 import os
 import json
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from collections import defaultdict
 import logging
+import threading
+
+from .write_behind import WriteBehindFlusher, progress_flusher
+from .progress_store import SQLiteProgressStore
 
 logger = logging.getLogger(__name__)
 
@@ -25,13 +29,32 @@ class LearningSession:
     questions_answered_correctly: int
 
 class ProgressMemory:
-    def __init__(self, student_id: str, storage_path: str = "data/progress_data"):
+    def __init__(self, student_id: str, storage_path: str = "data/progress_data",
+                 flusher: Optional[WriteBehindFlusher] = progress_flusher,
+                 store: Optional[SQLiteProgressStore] = None,
+                 on_change: Optional[Callable[[str], None]] = None):
         self.student_id = student_id
         self.storage_path = storage_path
         self.progress_data: Dict[str, Dict[str, LearningProgress]] = defaultdict(dict)
         self.learning_sessions: List[LearningSession] = []
+        # Mutations are persisted by the write-behind flusher; None saves synchronously
+        self.flusher = flusher
+        # With a store, each mutation is a single-row write and no JSON file is kept
+        self.store = store
+        # Called with the student id after every change, e.g. to drop cached views
+        self.on_change = on_change
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._version = 0
+        self._saved_version = 0
+        # Running analytics totals, updated per attempt instead of recomputed
+        self._total_attempts = 0
+        self._weighted_score = 0.0
+        self._analytics: Optional[Dict[str, Any]] = None
+        self._analytics_version = -1
         os.makedirs(self.storage_path, exist_ok=True)
         self._load()
+        self._rebuild_aggregates()
 
     def start_session(self, session_id: str) -> LearningSession:
         session = LearningSession(
@@ -41,62 +64,157 @@ class ProgressMemory:
             questions_asked=0,
             questions_answered_correctly=0
         )
-        self.learning_sessions.append(session)
-        self._save()
+        with self._lock:
+            # A stored session reloaded after a restart resumes its record
+            for existing in self.learning_sessions:
+                if existing.session_id == session_id:
+                    return existing
+            if self.store is not None:
+                session = LearningSession(**self.store.start_session(self.student_id, asdict(session)))
+            self.learning_sessions.append(session)
+            self._mark_dirty()
         return session
 
     def update_progress(self, subject: str, topic: str, performance_score: float, was_successful: bool):
-        if subject not in self.progress_data:
-            self.progress_data[subject] = {}
-        if topic not in self.progress_data[subject]:
-            self.progress_data[subject][topic] = LearningProgress(subject, topic, 0.0, 0, 0)
-        progress = self.progress_data[subject][topic]
-        progress.attempts += 1
-        if was_successful:
-            progress.successful_attempts += 1
-        progress.skill_level = (progress.skill_level * 0.7) + (performance_score * 0.3)
-        logger.info(f"Updated progress: {subject}/{topic}, skill={progress.skill_level:.2f}")
-        self._save()
+        with self._lock:
+            previous = self.progress_data.get(subject, {}).get(topic)
+            old_attempts, old_skill = (previous.attempts, previous.skill_level) if previous else (0, 0.0)
+            if self.store is not None:
+                row = self.store.record_attempt(self.student_id, subject, topic, performance_score, was_successful)
+                self.progress_data[subject][topic] = LearningProgress(**row)
+                self._count_attempt(old_attempts, old_skill, self.progress_data[subject][topic])
+                logger.info(f"Updated progress: {subject}/{topic}, skill={row['skill_level']:.2f}")
+                self._mark_dirty()
+                return
+            if subject not in self.progress_data:
+                self.progress_data[subject] = {}
+            if topic not in self.progress_data[subject]:
+                self.progress_data[subject][topic] = LearningProgress(subject, topic, 0.0, 0, 0)
+            progress = self.progress_data[subject][topic]
+            progress.attempts += 1
+            if was_successful:
+                progress.successful_attempts += 1
+            progress.skill_level = (progress.skill_level * 0.7) + (performance_score * 0.3)
+            self._count_attempt(old_attempts, old_skill, progress)
+            logger.info(f"Updated progress: {subject}/{topic}, skill={progress.skill_level:.2f}")
+            self._mark_dirty()
 
     def update_session(self, session_id: str, subject: str, topic: str, question_asked: bool = False, correct_answer: bool = False):
-        for session in self.learning_sessions:
-            if session.session_id == session_id:
-                if subject not in session.subjects_covered:
-                    session.subjects_covered.append(subject)
-                if question_asked:
-                    session.questions_asked += 1
-                if correct_answer:
-                    session.questions_answered_correctly += 1
-                logger.info(f"Updated session {session_id}: subject={subject}, questions_asked={session.questions_asked}")
-                self._save()
-                break
+        with self._lock:
+            for i, session in enumerate(self.learning_sessions):
+                if session.session_id == session_id:
+                    if self.store is not None:
+                        row = self.store.update_session(session_id, subject, question_asked, correct_answer)
+                        if row is not None:
+                            self.learning_sessions[i] = session = LearningSession(**row)
+                        logger.info(f"Updated session {session_id}: subject={subject}, questions_asked={session.questions_asked}")
+                        self._mark_dirty()
+                        break
+                    if subject not in session.subjects_covered:
+                        session.subjects_covered.append(subject)
+                    if question_asked:
+                        session.questions_asked += 1
+                    if correct_answer:
+                        session.questions_answered_correctly += 1
+                    logger.info(f"Updated session {session_id}: subject={subject}, questions_asked={session.questions_asked}")
+                    self._mark_dirty()
+                    break
 
     def get_progress_report(self) -> Dict[str, Any]:
-        return {
-            "student_id": self.student_id,
-            "subjects": {s: {t: asdict(p) for t, p in topics.items()} for s, topics in self.progress_data.items()},
-            "sessions": [asdict(s) for s in self.learning_sessions],
-            "timestamp": datetime.now().isoformat()
-        }
+        with self._lock:
+            return {
+                "student_id": self.student_id,
+                "subjects": {s: {t: asdict(p) for t, p in topics.items()} for s, topics in self.progress_data.items()},
+                "sessions": [asdict(s) for s in self.learning_sessions],
+                "timestamp": datetime.now().isoformat()
+            }
+
+    @property
+    def version(self) -> int:
+        """Incremented on every change; lets callers cache derived views"""
+        return self._version
+
+    def get_analytics(self) -> Dict[str, Any]:
+        """Analytics from the running totals; rebuilt at most once per change"""
+        with self._lock:
+            if self._analytics_version != self._version:
+                total_sessions = len(self.learning_sessions)
+                skill_progression = {
+                    subject: {topic: p.skill_level for topic, p in topics.items()}
+                    for subject, topics in self.progress_data.items() if topics
+                }
+                self._analytics = {
+                    "total_sessions": total_sessions,
+                    "total_problems_solved": self._total_attempts,
+                    "average_score": self._weighted_score / max(self._total_attempts, 1),
+                    "subjects_studied": list(skill_progression),
+                    "skill_progression": skill_progression,
+                    "time_spent_learning": total_sessions * 30  # Estimate 30 minutes per session
+                }
+                self._analytics_version = self._version
+            return dict(self._analytics)
+
+    def flush(self):
+        """Persist pending changes now instead of waiting for the flusher"""
+        if self.store is not None:
+            return  # Already written by each mutation
+        if self.flusher is not None:
+            self.flusher.discard(self)
+        self._save()
+
+    def _count_attempt(self, old_attempts: int, old_skill: float, current: LearningProgress):
+        """Swap a topic's old contribution to the running totals for its new one"""
+        self._total_attempts += current.attempts - old_attempts
+        self._weighted_score += current.skill_level * current.attempts - old_skill * old_attempts
+
+    def _rebuild_aggregates(self):
+        progress = [p for topics in self.progress_data.values() for p in topics.values()]
+        self._total_attempts = sum(p.attempts for p in progress)
+        self._weighted_score = sum(p.skill_level * p.attempts for p in progress)
+
+    def _mark_dirty(self):
+        self._version += 1
+        if self.on_change is not None:
+            self.on_change(self.student_id)
+        if self.store is not None:
+            return
+        if self.flusher is not None:
+            self.flusher.mark_dirty(self)
+        else:
+            self._save()
 
     def _save(self):
         filepath = os.path.join(self.storage_path, f"{self.student_id}_progress.json")
         try:
-            data = {
-                "student_id": self.student_id,
-                "progress_data": {
-                    s: {t: asdict(p) for t, p in topics.items()}
-                    for s, topics in self.progress_data.items()
-                },
-                "learning_sessions": [asdict(s) for s in self.learning_sessions]
-            }
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+            with self._lock:
+                version = self._version
+                data = {
+                    "student_id": self.student_id,
+                    "progress_data": {
+                        s: {t: asdict(p) for t, p in topics.items()}
+                        for s, topics in self.progress_data.items()
+                    },
+                    "learning_sessions": [asdict(s) for s in self.learning_sessions]
+                }
+            with self._write_lock:
+                # A newer snapshot may already have been written by another thread
+                if version <= self._saved_version:
+                    return
+                tmp_path = f"{filepath}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_path, filepath)
+                self._saved_version = version
         except Exception as e:
             logger.error(f"Failed to save progress: {e}")
 
     def _load(self):
         filepath = os.path.join(self.storage_path, f"{self.student_id}_progress.json")
+        if self.store is not None and self.store.has_student(self.student_id):
+            for row in self.store.load_progress(self.student_id):
+                self.progress_data[row["subject"]][row["topic"]] = LearningProgress(**row)
+            self.learning_sessions = [LearningSession(**row) for row in self.store.load_sessions(self.student_id)]
+            return
         if os.path.exists(filepath):
             try:
                 with open(filepath, "r", encoding="utf-8") as f:
@@ -110,5 +228,12 @@ class ProgressMemory:
                     LearningSession(**session)
                     for session in data.get("learning_sessions", [])
                 ]
+                if self.store is not None:
+                    # First load with the store enabled: migrate the JSON file
+                    self.store.import_student(
+                        self.student_id,
+                        [asdict(p) for topics in self.progress_data.values() for p in topics.values()],
+                        [asdict(s) for s in self.learning_sessions]
+                    )
             except Exception as e:
                 logger.error(f"Failed to load progress: {e}")
\ No newline at end of file
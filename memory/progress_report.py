@@ -0,0 +1,124 @@
+import json
+import threading
+import weakref
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.structured_output import StructuredOutputError, parse_json
+
+STRENGTH_THRESHOLD = 0.7
+WEAKNESS_THRESHOLD = 0.5
+# Fewer attempts than this and the skill estimate is mostly the smoothing prior
+MIN_RELIABLE_ATTEMPTS = 3
+
+
+def _ranked_topics(report: Dict[str, Any]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """(subject, topic, progress) for every topic, strongest first"""
+    topics = [
+        (subject, topic, progress)
+        for subject, subject_topics in report.get("subjects", {}).items()
+        for topic, progress in subject_topics.items()
+    ]
+    return sorted(topics, key=lambda t: t[2].get("skill_level", 0.0), reverse=True)
+
+
+def build_progress_report(report: Dict[str, Any], max_recommendations: int = 5) -> Dict[str, Any]:
+    """Strengths, weaknesses and recommendations from a ProgressMemory report.
+
+    Everything except the prose summary is derived from the skill levels, so
+    no model call is needed for it.
+    """
+    ranked = _ranked_topics(report)
+    strengths = [f"{subject}: {topic}" for subject, topic, p in ranked
+                 if p.get("skill_level", 0.0) > STRENGTH_THRESHOLD]
+    weak = [(subject, topic, p) for subject, topic, p in reversed(ranked)
+            if p.get("skill_level", 0.0) < WEAKNESS_THRESHOLD]
+
+    recommendations = []
+    for subject, topic, p in weak:
+        attempts = p.get("attempts", 0)
+        if attempts < MIN_RELIABLE_ATTEMPTS:
+            recommendations.append(f"Practice a few more {topic} problems in {subject}")
+        else:
+            recommendations.append(f"Review the basics of {topic} in {subject} before trying harder problems")
+    for subject, topic, p in ranked:
+        if p.get("skill_level", 0.0) > STRENGTH_THRESHOLD:
+            recommendations.append(f"Challenge yourself with harder {topic} problems")
+            break
+    if len(report.get("subjects", {})) == 1:
+        recommendations.append("Explore a new subject to broaden your learning")
+    if not recommendations:
+        recommendations.append("Keep practicing to turn developing topics into strengths")
+
+    return {
+        "strengths": strengths,
+        "areas_for_improvement": [f"{subject}: {topic}" for subject, topic, _ in weak],
+        "recommendations": recommendations[:max_recommendations],
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def report_digest(report: Dict[str, Any], top_k: int = 3) -> Dict[str, Any]:
+    """Compact view of a progress report for the summary prompt"""
+    ranked = _ranked_topics(report)
+    attempts = sum(p.get("attempts", 0) for _, _, p in ranked)
+    successes = sum(p.get("successful_attempts", 0) for _, _, p in ranked)
+
+    def topic_entry(subject, topic, p):
+        return {"subject": subject, "topic": topic, "skill": round(p.get("skill_level", 0.0), 2)}
+
+    return {
+        "sessions": len(report.get("sessions", [])),
+        "subjects": sorted(report.get("subjects", {})),
+        "problems_attempted": attempts,
+        "problems_correct": successes,
+        "strongest": [topic_entry(*t) for t in ranked[:top_k]],
+        "weakest": [topic_entry(*t) for t in reversed(ranked[top_k:][-top_k:])]
+    }
+
+
+def summary_prompt(digest: Dict[str, Any]) -> str:
+    return f"""Write a brief, encouraging 2-3 sentence summary of this student's progress:
+{json.dumps(digest)}
+
+Return only the summary text."""
+
+
+def parse_summary(response: str) -> str:
+    text = response.strip()
+    if text.startswith("{"):
+        # Models primed for JSON reports sometimes wrap the summary anyway
+        try:
+            return str(parse_json(text, dict).get("summary", "")).strip()
+        except StructuredOutputError:
+            pass
+    return text
+
+
+def fallback_summary(digest: Dict[str, Any]) -> str:
+    """Plain summary used when the model is unavailable"""
+    return (f"You have attempted {digest['problems_attempted']} problems across "
+            f"{len(digest['subjects'])} subjects and answered {digest['problems_correct']} correctly.")
+
+
+class ProgressReportCache:
+    """Finished reports per ProgressMemory, valid while its version is unchanged"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._reports: "weakref.WeakKeyDictionary[Any, Tuple[int, Dict[str, Any]]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, progress_memory, version: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._reports.get(progress_memory)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, progress_memory, version: int, report: Dict[str, Any]):
+        with self._lock:
+            self._reports[progress_memory] = (version, dict(report))
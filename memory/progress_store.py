@@ -0,0 +1,235 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+PROGRESS_FIELDS = ("subject", "topic", "skill_level", "attempts", "successful_attempts")
+SESSION_FIELDS = ("session_id", "start_time", "subjects_covered", "questions_asked", "questions_answered_correctly")
+
+
+class SQLiteProgressStore:
+    """Student progress in SQLite: one row per (student, subject, topic) and per learning session.
+
+    Updates are single-statement UPSERTs computed in SQL, so concurrent
+    writers (threads or worker processes) never lose increments. Triggers
+    keep per-student running totals in ``student_totals`` inside the same
+    transaction as the row they change, so analytics never aggregate.
+    """
+
+    def __init__(self, path: str = "data/progress_data/progress.db"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS topic_progress (
+                    student_id TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    topic TEXT NOT NULL,
+                    skill_level REAL NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    successful_attempts INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (student_id, subject, topic)
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS learning_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    student_id TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    subjects_covered TEXT NOT NULL DEFAULT '[]',
+                    questions_asked INTEGER NOT NULL DEFAULT 0,
+                    questions_answered_correctly INTEGER NOT NULL DEFAULT 0
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_topic_progress_student ON topic_progress (student_id)")
+            # Cross-student questions ("how is everyone doing in Physics?")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_topic_progress_subject ON topic_progress (subject, topic)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_learning_sessions_student ON learning_sessions (student_id)")
+        self._create_totals()
+
+    def _create_totals(self):
+        with self._lock, self._conn:
+            # Serialize with other workers so only one backfills the totals
+            self._conn.execute("BEGIN IMMEDIATE")
+            exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'student_totals'"
+            ).fetchone()
+            if exists:
+                return
+            self._conn.execute(
+                """CREATE TABLE student_totals (
+                    student_id TEXT PRIMARY KEY,
+                    total_sessions INTEGER NOT NULL DEFAULT 0,
+                    total_attempts INTEGER NOT NULL DEFAULT 0,
+                    weighted_score REAL NOT NULL DEFAULT 0
+                )"""
+            )
+            # Each topic contributes skill_level * attempts to the weighted score
+            for statement in (
+                """CREATE TRIGGER topic_progress_insert AFTER INSERT ON topic_progress BEGIN
+                    INSERT INTO student_totals (student_id, total_attempts, weighted_score)
+                    VALUES (NEW.student_id, NEW.attempts, NEW.skill_level * NEW.attempts)
+                    ON CONFLICT (student_id) DO UPDATE SET
+                        total_attempts = total_attempts + excluded.total_attempts,
+                        weighted_score = weighted_score + excluded.weighted_score;
+                END""",
+                """CREATE TRIGGER topic_progress_update AFTER UPDATE ON topic_progress BEGIN
+                    UPDATE student_totals SET
+                        total_attempts = total_attempts + NEW.attempts - OLD.attempts,
+                        weighted_score = weighted_score + NEW.skill_level * NEW.attempts - OLD.skill_level * OLD.attempts
+                    WHERE student_id = NEW.student_id;
+                END""",
+                """CREATE TRIGGER topic_progress_delete AFTER DELETE ON topic_progress BEGIN
+                    UPDATE student_totals SET
+                        total_attempts = total_attempts - OLD.attempts,
+                        weighted_score = weighted_score - OLD.skill_level * OLD.attempts
+                    WHERE student_id = OLD.student_id;
+                END""",
+                """CREATE TRIGGER learning_sessions_insert AFTER INSERT ON learning_sessions BEGIN
+                    INSERT INTO student_totals (student_id, total_sessions) VALUES (NEW.student_id, 1)
+                    ON CONFLICT (student_id) DO UPDATE SET total_sessions = total_sessions + 1;
+                END""",
+                """CREATE TRIGGER learning_sessions_delete AFTER DELETE ON learning_sessions BEGIN
+                    UPDATE student_totals SET total_sessions = total_sessions - 1 WHERE student_id = OLD.student_id;
+                END""",
+            ):
+                self._conn.execute(statement)
+            # Databases created before the totals existed are backfilled once
+            self._conn.execute(
+                """INSERT INTO student_totals (student_id, total_attempts, weighted_score)
+                SELECT student_id, SUM(attempts), SUM(skill_level * attempts) FROM topic_progress GROUP BY student_id"""
+            )
+            self._conn.execute(
+                """INSERT INTO student_totals (student_id, total_sessions)
+                SELECT student_id, COUNT(*) FROM learning_sessions WHERE true GROUP BY student_id
+                ON CONFLICT (student_id) DO UPDATE SET total_sessions = excluded.total_sessions"""
+            )
+
+    def has_student(self, student_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM topic_progress WHERE student_id = ? UNION ALL "
+                "SELECT 1 FROM learning_sessions WHERE student_id = ? LIMIT 1",
+                (student_id, student_id)
+            ).fetchone() is not None
+
+    def load_progress(self, student_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT subject, topic, skill_level, attempts, successful_attempts "
+                "FROM topic_progress WHERE student_id = ?", (student_id,)
+            ).fetchall()
+        return [dict(zip(PROGRESS_FIELDS, row)) for row in rows]
+
+    def load_sessions(self, student_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id, start_time, subjects_covered, questions_asked, questions_answered_correctly "
+                "FROM learning_sessions WHERE student_id = ? ORDER BY start_time", (student_id,)
+            ).fetchall()
+        return [self._session(row) for row in rows]
+
+    def record_attempt(self, student_id: str, subject: str, topic: str,
+                       performance_score: float, was_successful: bool) -> Dict[str, Any]:
+        """Count one attempt and return the topic's updated row"""
+        success = 1 if was_successful else 0
+        with self._lock, self._conn:
+            # Same smoothing as ProgressMemory.update_progress: 70% history, 30% this attempt
+            row = self._conn.execute(
+                """INSERT INTO topic_progress (student_id, subject, topic, skill_level, attempts, successful_attempts)
+                VALUES (?, ?, ?, ? * 0.3, 1, ?)
+                ON CONFLICT (student_id, subject, topic) DO UPDATE SET
+                    skill_level = skill_level * 0.7 + excluded.skill_level,
+                    attempts = attempts + 1,
+                    successful_attempts = successful_attempts + excluded.successful_attempts,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING subject, topic, skill_level, attempts, successful_attempts""",
+                (student_id, subject, topic, performance_score, success)
+            ).fetchone()
+        return dict(zip(PROGRESS_FIELDS, row))
+
+    def start_session(self, student_id: str, session: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a learning session unless it exists; return the stored row"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO learning_sessions (session_id, student_id, start_time, subjects_covered, "
+                "questions_asked, questions_answered_correctly) VALUES (?, ?, ?, ?, ?, ?)",
+                (session["session_id"], student_id, session["start_time"], json.dumps(session["subjects_covered"]),
+                 session["questions_asked"], session["questions_answered_correctly"])
+            )
+            row = self._conn.execute(
+                "SELECT session_id, start_time, subjects_covered, questions_asked, questions_answered_correctly "
+                "FROM learning_sessions WHERE session_id = ?", (session["session_id"],)
+            ).fetchone()
+        return self._session(row)
+
+    def update_session(self, session_id: str, subject: str, question_asked: bool = False,
+                       correct_answer: bool = False) -> Optional[Dict[str, Any]]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                """UPDATE learning_sessions SET
+                    subjects_covered = CASE
+                        WHEN EXISTS (SELECT 1 FROM json_each(subjects_covered) WHERE value = ?1) THEN subjects_covered
+                        ELSE json_insert(subjects_covered, '$[#]', ?1)
+                    END,
+                    questions_asked = questions_asked + ?2,
+                    questions_answered_correctly = questions_answered_correctly + ?3
+                WHERE session_id = ?4
+                RETURNING session_id, start_time, subjects_covered, questions_asked, questions_answered_correctly""",
+                (subject, int(question_asked), int(correct_answer), session_id)
+            ).fetchone()
+        return self._session(row) if row is not None else None
+
+    def import_student(self, student_id: str, progress: List[Dict[str, Any]], sessions: List[Dict[str, Any]]):
+        """Copy a student's existing JSON progress into the store"""
+        with self._lock, self._conn:
+            # An upsert rather than OR REPLACE, whose implicit delete skips the totals triggers
+            self._conn.executemany(
+                "INSERT INTO topic_progress (student_id, subject, topic, skill_level, attempts, "
+                "successful_attempts) VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (student_id, subject, topic) DO UPDATE SET "
+                "skill_level = excluded.skill_level, attempts = excluded.attempts, "
+                "successful_attempts = excluded.successful_attempts",
+                [(student_id,) + tuple(p[field] for field in PROGRESS_FIELDS) for p in progress]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO learning_sessions (session_id, student_id, start_time, subjects_covered, "
+                "questions_asked, questions_answered_correctly) VALUES (?, ?, ?, ?, ?, ?)",
+                [(s["session_id"], student_id, s["start_time"], json.dumps(s["subjects_covered"]),
+                  s["questions_asked"], s["questions_answered_correctly"]) for s in sessions]
+            )
+
+    def student_analytics(self, student_id: str) -> Dict[str, Any]:
+        """Analytics for one student from its running totals and indexed topic rows"""
+        with self._lock:
+            totals = self._conn.execute(
+                "SELECT total_sessions, total_attempts, weighted_score FROM student_totals WHERE student_id = ?",
+                (student_id,)
+            ).fetchone()
+            rows = self._conn.execute(
+                "SELECT subject, topic, skill_level FROM topic_progress WHERE student_id = ?", (student_id,)
+            ).fetchall()
+
+        total_sessions, total_problems, total_score = totals or (0, 0, 0.0)
+        skill_progression: Dict[str, Dict[str, float]] = {}
+        for subject, topic, skill_level in rows:
+            skill_progression.setdefault(subject, {})[topic] = skill_level
+
+        return {
+            "total_sessions": total_sessions,
+            "total_problems_solved": total_problems,
+            "average_score": total_score / max(total_problems, 1),
+            "subjects_studied": list(skill_progression),
+            "skill_progression": skill_progression,
+            "time_spent_learning": total_sessions * 30  # Estimate 30 minutes per session
+        }
+
+    @staticmethod
+    def _session(row) -> Dict[str, Any]:
+        session = dict(zip(SESSION_FIELDS, row))
+        session["subjects_covered"] = json.loads(session["subjects_covered"])
+        return session
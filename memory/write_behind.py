@@ -0,0 +1,78 @@
+import atexit
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindFlusher:
+    """Batches persistence for objects exposing a ``flush()`` method.
+
+    Callers mark an object dirty after mutating it in memory. A background
+    thread flushes dirty objects every ``interval`` seconds, or as soon as one
+    has accumulated ``max_pending`` unsaved mutations. ``flush_all`` is
+    registered with ``atexit`` so nothing is lost on a clean shutdown.
+    """
+
+    def __init__(self, interval: float = 5.0, max_pending: int = 20):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._dirty: Dict[int, Any] = {}
+        self._pending: Dict[int, int] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        atexit.register(self.flush_all)
+
+    def mark_dirty(self, target: Any):
+        """Record one unsaved mutation on ``target``"""
+        with self._cond:
+            key = id(target)
+            self._dirty[key] = target
+            self._pending[key] = self._pending.get(key, 0) + 1
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="write-behind")
+                self._thread.start()
+            if self._pending[key] >= self.max_pending:
+                self._cond.notify()
+
+    def discard(self, target: Any):
+        """Forget ``target``; used when it is flushed directly"""
+        with self._cond:
+            self._dirty.pop(id(target), None)
+            self._pending.pop(id(target), None)
+
+    def flush_all(self):
+        """Synchronously flush every dirty object"""
+        with self._cond:
+            targets = list(self._dirty.values())
+            self._dirty.clear()
+            self._pending.clear()
+        for target in targets:
+            try:
+                target.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed for {target!r}: {e}")
+
+    def stop(self):
+        """Stop the background thread after a final flush"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.flush_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopped:
+                    self._cond.wait(timeout=self.interval)
+                if self._stopped:
+                    return
+            self.flush_all()
+
+
+# Shared flusher used by ProgressMemory
+progress_flusher = WriteBehindFlusher()
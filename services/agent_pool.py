@@ -0,0 +1,82 @@
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class AgentPool:
+    """Pool of pre-built agent shells that are not yet bound to a session.
+
+    A shell is a dict of AutoGen agents with their system messages and LLM
+    config but no per-session memory or functions. ``acquire`` hands one out
+    (building it on the spot if the pool is empty) and a background thread
+    tops the pool back up; ``release`` resets the agents and returns them.
+    """
+
+    def __init__(self, factory: Callable[[], Dict[str, Any]], size: int = 4):
+        self.factory = factory
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._shells = deque()
+        self._lock = threading.Lock()
+        self._refill_needed = threading.Event()
+        self._refill_thread = None
+
+    def start(self):
+        """Start the background refill thread and pre-warm the pool"""
+        if self._refill_thread is None:
+            self._refill_thread = threading.Thread(target=self._refill_worker, daemon=True, name="agent-pool")
+            self._refill_thread.start()
+            self._refill_needed.set()
+
+    def acquire(self) -> Dict[str, Any]:
+        with self._lock:
+            shell = self._shells.popleft() if self._shells else None
+            if shell is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._refill_needed.set()
+        if shell is None:
+            shell = self.factory()
+        return shell
+
+    def release(self, shell: Dict[str, Any]):
+        for agent in shell.values():
+            agent.reset()
+        with self._lock:
+            if len(self._shells) < self.size:
+                self._shells.append(shell)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            acquired = self.hits + self.misses
+            return {
+                "size": self.size,
+                "available": len(self._shells),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / acquired if acquired else 0.0
+            }
+
+    def _refill_worker(self):
+        while True:
+            self._refill_needed.wait()
+            self._refill_needed.clear()
+            while True:
+                with self._lock:
+                    if len(self._shells) >= self.size:
+                        break
+                try:
+                    shell = self.factory()
+                except Exception as e:
+                    logger.error(f"Failed to pre-build agent shell: {e}")
+                    break
+                with self._lock:
+                    # Released shells may have topped the pool up meanwhile
+                    if len(self._shells) >= self.size:
+                        break
+                    self._shells.append(shell)
@@ -1,10 +1,8 @@
-import asyncio
 import json
 import logging
 import uuid
 from datetime import datetime
-from typing import Dict, Any, List, Optional
-from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Any, List, Optional
 import sys
 import os
 
@@ -14,19 +12,28 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from agent import (
     create_educational_agents, 
     extract_subject_and_topic,
-    ProgressMemory,
-    LangChainConversationMemory
+    progress_memories,
+    LangChainConversationMemory,
+    explanation_cache,
+    explanation_flights,
+    agent_pool,
+    progress_store,
+    problem_registry
 )
-from utils.exceptions import AgentException, SessionNotFoundException
+from services.session_manager import SessionManager
+from utils.exceptions import AgentException, SessionNotFoundException, ServiceUnavailableException
 
 logger = logging.getLogger(__name__)
 
 class EducationalAgentService:
     """Service layer for educational agent functionality"""
     
-    def __init__(self):
-        self.active_sessions: Dict[str, Dict[str, Any]] = {}
-        self.executor = ThreadPoolExecutor(max_workers=4)
+    def __init__(self, session_manager: Optional[SessionManager] = None):
+        # The session manager is the single session store; agents are torn
+        # down whenever it drops a session, whether deleted or expired
+        self.session_manager = session_manager or SessionManager()
+        self.session_manager.on_close = self._release_session_agents
+        self.session_manager.on_load = self._load_session_agents
         
     def create_session(self, student_id: str, session_id: str) -> Dict[str, Any]:
         """Create a new educational session"""
@@ -36,19 +43,10 @@ class EducationalAgentService:
             # Create agents using the existing function from agent.py
             agents = create_educational_agents(student_id, session_id)
             
-            session_data = {
-                "session_id": session_id,
-                "student_id": student_id,
-                "created_at": datetime.now().isoformat(),
-                "status": "active",
-                "agents": agents,
-                "last_activity": datetime.now().isoformat()
-            }
-            
-            self.active_sessions[session_id] = session_data
+            session = self.session_manager.create_session(session_id, student_id, {"agents": agents})
             logger.info(f"Session {session_id} created successfully")
             
-            return session_data
+            return session
             
         except Exception as e:
             logger.error(f"Error creating session {session_id}: {e}")
@@ -56,11 +54,10 @@ class EducationalAgentService:
     
     def get_session(self, session_id: str) -> Dict[str, Any]:
         """Get session data"""
-        if session_id not in self.active_sessions:
+        session = self.session_manager.get_session(session_id)
+        if session is None:
             raise SessionNotFoundException(f"Session {session_id} not found")
         
-        session = self.active_sessions[session_id]
-        session["last_activity"] = datetime.now().isoformat()
         return session
     
     def explain_concept(
@@ -74,7 +71,7 @@ class EducationalAgentService:
         """Explain a concept using the tutor agent"""
         try:
             session = self.get_session(session_id)
-            agents = session["agents"]
+            agents = session["data"]["agents"]
             
             # Use the explain_concept function from the agents
             explanation = agents["explain_concept"](subject, topic, difficulty_level, learning_style)
@@ -84,10 +81,52 @@ class EducationalAgentService:
             
         except SessionNotFoundException:
             raise
+        except ServiceUnavailableException:
+            raise
+        except Exception as e:
+            logger.error(f"Error explaining concept in session {session_id}: {e}")
+            raise AgentException(f"Failed to explain concept: {str(e)}")
+    
+    async def a_explain_concept(
+        self, 
+        session: Dict[str, Any], 
+        subject: str, 
+        topic: str, 
+        difficulty_level: str = "medium", 
+        learning_style: str = "visual"
+    ) -> str:
+        """Explain a concept without blocking the event loop"""
+        session_id = session["session_id"]
+        try:
+            agents = session["data"]["agents"]
+            
+            explanation = await agents["a_explain_concept"](subject, topic, difficulty_level, learning_style)
+            
+            logger.info(f"Concept explained for session {session_id}: {subject}/{topic}")
+            return explanation
+            
+        except ServiceUnavailableException:
+            raise
         except Exception as e:
             logger.error(f"Error explaining concept in session {session_id}: {e}")
             raise AgentException(f"Failed to explain concept: {str(e)}")
     
+    def stream_concept_explanation(
+        self, 
+        session: Dict[str, Any], 
+        subject: str, 
+        topic: str, 
+        difficulty_level: str = "medium", 
+        learning_style: str = "visual"
+    ) -> AsyncIterator[str]:
+        """Explanation chunks as the model produces them.
+        
+        Takes the session the caller already looked up, so a missing session
+        fails before the response has started streaming.
+        """
+        agents = session["data"]["agents"]
+        return agents["a_stream_explanation"](subject, topic, difficulty_level, learning_style)
+    
     def create_practice_problems(
         self, 
         session_id: str, 
@@ -99,7 +138,7 @@ class EducationalAgentService:
         """Create practice problems using the tutor agent"""
         try:
             session = self.get_session(session_id)
-            agents = session["agents"]
+            agents = session["data"]["agents"]
             
             # Use the create_practice_problems function from the agents
             problems = agents["create_practice_problems"](subject, topic, count, difficulty)
@@ -107,25 +146,56 @@ class EducationalAgentService:
             if "error" in problems:
                 raise AgentException(problems["error"])
             
-            logger.info(f"Practice problems created for session {session_id}: {count} problems")
+            logger.info(f"Practice problems created for session {session_id}: {len(problems['problems'])} problems")
             return problems
             
         except SessionNotFoundException:
             raise
+        except ServiceUnavailableException:
+            raise
         except AgentException:
             raise
         except Exception as e:
             logger.error(f"Error creating practice problems in session {session_id}: {e}")
             raise AgentException(f"Failed to create practice problems: {str(e)}")
     
-    def evaluate_solution(self, session_id: str, solution: str) -> Dict[str, Any]:
+    async def a_create_practice_problems(
+        self, 
+        session: Dict[str, Any], 
+        subject: str, 
+        topic: str, 
+        count: int = 1, 
+        difficulty: str = "medium"
+    ) -> Dict[str, Any]:
+        """Create practice problems without blocking the event loop"""
+        session_id = session["session_id"]
+        try:
+            agents = session["data"]["agents"]
+            
+            problems = await agents["a_create_practice_problems"](subject, topic, count, difficulty)
+            
+            if "error" in problems:
+                raise AgentException(problems["error"])
+            
+            logger.info(f"Practice problems created for session {session_id}: {len(problems['problems'])} problems")
+            return problems
+            
+        except ServiceUnavailableException:
+            raise
+        except AgentException:
+            raise
+        except Exception as e:
+            logger.error(f"Error creating practice problems in session {session_id}: {e}")
+            raise AgentException(f"Failed to create practice problems: {str(e)}")
+    
+    def evaluate_solution(self, session_id: str, solution: str, problem_id: Optional[str] = None) -> Dict[str, Any]:
         """Evaluate a student's solution"""
         try:
             session = self.get_session(session_id)
-            agents = session["agents"]
+            agents = session["data"]["agents"]
             
             # Use the evaluate_solution function from the agents
-            evaluation = agents["evaluate_solution"](session_id, solution)
+            evaluation = agents["evaluate_solution"](session_id, solution, problem_id)
             
             if "error" in evaluation:
                 raise AgentException(evaluation["error"])
@@ -135,6 +205,30 @@ class EducationalAgentService:
             
         except SessionNotFoundException:
             raise
+        except ServiceUnavailableException:
+            raise
+        except AgentException:
+            raise
+        except Exception as e:
+            logger.error(f"Error evaluating solution in session {session_id}: {e}")
+            raise AgentException(f"Failed to evaluate solution: {str(e)}")
+    
+    async def a_evaluate_solution(self, session: Dict[str, Any], solution: str, problem_id: Optional[str] = None) -> Dict[str, Any]:
+        """Evaluate a student's solution without blocking the event loop"""
+        session_id = session["session_id"]
+        try:
+            agents = session["data"]["agents"]
+            
+            evaluation = await agents["a_evaluate_solution"](session_id, solution, problem_id)
+            
+            if "error" in evaluation:
+                raise AgentException(evaluation["error"])
+            
+            logger.info(f"Solution evaluated for session {session_id}")
+            return evaluation
+            
+        except ServiceUnavailableException:
+            raise
         except AgentException:
             raise
         except Exception as e:
@@ -145,7 +239,7 @@ class EducationalAgentService:
         """Generate a progress report for the session"""
         try:
             session = self.get_session(session_id)
-            agents = session["agents"]
+            agents = session["data"]["agents"]
             
             # Use the generate_progress_report function from the agents
             report = agents["generate_progress_report"]()
@@ -158,6 +252,30 @@ class EducationalAgentService:
             
         except SessionNotFoundException:
             raise
+        except ServiceUnavailableException:
+            raise
+        except AgentException:
+            raise
+        except Exception as e:
+            logger.error(f"Error generating progress report for session {session_id}: {e}")
+            raise AgentException(f"Failed to generate progress report: {str(e)}")
+    
+    async def a_generate_progress_report(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate a progress report without blocking the event loop"""
+        session_id = session["session_id"]
+        try:
+            agents = session["data"]["agents"]
+            
+            report = await agents["a_generate_progress_report"]()
+            
+            if "error" in report:
+                raise AgentException(report["error"])
+            
+            logger.info(f"Progress report generated for session {session_id}")
+            return report
+            
+        except ServiceUnavailableException:
+            raise
         except AgentException:
             raise
         except Exception as e:
@@ -168,7 +286,7 @@ class EducationalAgentService:
         """Get conversation history for a session"""
         try:
             session = self.get_session(session_id)
-            agents = session["agents"]
+            agents = session["data"]["agents"]
             conv_memory = agents["conv_memory"]
             
             messages = conv_memory.get_messages()
@@ -194,75 +312,16 @@ class EducationalAgentService:
     def get_student_analytics(self, student_id: str) -> Dict[str, Any]:
         """Get comprehensive analytics for a student across all sessions"""
         try:
-            # Find all sessions for this student
-            student_sessions = [
-                session for session in self.active_sessions.values() 
-                if session["student_id"] == student_id
-            ]
-            
-            if not student_sessions:
-                # Try to load from progress data
-                try:
-                    progress_memory = ProgressMemory(student_id)
-                    report = progress_memory.get_progress_report()
-                    
-                    # Calculate analytics from progress data
-                    analytics = self._calculate_analytics_from_progress(report)
-                    analytics["student_id"] = student_id
-                    
-                    return analytics
-                    
-                except Exception:
-                    # Return default analytics if no data found
-                    return {
-                        "student_id": student_id,
-                        "total_sessions": 0,
-                        "total_problems_solved": 0,
-                        "average_score": 0.0,
-                        "subjects_studied": [],
-                        "skill_progression": {},
-                        "time_spent_learning": 0
-                    }
+            if progress_store is not None:
+                # Running totals kept by the store's triggers; shared by every worker
+                analytics = progress_store.student_analytics(student_id)
+                analytics["student_id"] = student_id
+                logger.info(f"Analytics generated for student {student_id}")
+                return analytics
             
-            # Aggregate data from active sessions
-            total_sessions = len(student_sessions)
-            subjects_studied = set()
-            skill_progression = {}
-            total_problems = 0
-            total_score = 0.0
-            
-            for session in student_sessions:
-                try:
-                    agents = session["agents"]
-                    progress_memory = agents["progress_memory"]
-                    report = progress_memory.get_progress_report()
-                    
-                    # Aggregate subjects and skills
-                    for subject, topics in report.get("subjects", {}).items():
-                        subjects_studied.add(subject)
-                        if subject not in skill_progression:
-                            skill_progression[subject] = {}
-                        
-                        for topic, progress in topics.items():
-                            skill_progression[subject][topic] = progress.get("skill_level", 0.0)
-                            total_problems += progress.get("attempts", 0)
-                            total_score += progress.get("skill_level", 0.0) * progress.get("attempts", 0)
-                    
-                except Exception as e:
-                    logger.warning(f"Error processing session {session['session_id']}: {e}")
-                    continue
-            
-            average_score = total_score / max(total_problems, 1)
-            
-            analytics = {
-                "student_id": student_id,
-                "total_sessions": total_sessions,
-                "total_problems_solved": total_problems,
-                "average_score": average_score,
-                "subjects_studied": list(subjects_studied),
-                "skill_progression": skill_progression,
-                "time_spent_learning": total_sessions * 30  # Estimate 30 minutes per session
-            }
+            # Running totals kept by the student's shared ProgressMemory
+            analytics = progress_memories.get(student_id).get_analytics()
+            analytics["student_id"] = student_id
             
             logger.info(f"Analytics generated for student {student_id}")
             return analytics
@@ -288,10 +347,7 @@ class EducationalAgentService:
                     }
                 },
                 "achievement_badges": [],
-                "total_sessions": len([
-                    s for s in self.active_sessions.values() 
-                    if s["student_id"] == student_id
-                ]),
+                "total_sessions": self.session_manager.get_student_session_count(student_id),
                 "created_at": datetime.now().isoformat()
             }
             
@@ -333,51 +389,37 @@ class EducationalAgentService:
             logger.error(f"Error updating user profile for {student_id}: {e}")
             raise AgentException(f"Failed to update user profile: {str(e)}")
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for the explanation cache and request coalescing"""
+        return {**explanation_cache.stats(), "single_flight": explanation_flights.stats()}
+    
+    def get_agent_pool_stats(self) -> Dict[str, Any]:
+        """Get hit rate and availability for the pre-built agent pool"""
+        return agent_pool.stats()
+    
     def close_session(self, session_id: str):
         """Close and clean up a session"""
         try:
-            if session_id in self.active_sessions:
-                session = self.active_sessions[session_id]
-                session["status"] = "closed"
-                session["closed_at"] = datetime.now().isoformat()
-                
-                # Clean up resources if needed
-                del self.active_sessions[session_id]
-                
+            if self.session_manager.delete_session(session_id):
+                # Expired or evicted sessions keep theirs until the problem ttl
+                problem_registry.discard_session(session_id)
                 logger.info(f"Session {session_id} closed successfully")
             
         except Exception as e:
             logger.error(f"Error closing session {session_id}: {e}")
             raise AgentException(f"Failed to close session: {str(e)}")
     
-    def _calculate_analytics_from_progress(self, progress_report: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate analytics from progress report data"""
-        subjects = progress_report.get("subjects", {})
-        sessions = progress_report.get("sessions", [])
-        
-        total_problems = 0
-        total_score = 0.0
-        subjects_studied = list(subjects.keys())
-        skill_progression = {}
-        
-        for subject, topics in subjects.items():
-            skill_progression[subject] = {}
-            for topic, progress in topics.items():
-                attempts = progress.get("attempts", 0)
-                skill_level = progress.get("skill_level", 0.0)
-                
-                total_problems += attempts
-                total_score += skill_level * attempts
-                skill_progression[subject][topic] = skill_level
-        
-        average_score = total_score / max(total_problems, 1)
-        total_sessions = len(sessions)
+    def _load_session_agents(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Rebuild agents for a stored session; memories reload from disk"""
+        logger.info(f"Rebuilding agents for stored session {record['session_id']}")
+        return {"agents": create_educational_agents(record["student_id"], record["session_id"])}
+    
+    def _release_session_agents(self, session: Dict[str, Any]):
+        """Flush a dropped session's progress and return its agents to the pool"""
+        session["status"] = "closed"
+        session["closed_at"] = datetime.now().isoformat()
         
-        return {
-            "total_sessions": total_sessions,
-            "total_problems_solved": total_problems,
-            "average_score": average_score,
-            "subjects_studied": subjects_studied,
-            "skill_progression": skill_progression,
-            "time_spent_learning": total_sessions * 30  # Estimate
-        } 
\ No newline at end of file
+        agents = session["data"]["agents"]
+        # Persist any progress still waiting in the write-behind queue
+        agents["progress_memory"].flush()
+        agent_pool.release(agents["shell"])
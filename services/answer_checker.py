@@ -0,0 +1,189 @@
+import re
+import threading
+from collections import Counter
+from fractions import Fraction
+from typing import Any, Dict, List, Optional, Tuple
+
+CORRECT_SCORE = 1.0
+INCORRECT_SCORE = 0.0
+
+_PREFIX = re.compile(r"^(?:final answer|the answer is|answer|ans)\s*[:=]?\s*")
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+_SEPARATORS = re.compile(r"\s*(?:,|;|\band\b|\bor\b|&)\s*")
+_LABEL = re.compile(r"^([a-z]\w*)\s*=\s*(.+)$")
+_NUMBER = re.compile(
+    r"^(?P<value>[-+]?(?:\d+\s+\d+/\d+|\d+\s*/\s*\d+|\d*\.\d+|\d+\.?))\s*(?P<unit>[a-z°%][a-z°%/^\d\s]*)?$"
+)
+_MIXED = re.compile(r"^(\d+)\s+(\d+/\d+)$")
+_CHOICE = re.compile(r"^\(?([a-e])\)?$")
+
+# (label, value, unit, decimals); decimals is None for exact integers and fractions
+Quantity = Tuple[Optional[str], Fraction, str, Optional[int]]
+
+
+def normalize_answer(text: str) -> str:
+    text = str(text).strip().lower().replace("−", "-").replace("$", "")
+    text = _PREFIX.sub("", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.rstrip(". ")
+
+
+def answer_parts(text: str) -> List[str]:
+    """Normalized parts of a list answer such as ``x = 2, x = 5``"""
+    text = _THOUSANDS.sub("", normalize_answer(text))
+    return [part for part in _SEPARATORS.split(text) if part]
+
+
+def _number(text: str) -> Tuple[Fraction, Optional[int]]:
+    sign = -1 if text.startswith("-") else 1
+    text = text.lstrip("+-")
+    mixed = _MIXED.match(text)
+    if mixed:
+        return sign * (int(mixed.group(1)) + Fraction(mixed.group(2))), None
+    if "/" in text:
+        return sign * Fraction(text.replace(" ", "")), None
+    decimals = len(text.split(".", 1)[1]) if "." in text else None
+    return sign * Fraction(text.rstrip(".") or "0"), decimals or None
+
+
+def parse_quantity(part: str) -> Optional[Quantity]:
+    label = None
+    labelled = _LABEL.match(part)
+    if labelled:
+        label, part = labelled.group(1), labelled.group(2)
+    number = _NUMBER.match(part)
+    if number is None:
+        return None
+    try:
+        value, decimals = _number(number.group("value"))
+    except (ValueError, ZeroDivisionError):
+        return None
+    return label, value, (number.group("unit") or "").replace(" ", ""), decimals
+
+
+def _rounding(expected: Quantity, given: Quantity) -> bool:
+    """Within a unit of the last decimal either side was written with"""
+    difference = abs(expected[1] - given[1])
+    return any(
+        decimals is not None and difference < Fraction(1, 10 ** decimals)
+        for decimals in (expected[3], given[3])
+    )
+
+
+def _match_quantities(expected: List[Quantity], given: List[Quantity]) -> Optional[bool]:
+    if len(expected) != len(given):
+        # A partial or padded answer deserves partial credit, which is the model's call
+        return None
+    expected_units = {q[2] for q in expected if q[2]}
+    given_units = {q[2] for q in given if q[2]}
+    if expected_units and given_units and expected_units != given_units:
+        # Possibly the same quantity in other units
+        return None
+    # A unit on one side only ("50%" vs "0.5") can still mean the same thing
+    wrong = None if bool(expected_units) != bool(given_units) else False
+
+    expected_labels = [q[0] for q in expected]
+    given_labels = [q[0] for q in given]
+    if all(expected_labels) and all(given_labels):
+        if Counter(expected_labels) != Counter(given_labels):
+            return None
+        same_label = lambda e, g: e[0] == g[0]
+    elif len(set(filter(None, expected_labels))) > 1:
+        # "x = 1, y = 2" answered as "1, 2" depends on the order the student meant
+        return None
+    else:
+        same_label = lambda e, g: True
+
+    remaining = list(given)
+    for quantity in expected:
+        match = next((g for g in remaining if same_label(quantity, g) and g[1] == quantity[1]), None)
+        if match is None:
+            if any(same_label(quantity, g) and _rounding(quantity, g) for g in remaining):
+                return None
+            return wrong
+        remaining.remove(match)
+    return True
+
+
+def check_answer(expected: str, given: str) -> Optional[bool]:
+    """True or False when the answer is clearly right or wrong, None when it needs a grader.
+
+    Parts are compared regardless of order. Numbers are compared by value, so
+    ``0.5``, ``1/2`` and ``.50`` are the same answer. Values that differ by
+    less than a unit in the last written decimal place, such as ``3.14``
+    for ``3.14159``, may be rounding or may be wrong, so they are left to the
+    model along with working, prose and expressions that aren't written
+    identically.
+    """
+    expected_parts = answer_parts(expected)
+    given_parts = answer_parts(given)
+    if not expected_parts or not given_parts:
+        return None
+
+    expected_quantities = [parse_quantity(part) for part in expected_parts]
+    given_quantities = [parse_quantity(part) for part in given_parts]
+    if all(expected_quantities) and all(given_quantities):
+        return _match_quantities(expected_quantities, given_quantities)
+
+    def compact(parts: List[str]) -> Counter:
+        return Counter(part.replace(" ", "") for part in parts)
+
+    if compact(expected_parts) == compact(given_parts):
+        return True
+    expected_choice = _CHOICE.match(expected_parts[0]) if len(expected_parts) == 1 else None
+    given_choice = _CHOICE.match(given_parts[0]) if len(given_parts) == 1 else None
+    if expected_choice and given_choice:
+        return expected_choice.group(1) == given_choice.group(1)
+    return None
+
+
+class AnswerChecker:
+    """Grades clear-cut answers locally so only ambiguous ones reach the model"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.correct = 0
+        self.incorrect = 0
+        self.deferred = 0
+        self._lock = threading.Lock()
+
+    def evaluate(self, problem: Dict[str, Any], student_solution: str) -> Optional[Dict[str, Any]]:
+        """An evaluation in the model's format, or None to ask the model"""
+        if not self.enabled:
+            return None
+        expected = str(problem.get("correct_answer", "")).strip().rstrip(".")
+        verdict = check_answer(expected, student_solution)
+        with self._lock:
+            if verdict is None:
+                self.deferred += 1
+            elif verdict:
+                self.correct += 1
+            else:
+                self.incorrect += 1
+        if verdict is None:
+            return None
+        if verdict:
+            feedback = f"Correct! Your answer matches the expected answer: {expected}."
+        else:
+            feedback = f"Not quite. The expected answer is {expected}."
+            if problem.get("solution"):
+                feedback += f" Here is how to get there: {problem['solution']}"
+        return {
+            "is_correct": verdict,
+            "feedback": feedback,
+            "performance_score": CORRECT_SCORE if verdict else INCORRECT_SCORE,
+            "graded_locally": True
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            decided = self.correct + self.incorrect
+            checked = decided + self.deferred
+            return {
+                "enabled": self.enabled,
+                "checked": checked,
+                "graded_correct": self.correct,
+                "graded_incorrect": self.incorrect,
+                "sent_to_llm": self.deferred,
+                "hit_rate": decided / checked if checked else 0.0
+            }
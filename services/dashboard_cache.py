@@ -0,0 +1,94 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class DashboardView:
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+class DashboardCache:
+    """Rendered dashboard responses per student, kept until the student changes.
+
+    ``invalidate`` is wired to progress and session events. A rebuild takes a
+    ``version`` token first, and ``put`` ignores the view if the student was
+    invalidated after that, so a slow rebuild can't bring back stale data.
+    The ttl only bounds staleness from changes made by other worker processes.
+
+    Only the latest ``max_entries`` invalidations are remembered. Forgetting
+    one raises a floor instead, so a rebuild started before any forgotten
+    invalidation is dropped; at worst that costs a cache miss.
+    """
+
+    def __init__(self, ttl: float = 30, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._views: "OrderedDict[str, DashboardView]" = OrderedDict()
+        # Generation of each student's latest invalidation, least recent first
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._generation = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, student_id: str) -> Optional[DashboardView]:
+        with self._lock:
+            view = self._views.get(student_id)
+            if view is not None and view.expires_at <= time.monotonic():
+                del self._views[student_id]
+                view = None
+            if view is None:
+                self.misses += 1
+                return None
+            self._views.move_to_end(student_id)
+            self.hits += 1
+            return view
+
+    def version(self, student_id: str) -> int:
+        """Token to pass to ``put`` for a view built from the current data"""
+        with self._lock:
+            return self._generation
+
+    def put(self, student_id: str, version: int, body: bytes, content: bytes) -> DashboardView:
+        """Store a rendered view; the weak ETag covers ``content`` so a rebuild
+        that only changes timestamps still matches the client's copy"""
+        view = DashboardView(
+            body=body,
+            etag=f'W/"{hashlib.sha256(content).hexdigest()[:32]}"',
+            expires_at=time.monotonic() + self.ttl
+        )
+        with self._lock:
+            if self._invalidated.get(student_id, self._floor) <= version:
+                self._views[student_id] = view
+                self._views.move_to_end(student_id)
+                while len(self._views) > self.max_entries:
+                    self._views.popitem(last=False)
+        return view
+
+    def invalidate(self, student_id: str):
+        with self._lock:
+            self._generation += 1
+            self._invalidated[student_id] = self._generation
+            self._invalidated.move_to_end(student_id)
+            while len(self._invalidated) > self.max_entries:
+                _, generation = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, generation)
+            self._views.pop(student_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "views": len(self._views),
+                "tracked_invalidations": len(self._invalidated),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# The curriculum served by /api/subjects; the problem bank is stocked per topic
+SUBJECT_TOPICS: Dict[str, List[str]] = {
+    "Mathematics": ["Algebra", "Geometry", "Calculus", "Statistics", "Trigonometry"],
+    "Physics": ["Mechanics", "Thermodynamics", "Electromagnetism", "Optics", "Modern Physics"],
+    "Chemistry": ["Organic Chemistry", "Inorganic Chemistry", "Physical Chemistry", "Biochemistry"],
+    "Biology": ["Cell Biology", "Genetics", "Ecology", "Evolution", "Human Biology"],
+    "General": ["Problem Solving", "Critical Thinking", "Study Skills"]
+}
+
+Bucket = Tuple[str, str, str]
+
+
+def bucket_key(subject: str, topic: str, difficulty: str) -> Bucket:
+    return (subject.strip().lower(), topic.strip().lower(), difficulty.strip().lower())
+
+
+class ProblemBank:
+    """Pre-generated practice problems per (subject, topic, difficulty).
+
+    A background task on the event loop keeps every bucket stocked with
+    ``size`` problems, topping it up whenever ``take`` consumes some. Stock is
+    saved to ``path`` so a restart doesn't begin empty. Requests for topics
+    outside the curriculum, or for more problems than are in stock, fall back
+    to live generation in the caller.
+    """
+
+    def __init__(self, generate: Callable[[str, str, str, int], Awaitable[List[Dict[str, Any]]]],
+                 buckets: Iterable[Tuple[str, str, str]], size: int = 3, batch_size: int = 3,
+                 path: Optional[str] = "data/problem_bank/problems.json", retry_delay: float = 30.0):
+        self.generate = generate
+        self.size = size
+        self.batch_size = max(1, batch_size)
+        self.path = path
+        self.retry_delay = retry_delay
+        self.hits = 0
+        self.misses = 0
+        self._names: Dict[Bucket, Tuple[str, str, str]] = {bucket_key(*b): tuple(b) for b in buckets}
+        self._stock: Dict[Bucket, Deque[Dict[str, Any]]] = {key: deque() for key in self._names}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._load()
+
+    def start(self):
+        """Start the refill task; call from within the running event loop"""
+        if self.size <= 0 or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._wake.set()
+        self._task = self._loop.create_task(self._refill_worker())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self._save)
+
+    def take(self, subject: str, topic: str, difficulty: str, count: int) -> List[Dict[str, Any]]:
+        """Up to ``count`` stocked problems; safe to call from any thread"""
+        key = bucket_key(subject, topic, difficulty)
+        with self._lock:
+            stock = self._stock.get(key)
+            taken = [stock.popleft() for _ in range(min(count, len(stock)))] if stock else []
+            self.hits += len(taken)
+            self.misses += count - len(taken)
+        if taken:
+            self._request_refill()
+        return taken
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            served = self.hits + self.misses
+            return {
+                "buckets": len(self._stock),
+                "target_per_bucket": self.size,
+                "stocked": sum(len(stock) for stock in self._stock.values()),
+                "empty_buckets": sum(1 for stock in self._stock.values() if not stock),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / served if served else 0.0
+            }
+
+    def _request_refill(self):
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _deficits(self) -> List[Tuple[Bucket, int]]:
+        with self._lock:
+            return [(key, self.size - len(stock)) for key, stock in self._stock.items() if len(stock) < self.size]
+
+    async def _refill_worker(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            for key, missing in self._deficits():
+                subject, topic, difficulty = self._names[key]
+                try:
+                    problems = await self.generate(subject, topic, difficulty, min(missing, self.batch_size))
+                    if not problems:
+                        raise ValueError("no valid problems in response")
+                except Exception as e:
+                    logger.error(f"Problem bank refill failed for {subject}/{topic}/{difficulty}: {e}")
+                    await asyncio.sleep(self.retry_delay)
+                    break
+                with self._lock:
+                    self._stock[key].extend(problems[:self.size - len(self._stock[key])])
+            await asyncio.to_thread(self._save)
+            if self._deficits():
+                self._wake.set()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            for entry in saved:
+                key = bucket_key(entry["subject"], entry["topic"], entry["difficulty"])
+                if key in self._stock:
+                    self._stock[key].extend(entry["problems"][:self.size])
+        except Exception as e:
+            logger.error(f"Failed to load problem bank: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        with self._lock:
+            saved = [
+                {"subject": s, "topic": t, "difficulty": d, "problems": list(self._stock[key])}
+                for key, (s, t, d) in self._names.items() if self._stock[key]
+            ]
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(saved, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Failed to save problem bank: {e}")
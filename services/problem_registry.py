@@ -0,0 +1,138 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class ProblemRegistry:
+    """Open practice problems by problem_id, with any number per session.
+
+    Problems expire ``ttl`` seconds after they are handed out, and the
+    oldest are dropped beyond ``max_problems``. With a ``path`` they are also
+    written to SQLite, so a problem can still be graded after a restart or by
+    another worker.
+    """
+
+    def __init__(self, ttl: float = 24 * 3600, max_problems: int = 100000, path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_problems = max_problems
+        # Every problem has the same ttl, so insertion order is (nearly) expiry order
+        self._problems: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._expires: Dict[str, float] = {}
+        self._by_session: Dict[str, "OrderedDict[str, None]"] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            with self._lock, self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    """CREATE TABLE IF NOT EXISTS problems (
+                        problem_id TEXT PRIMARY KEY,
+                        session_id TEXT NOT NULL,
+                        problem TEXT NOT NULL,
+                        expires_at REAL NOT NULL
+                    )"""
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_problems_session ON problems (session_id)")
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_problems_expires ON problems (expires_at)")
+
+    def register(self, session_id: str, problem: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a problem that has a ``problem_id``; returns it with ``session_id`` set"""
+        problem = {**problem, "session_id": session_id}
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._add(problem, expires_at)
+            self._evict(time.time())
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO problems (problem_id, session_id, problem, expires_at) VALUES (?, ?, ?, ?)",
+                        (problem["problem_id"], session_id, json.dumps(problem), expires_at)
+                    )
+                    # Drop expired rows every so often, not on every write
+                    self._writes += 1
+                    if self._writes % 100 == 0:
+                        self._conn.execute("DELETE FROM problems WHERE expires_at <= ?", (time.time(),))
+        return problem
+
+    def get(self, problem_id: str, session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The problem, if it exists, hasn't expired and (when given) belongs to ``session_id``"""
+        with self._lock:
+            now = time.time()
+            self._evict(now)
+            problem = self._problems.get(problem_id) if self._expires.get(problem_id, 0.0) > now else None
+            if problem is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT problem, expires_at FROM problems WHERE problem_id = ? AND expires_at > ?", (problem_id, now)
+                ).fetchone()
+                if row is not None:
+                    problem = json.loads(row[0])
+                    self._add(problem, row[1])
+        if problem is None or (session_id is not None and problem["session_id"] != session_id):
+            return None
+        return problem
+
+    def latest(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """The session's most recently handed out open problem"""
+        problems = self.session_problems(session_id)
+        return problems[-1] if problems else None
+
+    def session_problems(self, session_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            now = time.time()
+            self._evict(now)
+            problem_ids = list(self._by_session.get(session_id, ()))
+            if not problem_ids and self._conn is not None:
+                rows = self._conn.execute(
+                    "SELECT problem, expires_at FROM problems WHERE session_id = ? AND expires_at > ? ORDER BY expires_at",
+                    (session_id, now)
+                ).fetchall()
+                for problem, expires_at in rows:
+                    self._add(json.loads(problem), expires_at)
+                problem_ids = list(self._by_session.get(session_id, ()))
+            # Reloaded problems can sit behind newer ones, so check each deadline
+            return [self._problems[problem_id] for problem_id in problem_ids if self._expires[problem_id] > now]
+
+    def discard_session(self, session_id: str):
+        """Forget a closed session's problems"""
+        with self._lock:
+            for problem_id in list(self._by_session.get(session_id, ())):
+                self._remove(problem_id)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM problems WHERE session_id = ?", (session_id,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"open_problems": len(self._problems), "sessions": len(self._by_session)}
+
+    def _add(self, problem: Dict[str, Any], expires_at: float):
+        problem_id = problem["problem_id"]
+        self._remove(problem_id)
+        self._problems[problem_id] = problem
+        self._expires[problem_id] = expires_at
+        self._by_session.setdefault(problem["session_id"], OrderedDict())[problem_id] = None
+
+    def _remove(self, problem_id: str):
+        problem = self._problems.pop(problem_id, None)
+        if problem is None:
+            return
+        del self._expires[problem_id]
+        session_problems = self._by_session.get(problem["session_id"])
+        if session_problems is not None:
+            session_problems.pop(problem_id, None)
+            if not session_problems:
+                del self._by_session[problem["session_id"]]
+
+    def _evict(self, now: float):
+        while self._problems:
+            problem_id = next(iter(self._problems))
+            if self._expires[problem_id] > now and len(self._problems) <= self.max_problems:
+                break
+            self._remove(problem_id)
@@ -0,0 +1,302 @@
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (subject, topic, difficulty, style), as returned by extract_subject_and_topic
+Classification = Tuple[str, str, str, str]
+
+# Keyword prefixes per (subject, topic); each matches at a word start
+TOPIC_KEYWORDS: Dict[Tuple[str, str], List[str]] = {
+    ("Mathematics", "Quadratic Equations"): ["quadratic", r"x\^2", "x²", "discriminant", "completing the square"],
+    ("Mathematics", "Linear Equations"): ["linear equation", "slope", "y ?= ?mx", "simultaneous equation"],
+    ("Mathematics", "Factoring"): ["factori", "factoring", "greatest common factor"],
+    ("Mathematics", "Derivatives"): ["derivative", "differentiat", "chain rule", "product rule", "quotient rule"],
+    ("Mathematics", "Integration"): ["integral", "integrat", "antiderivative"],
+    ("Mathematics", "Algebra"): ["algebra", "polynomial", "inequalit", "exponent", "logarithm"],
+    ("Mathematics", "Geometry"): ["geometr", "triangle", "circle", "polygon", "pythagor", "perimeter", "angle"],
+    ("Mathematics", "Calculus"): ["calculus", "limits? of", "continuity"],
+    ("Mathematics", "Statistics"): ["statistic", "probabilit", "standard deviation", "variance", "median", "mean of"],
+    ("Mathematics", "Trigonometry"): ["trigonometr", "sine", "cosine", "tangent", r"sin\b", r"cos\b", r"tan\b"],
+    ("Physics", "Mechanics"): ["newton'?s law", "velocity", "acceleration", "momentum", "friction", "projectile",
+                               "kinematic", "torque"],
+    ("Physics", "Thermodynamics"): ["thermodynamic", "entropy", "heat engine", "heat transfer", "specific heat"],
+    ("Physics", "Electromagnetism"): ["electromagnet", "electric field", "magnetic", "circuit", "ohm'?s law", "voltage",
+                                      "capacitor", "resistor"],
+    ("Physics", "Optics"): ["optic", "lens", "refraction", "reflection", "mirror", "diffraction"],
+    ("Physics", "Modern Physics"): ["quantum", "relativity", "photoelectric", "radioactiv", "nuclear"],
+    ("Chemistry", "Organic Chemistry"): ["organic", "hydrocarbon", "alkane", "alkene", "alkyne", "benzene",
+                                        "functional group"],
+    ("Chemistry", "Inorganic Chemistry"): ["inorganic", "periodic table", "transition metal", "ionic bond"],
+    ("Chemistry", "Physical Chemistry"): ["enthalpy", "gibbs", "reaction rate", "rate law", "chemical equilibrium",
+                                          "electrochemi"],
+    ("Chemistry", "Biochemistry"): ["biochemi", "enzyme", "amino acid", "metabolism"],
+    ("Chemistry", "Stoichiometry"): ["stoichiometr", "molar mass", "limiting reagent", "moles? of"],
+    ("Biology", "Cell Biology"): ["cell biology", "mitochondri", "organelle", "mitosis", "meiosis", "cell membrane",
+                                  "cell division"],
+    ("Biology", "Genetics"): ["genetic", "dna", "rna", "allele", "heredit", "mendel", "chromosome", "genes?\\b"],
+    ("Biology", "Ecology"): ["ecolog", "ecosystem", "food chain", "food web", "habitat", "biome"],
+    ("Biology", "Evolution"): ["evolution", "natural selection", "darwin", "speciation"],
+    ("Biology", "Human Biology"): ["human body", "digestive", "nervous system", "circulatory", "respiratory system",
+                                   "heart"],
+    ("Biology", "Photosynthesis"): ["photosynthe", "chlorophyll", "chloroplast"],
+}
+
+# Topic keywords that are everyday words or shared with another subject; on
+# their own they are a guess ("reflection" over the y-axis is geometry)
+GENERIC_KEYWORDS = {
+    "slope", "angle", "circle", "triangle", "tangent", "median", "limits? of", "integral", "momentum",
+    "reflection", "mirror", "lens", "circuit", "magnetic", "nuclear", "organic", "heart", "habitat",
+}
+
+# Words that point at a subject without naming a topic
+SUBJECT_KEYWORDS: Dict[str, List[str]] = {
+    "Mathematics": ["math", "equation", "solve for", "calculate"],
+    "Physics": ["physics", "force", "motion", "energy", "gravity", "wave"],
+    "Chemistry": ["chemistry", "chemical", "reaction", "element", "molecule", "atom", "compound"],
+    "Biology": ["biology", "cell", "organism", "species", "living"],
+}
+
+DIFFICULTY_KEYWORDS = {"easy": ["easy", "beginner", "simple", "basic"], "hard": ["hard", "advanced", "difficult"]}
+STYLE_KEYWORDS = {"auditory": ["auditory", "listen"], "kinesthetic": ["kinesthetic", "hands-on"]}
+
+# Confidence reported by the pattern tier
+TOPIC_CONFIDENCE = 0.9
+SUBJECT_CONFIDENCE = 0.6
+AMBIGUOUS_CONFIDENCE = 0.4
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip("?!. ")
+
+
+def _alternation(words: List[str]) -> str:
+    return "|".join(rf"\b{word}" for word in words)
+
+
+def _first_match(keywords: Dict[str, List[str]], text: str, default: str) -> str:
+    for value, words in keywords.items():
+        if re.search(_alternation(words), text):
+            return value
+    return default
+
+
+def detect_difficulty(query: str) -> str:
+    return _first_match(DIFFICULTY_KEYWORDS, query.lower(), "medium")
+
+
+def detect_style(query: str) -> str:
+    return _first_match(STYLE_KEYWORDS, query.lower(), "visual")
+
+
+class PatternClassifier:
+    """Keyword tier: every topic and subject pattern compiled into one regex.
+
+    A single ``finditer`` pass finds all keyword hits; the named group of each
+    hit says which topic or subject it belongs to. A topic is only confident
+    when it is corroborated: a specific keyword, or a generic one backed by
+    another hit for the same subject.
+    """
+
+    def __init__(self, topic_keywords: Dict[Tuple[str, str], List[str]] = TOPIC_KEYWORDS,
+                 subject_keywords: Dict[str, List[str]] = SUBJECT_KEYWORDS,
+                 generic_keywords: Set[str] = GENERIC_KEYWORDS):
+        # group name -> (subject, topic, generic)
+        self._groups: Dict[str, Tuple[str, Optional[str], bool]] = {}
+        alternatives = []
+        for i, ((subject, topic), words) in enumerate(topic_keywords.items()):
+            for prefix, generic in (("t", False), ("g", True)):
+                group = [word for word in words if (word in generic_keywords) == generic]
+                if group:
+                    self._groups[f"{prefix}{i}"] = (subject, topic, generic)
+                    alternatives.append(f"(?P<{prefix}{i}>{_alternation(group)})")
+        for i, (subject, words) in enumerate(subject_keywords.items()):
+            self._groups[f"s{i}"] = (subject, None, True)
+            alternatives.append(f"(?P<s{i}>{_alternation(words)})")
+        self._pattern = re.compile("|".join(alternatives))
+
+    def predict(self, query: str) -> Optional[Tuple[str, str, float]]:
+        """(subject, topic, confidence), or None when no keyword matches"""
+        topics: Counter = Counter()
+        subjects: Counter = Counter()
+        specific: Counter = Counter()
+        for match in self._pattern.finditer(query.lower()):
+            subject, topic, generic = self._groups[match.lastgroup]
+            subjects[subject] += 1
+            if topic is not None:
+                topics[(subject, topic)] += 1
+                if not generic:
+                    specific[(subject, topic)] += 1
+        if not subjects:
+            return None
+
+        ranked_subjects = subjects.most_common(2)
+        if len(ranked_subjects) > 1 and ranked_subjects[0][1] == ranked_subjects[1][1]:
+            subject, confidence = ranked_subjects[0][0], AMBIGUOUS_CONFIDENCE
+        else:
+            subject, confidence = ranked_subjects[0][0], SUBJECT_CONFIDENCE
+        ranked_topics = [(t, n) for t, n in topics.most_common() if t[0] == subject]
+        if not ranked_topics:
+            return subject, "General", min(confidence, SUBJECT_CONFIDENCE)
+        if len(ranked_topics) > 1 and ranked_topics[0][1] == ranked_topics[1][1]:
+            return subject, ranked_topics[0][0][1], min(confidence, SUBJECT_CONFIDENCE)
+        best = ranked_topics[0][0]
+        if confidence == AMBIGUOUS_CONFIDENCE:
+            return subject, best[1], confidence
+        if not specific[best] and subjects[subject] < 2:
+            return subject, best[1], SUBJECT_CONFIDENCE
+        return subject, best[1], TOPIC_CONFIDENCE
+
+
+class TfidfClassifier:
+    """Optional tier trained on queries the LLM has already classified.
+
+    Needs scikit-learn and at least ``min_examples`` logged queries; until
+    then ``predict`` returns None. Labelled queries are appended to ``path``
+    as JSON lines and the model is refit from them at startup.
+    """
+
+    def __init__(self, path: Optional[str] = None, min_examples: int = 200):
+        self.path = path
+        self.min_examples = min_examples
+        self.model = None
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.fit(self._load())
+
+    def fit(self, examples: List[Tuple[str, str, str]]) -> bool:
+        labels = [f"{subject}\t{topic}" for _, subject, topic in examples]
+        if len(examples) < self.min_examples or len(set(labels)) < 2:
+            return False
+        try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.linear_model import LogisticRegression
+            from sklearn.pipeline import make_pipeline
+        except ImportError:
+            logger.info("scikit-learn not installed; TF-IDF classifier tier disabled")
+            return False
+        model = make_pipeline(
+            TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, min_df=1),
+            LogisticRegression(max_iter=1000)
+        )
+        model.fit([normalize_query(query) for query, _, _ in examples], labels)
+        self.model = model
+        logger.info(f"TF-IDF classifier trained on {len(examples)} queries")
+        return True
+
+    def predict(self, query: str) -> Optional[Tuple[str, str, float]]:
+        if self.model is None:
+            return None
+        probabilities = self.model.predict_proba([normalize_query(query)])[0]
+        best = probabilities.argmax()
+        subject, topic = self.model.classes_[best].split("\t", 1)
+        return subject, topic, float(probabilities[best])
+
+    def record(self, query: str, subject: str, topic: str):
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"query": query, "subject": subject, "topic": topic}) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to log classified query: {e}")
+
+    def _load(self) -> List[Tuple[str, str, str]]:
+        examples = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        examples.append((entry["query"], entry["subject"], entry["topic"]))
+                    except (ValueError, KeyError):
+                        continue
+        except OSError as e:
+            logger.error(f"Failed to load classified queries: {e}")
+        return examples
+
+
+class TieredClassifier:
+    """Classifies queries with the cheapest tier that is confident enough.
+
+    Results are cached by normalized query. Local tiers run in order and the
+    first prediction at or above ``threshold`` wins; otherwise ``llm_classify``
+    is called and its answer is logged for the TF-IDF tier. If the LLM fails,
+    the best local guess is used.
+    """
+
+    def __init__(self, llm_classify: Callable[[str], Classification], threshold: float = 0.75,
+                 cache_size: int = 10000, tfidf: Optional[TfidfClassifier] = None):
+        self.llm_classify = llm_classify
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self.patterns = PatternClassifier()
+        self.tfidf = tfidf
+        self.counts = Counter()
+        self._cache: "OrderedDict[str, Classification]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def classify(self, query: str) -> Classification:
+        key = normalize_query(query)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.counts["cache"] += 1
+                return cached
+
+        result, tier = self._classify(query)
+        with self._lock:
+            self.counts[tier] += 1
+            if tier != "fallback":
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self.counts.values())
+            return {
+                "cache_entries": len(self._cache),
+                "tfidf_trained": self.tfidf is not None and self.tfidf.model is not None,
+                **{tier: self.counts[tier] for tier in ("cache", "patterns", "tfidf", "llm", "fallback")},
+                "llm_rate": (self.counts["llm"] + self.counts["fallback"]) / total if total else 0.0
+            }
+
+    def _classify(self, query: str) -> Tuple[Classification, str]:
+        guesses = []
+        for tier, classifier in (("patterns", self.patterns), ("tfidf", self.tfidf)):
+            prediction = classifier.predict(query) if classifier is not None else None
+            if prediction is None:
+                continue
+            subject, topic, confidence = prediction
+            if confidence >= self.threshold:
+                return (subject, topic, detect_difficulty(query), detect_style(query)), tier
+            guesses.append(prediction)
+
+        try:
+            result = self.llm_classify(query)
+        except Exception as e:
+            logger.error(f"AI classification failed: {e}")
+            return self._fallback(query, guesses), "fallback"
+        if self.tfidf is not None:
+            self.tfidf.record(query, result[0], result[1])
+        return result, "llm"
+
+    def _fallback(self, query: str, guesses: List[Tuple[str, str, float]]) -> Classification:
+        if guesses:
+            subject, topic, _ = max(guesses, key=lambda g: g[2])
+        else:
+            subject, topic = "General", "General"
+        words = query.split()
+        if topic == "General" and len(words) >= 2:
+            topic = " ".join(words[-2:]).title()
+        return subject, topic, detect_difficulty(query), detect_style(query)
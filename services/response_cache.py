@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP_WORDS = {"a", "an", "and", "in", "of", "the", "to", "for", "on", "with"}
+
+
+def _topic_words(text: str) -> List[str]:
+    words = re.findall(r"[a-z0-9]+", text.lower().replace("'s", ""))
+    words = [w for w in words if w not in _STOP_WORDS]
+    # Crude plural stemming is enough for topic names
+    return [w[:-1] if len(w) > 3 and w.endswith("s") else w for w in words]
+
+
+def context_fingerprint(context: str) -> str:
+    return hashlib.sha256(context.encode()).hexdigest()[:16]
+
+
+class MemoryCacheBackend:
+    """In-process LRU backend"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk LRU backend, shared across restarts and worker processes"""
+
+    def __init__(self, path: str = "data/cache/responses.db", max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(response_cache)")}
+            if "anchor" in columns:
+                # Left by the similarity-matching cache, whose keys no longer match
+                self._conn.execute("DROP TABLE response_cache")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    entry TEXT NOT NULL,
+                    last_used REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_response_cache_last_used ON response_cache (last_used)"
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT entry FROM response_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE response_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+
+    def set(self, key: str, entry: Dict[str, Any]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, entry, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(entry), time.time())
+            )
+            # Trim the least recently used rows every so often, not on every write
+            self._writes += 1
+            if self._writes % 100:
+                return
+            self._conn.execute(
+                """DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM response_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,)
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """Cache of tutor responses keyed by subject/topic/difficulty/style.
+
+    Topics are compared as sets of content words, so case, plurals, stop words
+    and word order don't matter ("Equations, quadratic" finds "Quadratic
+    equations") but any other difference does. Responses generated from a
+    conversation context are only shared with requests that have the same
+    context; context-free responses are shared by everyone.
+    """
+
+    def __init__(self, backend=None, ttl: float = 24 * 3600):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def key(self, subject: str, topic: str, difficulty: str, style: str, context: str = "") -> str:
+        """Normalised lookup key; equivalent phrasings of a request share it"""
+        parts = [part.strip().lower() for part in (subject, difficulty, style)]
+        parts.append(" ".join(sorted(set(_topic_words(topic)))))
+        if context:
+            parts.append(context_fingerprint(context))
+        return "|".join(parts)
+
+    def _fresh(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl is None or time.time() - entry["created_at"] < self.ttl
+
+    def _count(self, attr: str):
+        with self._stats_lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def get(self, subject: str, topic: str, difficulty: str, style: str, context: str = "") -> Optional[str]:
+        key = self.key(subject, topic, difficulty, style, context)
+        entry = self.backend.get(key)
+        if entry is not None:
+            if self._fresh(entry):
+                self._count("hits")
+                return entry["value"]
+            self.backend.delete(key)
+        self._count("misses")
+        return None
+
+    def set(self, subject: str, topic: str, difficulty: str, style: str, value: str, context: str = ""):
+        self.backend.set(self.key(subject, topic, difficulty, style, context), {
+            "topic": topic,
+            "value": value,
+            "created_at": time.time()
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.backend)
+        }
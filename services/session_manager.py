@@ -1,79 +1,175 @@
+import heapq
 import json
 import logging
 import os
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from datetime import datetime
+from typing import Callable, Dict, Any, Optional, List
 import threading
 import time
 
+from services.session_store import MemorySessionBackend, SESSION_FIELDS
+
 logger = logging.getLogger(__name__)
 
+class ExpiryIndex:
+    """Min-heap of monotonic deadlines with lazy invalidation.
+
+    Touching a key only records its new deadline; the heap entry is left in
+    place and rescheduled when it surfaces. Popping expired keys therefore
+    costs O(log n) per due entry instead of a scan over every key. Not
+    thread-safe: callers hold their own lock.
+    """
+
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._deadlines: Dict[str, float] = {}
+        self._scheduled: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def touch(self, key: str, deadline: float):
+        self._deadlines[key] = deadline
+        scheduled = self._scheduled.get(key)
+        if scheduled is None or deadline < scheduled:
+            self._schedule(key, deadline)
+
+    def discard(self, key: str):
+        self._deadlines.pop(key, None)
+        self._scheduled.pop(key, None)
+
+    def deadline(self, key: str) -> Optional[float]:
+        return self._deadlines.get(key)
+
+    def pop_expired(self, now: float, limit: Optional[int] = None) -> List[str]:
+        """Remove and return keys whose deadline has passed"""
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(expired) >= limit:
+                break
+            scheduled, key = heapq.heappop(self._heap)
+            if self._scheduled.get(key) != scheduled:
+                continue  # Superseded entry
+            deadline = self._deadlines[key]
+            if deadline <= now:
+                self.discard(key)
+                expired.append(key)
+            else:
+                self._schedule(key, deadline)  # Touched since it was scheduled
+        return expired
+
+    def _schedule(self, key: str, deadline: float):
+        self._scheduled[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+
+
 class SessionManager:
-    """Manages session lifecycle and storage"""
+    """Manages session lifecycle and storage.
+
+    Session records live in a pluggable backend (in-memory, or SQLite shared by
+    every worker). ``sessions`` caches this process's live sessions together
+    with their agents; a session created by another worker, or before a
+    restart, is rebuilt through ``on_load`` the first time it is requested here.
+    """
     
-    def __init__(self, cleanup_interval: int = 3600, session_timeout: int = 7200):
+    def __init__(self, cleanup_interval: int = 60, session_timeout: int = 7200,
+                 on_close: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 backend=None, on_load: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                 touch_interval: float = 60, on_change: Optional[Callable[[str], None]] = None):
         """
         Initialize session manager
         
         Args:
-            cleanup_interval: Interval in seconds for cleanup thread (default: 1 hour)
+            cleanup_interval: Interval in seconds for cleanup thread (default: 1 minute)
             session_timeout: Session timeout in seconds (default: 2 hours)
+            on_close: Called with the session whenever one is deleted or expires
+            backend: Session record store (default: in-memory)
+            on_load: Builds the "data" of a stored session that isn't live in this process
+            touch_interval: Minimum seconds between writes of a session's last access to the backend
+            on_change: Called with the student id when one of their sessions is created or closed
         """
         self.sessions: Dict[str, Dict[str, Any]] = {}
+        self._expiry = ExpiryIndex()
+        # Monotonic time each session's last access was written to the backend
+        self._persisted: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._created = 0
+        self._deleted = 0
+        self._expired = 0
+        self.backend = backend if backend is not None else MemorySessionBackend()
+        self.on_close = on_close
+        self.on_load = on_load
+        self.on_change = on_change
         self.cleanup_interval = cleanup_interval
         self.session_timeout = session_timeout
-        self._lock = threading.RLock()
+        self.touch_interval = touch_interval
         self._cleanup_thread = None
-        self._stop_cleanup = False
+        self._stop_cleanup = threading.Event()
         
         # Start cleanup thread
         self._start_cleanup_thread()
     
     def create_session(self, session_id: str, student_id: str, session_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new session"""
+        now = datetime.now().isoformat()
+        session_info = {
+            "session_id": session_id,
+            "student_id": student_id,
+            "created_at": now,
+            "last_accessed": now,
+            "status": "active",
+            "data": session_data
+        }
+        
+        self.backend.save(session_info, time.time())
         with self._lock:
-            session_info = {
-                "session_id": session_id,
-                "student_id": student_id,
-                "created_at": datetime.now().isoformat(),
-                "last_accessed": datetime.now().isoformat(),
-                "status": "active",
-                "data": session_data
-            }
-            
-            self.sessions[session_id] = session_info
-            logger.info(f"Session {session_id} created for student {student_id}")
-            
-            return session_info
+            self._add(session_info)
+            self._created += 1
+        self._notify(student_id)
+        logger.info(f"Session {session_id} created for student {student_id}")
+        
+        return session_info
     
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get session by ID"""
         with self._lock:
-            if session_id not in self.sessions:
-                return None
-            
-            session = self.sessions[session_id]
-            
-            # Check if session is expired
-            last_accessed = datetime.fromisoformat(session["last_accessed"])
-            if datetime.now() - last_accessed > timedelta(seconds=self.session_timeout):
-                logger.info(f"Session {session_id} expired, removing")
-                del self.sessions[session_id]
-                return None
-            
-            # Update last accessed time
-            session["last_accessed"] = datetime.now().isoformat()
-            
-            return session
+            session = self.sessions.get(session_id)
+            if session is not None:
+                # Check if session is expired
+                expired = self._expiry.deadline(session_id) <= time.monotonic()
+                if expired:
+                    logger.info(f"Session {session_id} expired, removing")
+                    self._remove(session_id)
+                    self._expired += 1
+                else:
+                    persist = self._touch(session)
+        
+        if session is None:
+            return self._load(session_id)
+        if expired:
+            self._close(session)
+            record = self.backend.load(session_id)
+            if record is not None and self._fresh(record):
+                # Another worker has been serving it; rebuild from the shared record
+                return self._load(session_id)
+            if record is not None:
+                self.backend.delete(session_id)
+            return None
+        if persist and not self.backend.touch(session_id, session["last_accessed"], time.time()):
+            # Deleted or expired by another worker
+            self._evict(session_id)
+            return None
+        return session
     
     def update_session(self, session_id: str, data: Dict[str, Any]) -> bool:
         """Update session data"""
         with self._lock:
-            if session_id not in self.sessions:
+            session = self.sessions.get(session_id)
+            if session is None:
                 return False
             
-            self.sessions[session_id]["data"].update(data)
-            self.sessions[session_id]["last_accessed"] = datetime.now().isoformat()
+            session["data"].update(data)
+            self._touch(session)
             
             logger.debug(f"Session {session_id} updated")
             return True
@@ -81,56 +177,153 @@ class SessionManager:
     def delete_session(self, session_id: str) -> bool:
         """Delete a session"""
         with self._lock:
-            if session_id not in self.sessions:
-                return False
-            
-            del self.sessions[session_id]
-            logger.info(f"Session {session_id} deleted")
-            return True
+            session = self._remove(session_id)
+            if session is not None:
+                self._deleted += 1
+        
+        stored = self.backend.delete(session_id)
+        if session is None:
+            return stored
+        self._close(session)
+        logger.info(f"Session {session_id} deleted")
+        return True
     
     def get_student_sessions(self, student_id: str) -> List[Dict[str, Any]]:
-        """Get all sessions for a student"""
-        with self._lock:
-            student_sessions = [
-                session for session in self.sessions.values()
-                if session["student_id"] == student_id
-            ]
-            
-            return student_sessions
+        """Get all sessions for a student that are live in this process"""
+        sessions = []
+        for session_id in self.backend.student_session_ids(student_id):
+            with self._lock:
+                session = self.sessions.get(session_id)
+            if session is not None:
+                sessions.append(session)
+        return sessions
+    
+    def get_student_session_count(self, student_id: str) -> int:
+        """Get count of sessions for a student"""
+        return self.backend.count_student_sessions(student_id)
     
     def get_active_sessions_count(self) -> int:
         """Get count of active sessions"""
-        with self._lock:
-            return len(self.sessions)
+        return len(self.sessions)
     
-    def cleanup_expired_sessions(self):
+    def cleanup_expired_sessions(self, batch_size: int = 1000):
         """Clean up expired sessions"""
+        expired = []
+        while True:
+            # Work in batches so requests can take the lock in between
+            with self._lock:
+                batch = [
+                    self._remove(session_id)
+                    for session_id in self._expiry.pop_expired(time.monotonic(), batch_size)
+                ]
+                self._expired += len(batch)
+            expired.extend(batch)
+            if len(batch) < batch_size:
+                break
+        
+        # Tear down outside the lock; flushing progress touches the disk
+        for session in expired:
+            logger.info(f"Cleaning up expired session {session['session_id']}")
+            record = self.backend.load(session["session_id"])
+            # Keep the record if another worker has been serving the session
+            if record is None or not self._fresh(record):
+                self.backend.delete(session["session_id"])
+            self._close(session)
+        
+        # Records left behind by workers that stopped without cleaning up;
+        # the grace period covers accesses that haven't been written back yet
+        purged = self.backend.purge_expired(time.time() - self.session_timeout - self.touch_interval)
+        
+        if expired or purged:
+            logger.info(f"Cleaned up {len(expired)} expired sessions, purged {purged} stored sessions")
+    
+    def _load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Rebuild a stored session that isn't live in this process"""
+        record = self.backend.load(session_id)
+        if record is None:
+            return None
+        if not self._fresh(record):
+            self.backend.delete(session_id)
+            return None
+        
+        session_info = {field: record[field] for field in SESSION_FIELDS}
+        session_info["data"] = self.on_load(record) if self.on_load else {}
         with self._lock:
-            current_time = datetime.now()
-            expired_sessions = []
-            
-            for session_id, session in self.sessions.items():
-                last_accessed = datetime.fromisoformat(session["last_accessed"])
-                if current_time - last_accessed > timedelta(seconds=self.session_timeout):
-                    expired_sessions.append(session_id)
-            
-            for session_id in expired_sessions:
-                logger.info(f"Cleaning up expired session {session_id}")
-                del self.sessions[session_id]
-            
-            if expired_sessions:
-                logger.info(f"Cleaned up {len(expired_sessions)} expired sessions")
+            existing = self.sessions.get(session_id)
+            if existing is None:
+                idle = time.time() - record["accessed_at"]
+                self._add(session_info, idle=max(idle, 0.0))
+                self._touch(session_info)
+        
+        if existing is not None:
+            # Another request loaded it first; drop our copy
+            self._close(session_info)
+            return existing
+        self.backend.touch(session_id, session_info["last_accessed"], time.time())
+        logger.info(f"Session {session_id} loaded from the session store")
+        return session_info
+    
+    def _evict(self, session_id: str):
+        """Drop a live session from this process without touching the backend"""
+        with self._lock:
+            session = self._remove(session_id)
+        if session is not None:
+            self._close(session)
+    
+    def _fresh(self, record: Dict[str, Any]) -> bool:
+        return time.time() - record["accessed_at"] <= self.session_timeout
+    
+    def _add(self, session: Dict[str, Any], idle: float = 0.0):
+        session_id = session["session_id"]
+        if session_id in self.sessions:
+            self._remove(session_id)
+        self.sessions[session_id] = session
+        self._expiry.touch(session_id, time.monotonic() + self.session_timeout - idle)
+        self._persisted[session_id] = time.monotonic()
+    
+    def _touch(self, session: Dict[str, Any]) -> bool:
+        """Extend a session's deadline; True if the access is due to be persisted"""
+        now = time.monotonic()
+        session_id = session["session_id"]
+        session["last_accessed"] = datetime.now().isoformat()
+        self._expiry.touch(session_id, now + self.session_timeout)
+        if now - self._persisted.get(session_id, 0.0) < self.touch_interval:
+            return False
+        self._persisted[session_id] = now
+        return True
+    
+    def _remove(self, session_id: str) -> Optional[Dict[str, Any]]:
+        self._expiry.discard(session_id)
+        self._persisted.pop(session_id, None)
+        return self.sessions.pop(session_id, None)
+    
+    def _close(self, session: Dict[str, Any]):
+        self._notify(session["student_id"])
+        if self.on_close is None:
+            return
+        try:
+            self.on_close(session)
+        except Exception as e:
+            logger.error(f"Error closing session {session['session_id']}: {e}")
+    
+    def _notify(self, student_id: str):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(student_id)
+        except Exception as e:
+            logger.error(f"Error notifying change for student {student_id}: {e}")
     
     def _start_cleanup_thread(self):
         """Start the background cleanup thread"""
         def cleanup_worker():
-            while not self._stop_cleanup:
+            while not self._stop_cleanup.is_set():
                 try:
                     self.cleanup_expired_sessions()
-                    time.sleep(self.cleanup_interval)
+                    self._stop_cleanup.wait(self.cleanup_interval)
                 except Exception as e:
                     logger.error(f"Error in cleanup thread: {e}")
-                    time.sleep(60)  # Wait a minute before retrying
+                    self._stop_cleanup.wait(60)  # Wait a minute before retrying
         
         self._cleanup_thread = threading.Thread(target=cleanup_worker, daemon=True)
         self._cleanup_thread.start()
@@ -138,31 +331,33 @@ class SessionManager:
     
     def stop_cleanup_thread(self):
         """Stop the background cleanup thread"""
-        self._stop_cleanup = True
+        self._stop_cleanup.set()
         if self._cleanup_thread and self._cleanup_thread.is_alive():
             self._cleanup_thread.join(timeout=5)
         logger.info("Session cleanup thread stopped")
     
     def get_session_stats(self) -> Dict[str, Any]:
         """Get session statistics"""
+        # Sessions only leave the map when they close, so every live session
+        # is active. Loaded and imported sessions can be older than ones
+        # created here, so the age range is found by scanning a snapshot taken
+        # outside the lock rather than from insertion order.
         with self._lock:
-            stats = {
-                "total_sessions": len(self.sessions),
-                "active_sessions": len([s for s in self.sessions.values() if s["status"] == "active"]),
-                "students_count": len(set(s["student_id"] for s in self.sessions.values())),
-                "oldest_session": None,
-                "newest_session": None
-            }
-            
-            if self.sessions:
-                sessions_by_age = sorted(
-                    self.sessions.values(),
-                    key=lambda x: x["created_at"]
-                )
-                stats["oldest_session"] = sessions_by_age[0]["created_at"]
-                stats["newest_session"] = sessions_by_age[-1]["created_at"]
-            
-            return stats
+            sessions = list(self.sessions.values())
+            created, deleted, expired = self._created, self._deleted, self._expired
+        created_at = [session["created_at"] for session in sessions]
+        
+        return {
+            "total_sessions": len(sessions),
+            "active_sessions": len(sessions),
+            "stored_sessions": self.backend.count(),
+            "students_count": self.backend.count_students(),
+            "oldest_session": min(created_at, default=None),
+            "newest_session": max(created_at, default=None),
+            "sessions_created": created,
+            "sessions_deleted": deleted,
+            "sessions_expired": expired
+        }
     
     def export_session_data(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Export session data for backup/analysis"""
@@ -177,15 +372,19 @@ class SessionManager:
     def import_session_data(self, session_data: Dict[str, Any]) -> bool:
         """Import session data from backup"""
         try:
+            session_id = session_data["session_id"]
+            # Imported sessions keep the idle time they had already accumulated
+            idle = max((datetime.now() - datetime.fromisoformat(session_data["last_accessed"])).total_seconds(), 0.0)
+            self.backend.save(session_data, time.time() - idle)
             with self._lock:
-                session_id = session_data["session_id"]
-                self.sessions[session_id] = session_data
-                logger.info(f"Session {session_id} imported successfully")
-                return True
+                self._add(session_data, idle=idle)
+            self._notify(session_data["student_id"])
+            logger.info(f"Session {session_id} imported successfully")
+            return True
         except Exception as e:
             logger.error(f"Error importing session data: {e}")
             return False
     
     def __del__(self):
         """Cleanup when session manager is destroyed"""
-        self.stop_cleanup_thread() 
\ No newline at end of file
+        self.stop_cleanup_thread()
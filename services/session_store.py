@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+# Persisted per session; agents and memories are rebuilt from these on load
+SESSION_FIELDS = ("session_id", "student_id", "created_at", "last_accessed", "status")
+
+
+class MemorySessionBackend:
+    """Process-local session records, for a single worker"""
+
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._by_student: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, record: Dict[str, Any], accessed_at: float):
+        with self._lock:
+            self._delete(record["session_id"])
+            stored = {field: record[field] for field in SESSION_FIELDS}
+            stored["accessed_at"] = accessed_at
+            self._records[record["session_id"]] = stored
+            self._by_student.setdefault(record["student_id"], set()).add(record["session_id"])
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(session_id)
+            return dict(record) if record is not None else None
+
+    def touch(self, session_id: str, last_accessed: str, accessed_at: float) -> bool:
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is None:
+                return False
+            record["last_accessed"] = last_accessed
+            record["accessed_at"] = accessed_at
+            return True
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._delete(session_id)
+
+    def purge_expired(self, cutoff: float) -> int:
+        # Every record belongs to a session live in this process, so the
+        # manager's expiry index already deletes it; scanning here would make
+        # each cleanup pass cost O(sessions) again
+        return 0
+
+    def student_session_ids(self, student_id: str) -> List[str]:
+        with self._lock:
+            return list(self._by_student.get(student_id, ()))
+
+    def count_student_sessions(self, student_id: str) -> int:
+        with self._lock:
+            return len(self._by_student.get(student_id, ()))
+
+    def count_students(self) -> int:
+        with self._lock:
+            return len(self._by_student)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def _delete(self, session_id: str) -> bool:
+        record = self._records.pop(session_id, None)
+        if record is None:
+            return False
+        student_sessions = self._by_student.get(record["student_id"])
+        if student_sessions is not None:
+            student_sessions.discard(session_id)
+            if not student_sessions:
+                del self._by_student[record["student_id"]]
+        return True
+
+
+class SQLiteSessionBackend:
+    """Session records in a SQLite database shared by every worker process"""
+
+    def __init__(self, path: str = "data/sessions/sessions.db"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Other workers may hold the write lock briefly; wait rather than fail
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    student_id TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    last_accessed TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_student ON sessions (student_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_accessed ON sessions (accessed_at)")
+
+    def save(self, record: Dict[str, Any], accessed_at: float):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, student_id, created_at, last_accessed, status, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                tuple(record[field] for field in SESSION_FIELDS) + (accessed_at,)
+            )
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT session_id, student_id, created_at, last_accessed, status, accessed_at "
+                "FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(SESSION_FIELDS + ("accessed_at",), row))
+
+    def touch(self, session_id: str, last_accessed: str, accessed_at: float) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE sessions SET last_accessed = ?, accessed_at = ? WHERE session_id = ?",
+                (last_accessed, accessed_at, session_id)
+            )
+            return cursor.rowcount > 0
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+
+    def purge_expired(self, cutoff: float) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM sessions WHERE accessed_at < ?", (cutoff,)).rowcount
+
+    def student_session_ids(self, student_id: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT session_id FROM sessions WHERE student_id = ?", (student_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def count_student_sessions(self, student_id: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions WHERE student_id = ?", (student_id,)).fetchone()[0]
+
+    def count_students(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(DISTINCT student_id) FROM sessions").fetchone()[0]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
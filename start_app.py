@@ -29,7 +29,7 @@ def check_requirements():
     # Check Python packages
     required_packages = [
         'fastapi', 'uvicorn', 'pydantic', 'autogen-agentchat', 
-        'langchain', 'openai', 'tenacity'
+        'langchain', 'openai'
     ]
     
     missing_packages = []
@@ -0,0 +1,51 @@
+# tests/test_agent_pool.py
+import unittest
+import time
+from services.agent_pool import AgentPool
+
+class FakeAgent:
+    def __init__(self):
+        self.resets = 0
+
+    def reset(self):
+        self.resets += 1
+
+class TestAgentPool(unittest.TestCase):
+    def setUp(self):
+        self.built = 0
+
+    def factory(self):
+        self.built += 1
+        return {"tutor": FakeAgent()}
+
+    def wait_for(self, pool, available):
+        deadline = time.time() + 5
+        while pool.stats()["available"] < available and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_miss_builds_on_demand(self):
+        pool = AgentPool(self.factory, size=2)
+        shell = pool.acquire()
+        self.assertIn("tutor", shell)
+        self.assertEqual(pool.stats()["misses"], 1)
+
+    def test_prewarmed_hits_and_refill(self):
+        pool = AgentPool(self.factory, size=2)
+        pool.start()
+        self.wait_for(pool, 2)
+        pool.acquire()
+        self.assertEqual(pool.stats()["hits"], 1)
+        self.wait_for(pool, 2)
+        self.assertEqual(pool.stats()["available"], 2)
+
+    def test_release_resets_and_caps_size(self):
+        pool = AgentPool(self.factory, size=1)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        self.assertEqual(first["tutor"].resets, 1)
+        self.assertEqual(pool.stats()["available"], 1)
+        self.assertIs(pool.acquire(), first)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+# tests/test_answer_checker.py
+import unittest
+from services.answer_checker import AnswerChecker, check_answer
+
+class TestCheckAnswer(unittest.TestCase):
+    def test_equivalent_forms_are_correct(self):
+        self.assertTrue(check_answer("x = 2, x = 5", "x=5, x=2"))
+        self.assertTrue(check_answer("x = 2, x = 5", "5 and 2"))
+        self.assertTrue(check_answer("1/2", "0.5"))
+        self.assertTrue(check_answer("1 1/2", "3/2"))
+        self.assertTrue(check_answer("0.5", "0.50"))
+        self.assertTrue(check_answer("Mitochondria", "mitochondria."))
+
+    def test_clear_misses_are_incorrect(self):
+        self.assertFalse(check_answer("x = 2, x = 5", "x = 3, x = 5"))
+        self.assertFalse(check_answer("x = 1, y = 2", "x = 2, y = 1"))
+        self.assertFalse(check_answer("B", "(c)"))
+        self.assertIs(check_answer("0.5", "0.7"), False)
+        self.assertIs(check_answer("2.5", "2.6"), False)
+
+    def test_near_decimals_are_left_to_the_model(self):
+        # Never graded correct locally, however close
+        self.assertIsNone(check_answer("0.5", "0.45"))
+        self.assertIsNone(check_answer("2.5", "2.46"))
+        self.assertIsNone(check_answer("3.14159", "3.14"))
+        self.assertIsNone(check_answer("1/3", "0.333"))
+        self.assertIsNone(check_answer("x = 0.5, x = 2", "x = 2, x = 0.45"))
+
+    def test_ambiguous_answers_are_left_to_the_model(self):
+        self.assertIsNone(check_answer("x = 2, x = 5", "x = 2"))
+        self.assertIsNone(check_answer("500 cm", "5 m"))
+        self.assertIsNone(check_answer("50%", "0.5"))
+        self.assertIsNone(check_answer("x = 2", "(x-2)(x-5) = 0 so x = 2"))
+
+class TestAnswerChecker(unittest.TestCase):
+    def test_evaluation_and_hit_rate(self):
+        checker = AnswerChecker()
+        problem = {"correct_answer": "x = 2, x = 5", "solution": "Factor the quadratic."}
+
+        self.assertEqual(checker.evaluate(problem, "x=5, x=2")["performance_score"], 1.0)
+        wrong = checker.evaluate(problem, "x=1, x=5")
+        self.assertFalse(wrong["is_correct"])
+        self.assertIn("Factor the quadratic.", wrong["feedback"])
+        self.assertIsNone(checker.evaluate(problem, "I factored it into (x-2)(x-5)"))
+
+        stats = checker.stats()
+        self.assertEqual((stats["checked"], stats["sent_to_llm"]), (3, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+
+    def test_disabled(self):
+        checker = AnswerChecker(enabled=False)
+        self.assertIsNone(checker.evaluate({"correct_answer": "4"}, "4"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# tests/test_client_registry.py
+import asyncio
+import unittest
+from unittest import mock
+from llm_providers import async_openai_provider, openai_provider
+from llm_providers.client_registry import ClientRegistry
+
+OPENAI = {"model": "gpt-4o", "api_key": "key-a"}
+AZURE = {"model": "gpt-4o", "api_key": "key-a", "api_type": "azure",
+         "base_url": "https://example.openai.azure.com/", "api_version": "2024-02-01"}
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ClientRegistry()
+
+    def tearDown(self):
+        asyncio.run(self.registry.aclose())
+
+    def test_one_client_per_config(self):
+        client = self.registry.get_client(OPENAI)
+        self.assertIs(self.registry.get_client(dict(OPENAI)), client)
+        self.assertIsNot(self.registry.get_client({**OPENAI, "api_key": "key-b"}), client)
+        self.assertIsNot(self.registry.get_client(OPENAI, timeout=30), client)
+        self.assertIsNot(self.registry.get_client(AZURE), client)
+        self.assertIsNot(self.registry.get_client(OPENAI, is_async=True), client)
+
+    def test_clients_share_one_connection_pool(self):
+        self.assertIs(self.registry.get_client(OPENAI)._client, self.registry.http_client())
+        self.assertIs(self.registry.get_client(AZURE)._client, self.registry.http_client())
+        self.assertIs(self.registry.get_client(OPENAI, is_async=True)._client, self.registry.async_http_client())
+
+    def test_aclose_closes_clients_and_new_ones_are_created(self):
+        client = self.registry.get_client(OPENAI)
+        async_client = self.registry.get_client(OPENAI, is_async=True)
+        http_client, async_http_client = self.registry.http_client(), self.registry.async_http_client()
+
+        asyncio.run(self.registry.aclose())
+        self.assertTrue(http_client.is_closed)
+        self.assertTrue(async_http_client.is_closed)
+
+        fresh = self.registry.get_client(OPENAI)
+        self.assertIsNot(fresh, client)
+        self.assertFalse(fresh._client.is_closed)
+        fresh_async = self.registry.get_client(OPENAI, is_async=True)
+        self.assertIsNot(fresh_async, async_client)
+        self.assertFalse(fresh_async._client.is_closed)
+
+class TestProvidersFollowRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ClientRegistry()
+
+    def tearDown(self):
+        asyncio.run(self.registry.aclose())
+
+    def test_async_provider_replaces_closed_client(self):
+        with mock.patch.object(async_openai_provider, "client_registry", self.registry):
+            provider = async_openai_provider.AsyncOpenAIProvider({"config_list": [OPENAI]})
+            client = provider.client
+            self.assertIs(provider.client, client)
+            asyncio.run(self.registry.aclose())
+            self.assertIsNot(provider.client, client)
+            self.assertFalse(provider.client._client.is_closed)
+
+    def test_sync_provider_replaces_closed_client(self):
+        with mock.patch.object(openai_provider, "client_registry", self.registry):
+            provider = openai_provider.OpenAIProvider({"config_list": [OPENAI]})
+            client = provider.client
+            self.registry.close()
+            self.assertIsNot(provider.client, client)
+            self.assertFalse(provider.client._client.is_closed)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+# tests/test_context_builder.py
+import unittest
+from langchain.schema import AIMessage, HumanMessage
+from memory.context_builder import ContextWindowBuilder, estimate_tokens
+
+def conversation(turns, words=100):
+    return [
+        HumanMessage(content=f"Question {i}. " + "word " * words) if i % 2 == 0
+        else AIMessage(content=f"Answer {i}. " + "step " * words)
+        for i in range(turns)
+    ]
+
+class TestContextWindowBuilder(unittest.TestCase):
+    def test_context_stays_within_budget(self):
+        messages = conversation(40)
+        for budget in (20, 50, 200, 1500):
+            context = ContextWindowBuilder(token_budget=budget, recent_turns=4).build(messages)
+            self.assertLessEqual(estimate_tokens(context), budget)
+        self.assertLessEqual(estimate_tokens(ContextWindowBuilder().build(messages, token_budget=100)), 100)
+
+    def test_recent_turns_use_at_most_three_quarters(self):
+        builder = ContextWindowBuilder(token_budget=200, recent_turns=4)
+        context = builder.build(conversation(4, words=500))
+        self.assertNotIn("summary", context)
+        self.assertLessEqual(estimate_tokens(context), 150)
+        # No single turn takes more than half of the recent share
+        for line in context.split("\n"):
+            self.assertLessEqual(estimate_tokens(line), 75)
+        self.assertTrue(context.endswith("..."))
+        self.assertIn("Answer 3.", context)
+
+    def test_older_turns_roll_into_the_summary(self):
+        builder = ContextWindowBuilder(token_budget=1500, recent_turns=2)
+        messages = conversation(4, words=5)
+        context = builder.build(messages)
+        self.assertIn("- Student: Question 0.\n- Tutor: Answer 1.", context)
+        self.assertIn("Student: Question 2. word", context)
+
+        messages += conversation(6, words=5)[4:]
+        context = builder.build(messages)
+        self.assertIn("- Student: Question 2.\n- Tutor: Answer 3.", context)
+        self.assertNotIn("Question 2. word", context)
+        self.assertEqual(len(builder._summary_lines), 4)
+
+    def test_summary_lines_are_bounded(self):
+        builder = ContextWindowBuilder(token_budget=1500, recent_turns=2, max_summary_lines=10)
+        messages = []
+        for turns in range(0, 60, 6):
+            messages = conversation(turns + 6, words=5)
+            builder.build(messages)
+        self.assertEqual(len(builder._summary_lines), 10)
+        self.assertIn("Question 56.", builder.build(messages))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+# tests/test_dashboard_cache.py
+import unittest
+from services.dashboard_cache import DashboardCache
+from services.session_manager import SessionManager
+
+class TestDashboardCache(unittest.TestCase):
+    def test_invalidate_drops_view(self):
+        cache = DashboardCache()
+        view = cache.put("alice", cache.version("alice"), b'{"a": 1, "t": 1}', b'{"a": 1}')
+        self.assertIs(cache.get("alice"), view)
+        cache.invalidate("alice")
+        self.assertIsNone(cache.get("alice"))
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_stale_rebuild_is_not_stored(self):
+        cache = DashboardCache()
+        version = cache.version("alice")
+        cache.invalidate("alice")  # progress changed while the view was being built
+        cache.put("alice", version, b"{}", b"{}")
+        self.assertIsNone(cache.get("alice"))
+
+    def test_invalidations_are_bounded(self):
+        cache = DashboardCache(max_entries=2)
+        stale = cache.version("alice")
+        for student in ("alice", "bob", "carol", "dave"):
+            cache.invalidate(student)
+        self.assertEqual(cache.stats()["tracked_invalidations"], 2)
+        # alice's invalidation was forgotten, but her stale rebuild is still dropped
+        cache.put("alice", stale, b"{}", b"{}")
+        self.assertIsNone(cache.get("alice"))
+        cache.put("alice", cache.version("alice"), b"{}", b"{}")
+        self.assertIsNotNone(cache.get("alice"))
+
+    def test_etag_ignores_timestamp(self):
+        cache = DashboardCache()
+        first = cache.put("alice", 0, b'{"a": 1, "t": 1}', b'{"a": 1}')
+        second = cache.put("alice", 0, b'{"a": 1, "t": 2}', b'{"a": 1}')
+        self.assertEqual(first.etag, second.etag)
+
+    def test_expired_view_is_dropped(self):
+        cache = DashboardCache(ttl=0)
+        cache.put("alice", 0, b"{}", b"{}")
+        self.assertIsNone(cache.get("alice"))
+
+    def test_session_events_invalidate(self):
+        cache = DashboardCache()
+        manager = SessionManager(on_change=cache.invalidate)
+        manager.stop_cleanup_thread()
+        for event in (lambda: manager.create_session("s1", "alice", {}), lambda: manager.delete_session("s1")):
+            cache.put("alice", cache.version("alice"), b"{}", b"{}")
+            event()
+            self.assertIsNone(cache.get("alice"))
+
+if __name__ == '__main__':
+    unittest.main()
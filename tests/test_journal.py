@@ -0,0 +1,57 @@
+# tests/test_journal.py
+import unittest
+import os
+import json
+import tempfile
+from memory.journal import JournalStore
+from memory.conversation_memory import LangChainConversationMemory
+
+class TestJournalStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.base = os.path.join(self.tmpdir.name, "session")
+
+    def test_append_and_replay(self):
+        journal = JournalStore(self.base)
+        journal.append({"content": "a"})
+        journal.append({"content": "b"})
+        records = list(JournalStore(self.base).replay())
+        self.assertEqual([r["content"] for r in records], ["a", "b"])
+        self.assertEqual([r["seq"] for r in records], [1, 2])
+
+    def test_compaction_skips_covered_records(self):
+        state = {"items": []}
+        journal = JournalStore(self.base, compact_every=1000)
+        for i in range(5):
+            journal.append({"content": i}, apply=lambda i=i: state["items"].append(i))
+        journal.compact(lambda: {"items": list(state["items"])})
+        journal.append({"content": 5}, apply=lambda: state["items"].append(5))
+
+        reloaded = JournalStore(self.base)
+        snapshot = reloaded.load_snapshot()
+        self.assertEqual(snapshot["items"], [0, 1, 2, 3, 4])
+        replayed = [r["content"] for r in reloaded.replay(snapshot["journal_seq"])]
+        self.assertEqual(replayed, [5])
+
+    def test_conversation_memory_round_trip(self):
+        memory = LangChainConversationMemory("s1", storage_path=self.tmpdir.name, compact_every=3)
+        for i in range(10):
+            memory.add_message("student" if i % 2 == 0 else "tutor", f"message {i}", {"subject": "Mathematics"})
+        memory.journal.compact(memory._snapshot)
+
+        reloaded = LangChainConversationMemory("s1", storage_path=self.tmpdir.name)
+        self.assertEqual(reloaded.get_messages(), memory.get_messages())
+        self.assertEqual(reloaded.metadata["subjects"], ["Mathematics"])
+
+    def test_legacy_json_mode(self):
+        memory = LangChainConversationMemory("s2", storage_path=self.tmpdir.name, storage_mode="json")
+        memory.add_message("student", "hello")
+        with open(os.path.join(self.tmpdir.name, "s2.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(data["messages"], [{"role": "human", "content": "hello"}])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+if __name__ == '__main__':
+    unittest.main()
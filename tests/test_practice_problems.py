@@ -0,0 +1,104 @@
+# tests/test_practice_problems.py
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+agent = None
+
+def setUpModule():
+    global agent, tmpdir, cwd
+    # Memories are written relative to the working directory
+    tmpdir = tempfile.TemporaryDirectory()
+    cwd = os.getcwd()
+    os.chdir(tmpdir.name)
+    os.environ.setdefault("LLM_PROVIDER", "stub")
+    import agent as agent_module
+    agent = agent_module
+    # AutoGen builds its clients eagerly; with the stub provider they are never called
+    agent.llm_config["config_list"][0].update(api_key="test-key", base_url="https://example.openai.azure.com/")
+
+def tearDownModule():
+    os.chdir(cwd)
+    tmpdir.cleanup()
+
+def problem(question, answer="1"):
+    return {"question": question, "correct_answer": answer, "solution": "work"}
+
+class TestParseProblems(unittest.TestCase):
+    def test_accepted_shapes(self):
+        wrapped = json.dumps({"problems": [problem("Q1"), problem("Q2")]})
+        self.assertEqual([p["question"] for p in agent.parse_problems(wrapped)], ["Q1", "Q2"])
+        bare = json.dumps([problem("Q1"), problem("Q2")])
+        self.assertEqual([p["question"] for p in agent.parse_problems(bare)], ["Q1", "Q2"])
+        single = json.dumps(problem("Q1"))
+        self.assertEqual([p["question"] for p in agent.parse_problems(single)], ["Q1"])
+
+    def test_invalid_entries_are_dropped(self):
+        response = json.dumps({"problems": [
+            problem("Q1"), problem("", "2"), problem("Q3", " "), {"question": "Q4"}, "Q5", problem("Q6")
+        ]})
+        self.assertEqual([p["question"] for p in agent.parse_problems(response)], ["Q1", "Q6"])
+        self.assertEqual(agent.parse_problems("no json here"), [])
+
+    def test_batches(self):
+        self.assertEqual(agent.problem_batches(5, batch_size=3), [3, 2])
+        self.assertEqual(agent.problem_batches(3, batch_size=3), [3])
+        self.assertEqual(agent.problem_batches(0, batch_size=3), [])
+
+class TestCreatePracticeProblems(unittest.TestCase):
+    def setUp(self):
+        self.agents = agent.create_educational_agents("problem_student", "problem_session")
+        self.reply = agent.async_llm.reply
+
+    def tearDown(self):
+        agent.async_llm.reply = self.reply
+        agent.problem_registry.discard_session("problem_session")
+        self.agents["progress_memory"].flush()
+        agent.agent_pool.release(self.agents["shell"])
+
+    def requested_count(self, messages):
+        prompt = messages[-1]["content"]
+        return int(prompt.split('"problems" array has exactly ')[1].split()[0])
+
+    def test_partial_batch_failure_keeps_other_batches(self):
+        calls = []
+
+        def reply(messages):
+            count = self.requested_count(messages)
+            calls.append(count)
+            if count == 2:
+                raise ValueError("malformed batch")
+            return json.dumps({"problems": [problem(f"Q{i}") for i in range(count)]})
+
+        agent.async_llm.reply = reply
+        result = asyncio.run(self.agents["a_create_practice_problems"]("Mathematics", "Algebra", count=5))
+        self.assertEqual(sorted(calls), sorted(agent.problem_batches(5)))
+        self.assertEqual(len(result["problems"]), agent.PROBLEM_BATCH_SIZE)
+        ids = {p["problem_id"] for p in result["problems"]}
+        self.assertEqual(len(ids), len(result["problems"]))
+        for problem_id in ids:
+            self.assertIsNotNone(agent.problem_registry.get(problem_id, "problem_session"))
+
+    def test_extra_problems_are_dropped(self):
+        def reply(messages):
+            count = self.requested_count(messages)
+            return json.dumps({"problems": [problem(f"Q{i}") for i in range(count + 2)]})
+
+        agent.async_llm.reply = reply
+        result = asyncio.run(self.agents["a_create_practice_problems"]("Mathematics", "Algebra", count=2))
+        self.assertEqual(len(result["problems"]), 2)
+        self.assertEqual(len(agent.problem_registry.session_problems("problem_session")), 2)
+
+    def test_every_batch_failing_is_an_error(self):
+        def reply(messages):
+            raise ValueError("malformed batch")
+
+        agent.async_llm.reply = reply
+        result = asyncio.run(self.agents["a_create_practice_problems"]("Mathematics", "Algebra", count=5))
+        self.assertIn("error", result)
+        self.assertEqual(agent.problem_registry.session_problems("problem_session"), [])
+
+if __name__ == "__main__":
+    unittest.main()
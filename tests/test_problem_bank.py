@@ -0,0 +1,52 @@
+# tests/test_problem_bank.py
+import asyncio
+import os
+import tempfile
+import unittest
+from services.problem_bank import ProblemBank
+
+class TestProblemBank(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "bank.json")
+        self.generated = 0
+
+    async def generate(self, subject, topic, difficulty, count):
+        self.generated += count
+        return [{"question": f"{topic} {i}", "correct_answer": "1"} for i in range(count)]
+
+    def bank(self):
+        return ProblemBank(self.generate, [("Mathematics", "Algebra", "medium")], size=2, path=self.path)
+
+    async def wait_stocked(self, bank, stocked):
+        for _ in range(100):
+            if bank.stats()["stocked"] == stocked:
+                return
+            await asyncio.sleep(0.01)
+
+    def test_take_and_refill(self):
+        async def run():
+            bank = self.bank()
+            bank.start()
+            await self.wait_stocked(bank, 2)
+            taken = bank.take(" mathematics", "ALGEBRA", "Medium", 3)
+            await self.wait_stocked(bank, 2)
+            await bank.stop()
+            return bank, taken
+
+        bank, taken = asyncio.run(run())
+        self.assertEqual(len(taken), 2)
+        self.assertEqual(bank.stats()["misses"], 1)
+        self.assertEqual(self.generated, 4)
+        self.assertEqual(self.bank().stats()["stocked"], 2)  # reloaded from disk
+
+    def test_unknown_topic_misses(self):
+        bank = self.bank()
+        self.assertEqual(bank.take("Mathematics", "Topology", "medium", 1), [])
+        self.assertEqual(bank.stats()["hit_rate"], 0.0)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+if __name__ == '__main__':
+    unittest.main()
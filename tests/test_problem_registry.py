@@ -0,0 +1,62 @@
+# tests/test_problem_registry.py
+import os
+import tempfile
+import time
+import unittest
+from services.problem_registry import ProblemRegistry
+
+class TestProblemRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "problems.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def problem(self, problem_id):
+        return {"problem_id": problem_id, "problem": f"question {problem_id}", "correct_answer": "1"}
+
+    def test_several_open_problems_per_session(self):
+        registry = ProblemRegistry()
+        registry.register("s1", self.problem("p1"))
+        registry.register("s1", self.problem("p2"))
+
+        self.assertEqual(registry.get("p1", "s1")["problem"], "question p1")
+        self.assertEqual(registry.latest("s1")["problem_id"], "p2")
+        self.assertEqual([p["problem_id"] for p in registry.session_problems("s1")], ["p1", "p2"])
+
+    def test_other_sessions_cannot_grade_problem(self):
+        registry = ProblemRegistry()
+        registry.register("s1", self.problem("p1"))
+
+        self.assertIsNone(registry.get("p1", "s2"))
+        self.assertIsNone(registry.latest("s2"))
+
+    def test_expiry_and_discard(self):
+        registry = ProblemRegistry(ttl=0.05)
+        registry.register("s1", self.problem("p1"))
+        time.sleep(0.1)
+        self.assertIsNone(registry.get("p1"))
+
+        registry = ProblemRegistry()
+        registry.register("s1", self.problem("p1"))
+        registry.discard_session("s1")
+        self.assertEqual(registry.stats(), {"open_problems": 0, "sessions": 0})
+
+    def test_capacity_drops_oldest(self):
+        registry = ProblemRegistry(max_problems=2)
+        for problem_id in ("p1", "p2", "p3"):
+            registry.register("s1", self.problem(problem_id))
+
+        self.assertIsNone(registry.get("p1"))
+        self.assertIsNotNone(registry.get("p3"))
+
+    def test_sqlite_survives_restart(self):
+        ProblemRegistry(path=self.path).register("s1", self.problem("p1"))
+
+        registry = ProblemRegistry(path=self.path)
+        self.assertEqual(registry.get("p1", "s1")["correct_answer"], "1")
+        self.assertEqual(registry.latest("s1")["problem_id"], "p1")
+
+if __name__ == "__main__":
+    unittest.main()
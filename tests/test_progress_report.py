@@ -0,0 +1,42 @@
+# tests/test_progress_report.py
+import unittest
+import tempfile
+from memory.progress_memory import ProgressMemory
+from memory.progress_report import ProgressReportCache, build_progress_report, report_digest, parse_summary
+
+class TestProgressReport(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.memory = ProgressMemory("alice", storage_path=self.tmpdir.name, flusher=None)
+        for subject, topic, score in [("Physics", "Optics", 1.0), ("Physics", "Optics", 1.0), ("Physics", "Optics", 1.0),
+                                      ("Physics", "Optics", 1.0), ("Mathematics", "Algebra", 0.2)]:
+            self.memory.update_progress(subject, topic, score, score > 0.5)
+
+    def test_rules(self):
+        report = build_progress_report(self.memory.get_progress_report())
+        self.assertEqual(report["strengths"], ["Physics: Optics"])
+        self.assertEqual(report["areas_for_improvement"], ["Mathematics: Algebra"])
+        self.assertIn("Practice a few more Algebra problems in Mathematics", report["recommendations"])
+
+    def test_digest_is_compact(self):
+        digest = report_digest(self.memory.get_progress_report(), top_k=1)
+        self.assertEqual(digest["strongest"][0]["topic"], "Optics")
+        self.assertEqual(digest["weakest"][0]["topic"], "Algebra")
+        self.assertEqual((digest["problems_attempted"], digest["problems_correct"]), (5, 4))
+
+    def test_cache_follows_progress_version(self):
+        cache = ProgressReportCache()
+        cache.put(self.memory, self.memory.version, {"summary": "ok"})
+        self.assertEqual(cache.get(self.memory, self.memory.version), {"summary": "ok"})
+        self.memory.update_progress("Physics", "Optics", 1.0, True)
+        self.assertIsNone(cache.get(self.memory, self.memory.version))
+
+    def test_parse_summary(self):
+        self.assertEqual(parse_summary(' {"summary": "Great work"} '), "Great work")
+        self.assertEqual(parse_summary("Great work\n"), "Great work")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+if __name__ == '__main__':
+    unittest.main()
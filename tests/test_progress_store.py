@@ -0,0 +1,102 @@
+# tests/test_progress_store.py
+import unittest
+import os
+import tempfile
+from memory.progress_memory import ProgressMemory
+from memory.progress_store import SQLiteProgressStore
+
+class TestSQLiteProgressStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = SQLiteProgressStore(os.path.join(self.tmpdir.name, "progress.db"))
+
+    def memory(self, student_id="alice"):
+        return ProgressMemory(student_id, storage_path=self.tmpdir.name, flusher=None, store=self.store)
+
+    def test_matches_json_progress(self):
+        json_memory = ProgressMemory("bob", storage_path=self.tmpdir.name, flusher=None)
+        sql_memory = self.memory("bob")
+        for score, ok in [(0.9, True), (0.2, False), (0.7, True)]:
+            json_memory.update_progress("Physics", "Optics", score, ok)
+            sql_memory.update_progress("Physics", "Optics", score, ok)
+        self.assertEqual(
+            sql_memory.get_progress_report()["subjects"]["Physics"]["Optics"]["attempts"], 3)
+        self.assertAlmostEqual(
+            sql_memory.get_progress_report()["subjects"]["Physics"]["Optics"]["skill_level"],
+            json_memory.get_progress_report()["subjects"]["Physics"]["Optics"]["skill_level"])
+
+    def test_concurrent_memories_do_not_lose_updates(self):
+        first, second = self.memory(), self.memory()
+        first.update_progress("Biology", "Genetics", 1.0, True)
+        second.update_progress("Biology", "Genetics", 1.0, True)
+        self.assertEqual(self.memory().progress_data["Biology"]["Genetics"].attempts, 2)
+
+    def test_sessions_persist(self):
+        memory = self.memory()
+        memory.start_session("s1")
+        memory.update_session("s1", "Physics", "Optics", question_asked=True)
+        memory.update_session("s1", "Physics", "Optics", question_asked=True, correct_answer=True)
+        memory.update_session("s1", "Chemistry", "Bonds")
+        memory.start_session("s1")
+        session = self.memory().learning_sessions[0]
+        self.assertEqual(len(self.memory().learning_sessions), 1)
+        self.assertEqual(session.subjects_covered, ["Physics", "Chemistry"])
+        self.assertEqual((session.questions_asked, session.questions_answered_correctly), (2, 1))
+
+    def test_json_progress_is_migrated(self):
+        ProgressMemory("carol", storage_path=self.tmpdir.name, flusher=None).update_progress("Math", "Algebra", 0.5, True)
+        self.assertEqual(self.memory("carol").progress_data["Math"]["Algebra"].attempts, 1)
+        os.remove(os.path.join(self.tmpdir.name, "carol_progress.json"))
+        self.assertEqual(self.memory("carol").progress_data["Math"]["Algebra"].attempts, 1)
+
+    def test_student_analytics(self):
+        memory = self.memory()
+        memory.start_session("s1")
+        memory.update_progress("Physics", "Optics", 1.0, True)
+        memory.update_progress("Physics", "Mechanics", 0.0, False)
+        analytics = self.store.student_analytics("alice")
+        self.assertEqual(analytics["total_sessions"], 1)
+        self.assertEqual(analytics["total_problems_solved"], 2)
+        self.assertEqual(analytics["subjects_studied"], ["Physics"])
+        self.assertAlmostEqual(analytics["average_score"], 0.15)
+
+    def test_totals_follow_reimports_and_are_backfilled(self):
+        memory = self.memory()
+        memory.start_session("s1")
+        memory.update_progress("Physics", "Optics", 1.0, True)
+        self.store.import_student("alice", [{"subject": "Physics", "topic": "Optics", "skill_level": 0.5,
+                                             "attempts": 4, "successful_attempts": 2}], [])
+        def totals(store):
+            analytics = store.student_analytics("alice")
+            return analytics["total_sessions"], analytics["total_problems_solved"], round(analytics["average_score"], 9)
+
+        self.assertEqual(totals(self.store), (1, 4, 0.5))
+
+        # A database from before the running totals existed
+        with self.store._conn:
+            self.store._conn.execute("DROP TABLE student_totals")
+            for trigger in ("topic_progress_insert", "topic_progress_update", "topic_progress_delete",
+                            "learning_sessions_insert", "learning_sessions_delete"):
+                self.store._conn.execute(f"DROP TRIGGER {trigger}")
+        self.assertEqual(totals(SQLiteProgressStore(os.path.join(self.tmpdir.name, "progress.db"))), (1, 4, 0.5))
+
+    def test_running_analytics_match_store(self):
+        memory = self.memory()
+        json_memory = ProgressMemory("alice", storage_path=self.tmpdir.name, flusher=None)
+        for current in (memory, json_memory):
+            current.start_session("s1")
+            for subject, topic, score, ok in [("Physics", "Optics", 1.0, True), ("Physics", "Optics", 0.4, False),
+                                              ("Chemistry", "Bonds", 0.8, True)]:
+                current.update_progress(subject, topic, score, ok)
+        expected = self.store.student_analytics("alice")
+        for current in (memory, json_memory, self.memory()):
+            analytics = current.get_analytics()
+            self.assertEqual(analytics["total_problems_solved"], expected["total_problems_solved"])
+            self.assertAlmostEqual(analytics["average_score"], expected["average_score"])
+            self.assertEqual(analytics["skill_progression"], expected["skill_progression"])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# tests/test_query_classifier.py
+import unittest
+from services.query_classifier import PatternClassifier, TfidfClassifier, TieredClassifier
+
+class TestPatternClassifier(unittest.TestCase):
+    def test_topic_keywords_are_confident(self):
+        subject, topic, confidence = PatternClassifier().predict("How do I solve a quadratic equation?")
+        self.assertEqual((subject, topic), ("Mathematics", "Quadratic Equations"))
+        self.assertGreaterEqual(confidence, 0.75)
+
+    def test_words_shared_across_subjects_need_corroboration(self):
+        classifier = PatternClassifier()
+        for query in ("What is the reflection of a point over the y-axis",
+                      "explain the tangent line to a curve",
+                      "what is the angle of incidence",
+                      "how does the heart pump blood",
+                      "how does a circuit work"):
+            self.assertLess(classifier.predict(query)[2], 0.75, query)
+        self.assertGreaterEqual(classifier.predict("explain the reflection of light in a mirror")[2], 0.75)
+
+    def test_subject_only_and_unknown_queries(self):
+        classifier = PatternClassifier()
+        self.assertLess(classifier.predict("what is a force")[2], 0.75)
+        self.assertIsNone(classifier.predict("tell me something interesting"))
+
+class TestTieredClassifier(unittest.TestCase):
+    def setUp(self):
+        self.llm_queries = []
+
+    def llm(self, query):
+        self.llm_queries.append(query)
+        return "Physics", "Forces", "medium", "visual"
+
+    def test_confident_queries_skip_the_llm(self):
+        classifier = TieredClassifier(self.llm)
+        self.assertEqual(classifier.classify("Explain mitosis, I'm a beginner"),
+                         ("Biology", "Cell Biology", "easy", "visual"))
+        self.assertEqual(self.llm_queries, [])
+
+    def test_llm_fallback_and_cache(self):
+        classifier = TieredClassifier(self.llm)
+        self.assertEqual(classifier.classify("What is a force?")[1], "Forces")
+        self.assertEqual(classifier.classify("what is a force")[1], "Forces")
+        self.assertEqual(len(self.llm_queries), 1)
+        self.assertEqual(classifier.stats()["cache"], 1)
+
+    def test_llm_failure_uses_best_local_guess(self):
+        def failing(query):
+            raise RuntimeError("unavailable")
+        classifier = TieredClassifier(failing)
+        self.assertEqual(classifier.classify("what is a force")[0], "Physics")
+        self.assertEqual(classifier.stats()["fallback"], 1)
+
+    def test_untrained_tfidf_tier_is_skipped(self):
+        tfidf = TfidfClassifier(min_examples=200)
+        self.assertFalse(tfidf.fit([("q", "Physics", "Optics")]))
+        classifier = TieredClassifier(self.llm, tfidf=tfidf)
+        classifier.classify("what is a force")
+        self.assertEqual(len(self.llm_queries), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+# tests/test_resilience.py
+import asyncio
+import time
+import unittest
+import httpx
+import openai
+from utils.exceptions import ServiceUnavailableException
+from utils.resilience import CircuitBreaker, RetryPolicy, is_transient, request_deadline
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+class Flaky:
+    """Raises the given errors in turn, then returns "ok" """
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(attempts=3, base_delay=0.001, max_delay=0.001)
+
+    def test_transient_errors_are_retried(self):
+        fn = Flaky(HTTPError(503), TimeoutError())
+
+        self.assertEqual(self.policy.call(fn), "ok")
+        self.assertEqual(fn.calls, 3)
+        self.assertEqual(self.policy.stats()["retries"], 2)
+
+    def test_client_errors_are_raised_at_once(self):
+        fn = Flaky(HTTPError(400))
+
+        with self.assertRaises(HTTPError):
+            self.policy.call(fn)
+        self.assertEqual(fn.calls, 1)
+
+    def test_bugs_are_not_retried_or_counted_against_the_breaker(self):
+        breaker = CircuitBreaker("llm", failure_threshold=1)
+        fn = Flaky(KeyError("choices"), KeyError("choices"))
+
+        for _ in range(2):
+            with self.assertRaises(KeyError):
+                self.policy.call(fn, breaker=breaker)
+        self.assertEqual(fn.calls, 2)
+        self.assertEqual(breaker.state, "closed")
+
+    def test_connection_errors_are_transient(self):
+        request = httpx.Request("POST", "https://example.test/v1/chat/completions")
+        self.assertTrue(is_transient(openai.APITimeoutError(request=request)))
+        self.assertTrue(is_transient(httpx.ConnectError("refused")))
+        self.assertTrue(is_transient(HTTPError(429)))
+        self.assertFalse(is_transient(HTTPError(404)))
+        self.assertFalse(is_transient(ValueError("bad reply")))
+
+    def test_exhausted_retries_raise_service_unavailable(self):
+        fn = Flaky(HTTPError(429), HTTPError(429), HTTPError(429))
+
+        with self.assertRaises(ServiceUnavailableException):
+            self.policy.call(fn)
+        self.assertEqual(self.policy.stats()["exhausted"], 1)
+
+    def test_deadline_stops_retries(self):
+        fn = Flaky(HTTPError(500))
+
+        with request_deadline(0):
+            with self.assertRaises(ServiceUnavailableException):
+                self.policy.call(fn)
+        self.assertEqual(fn.calls, 0)
+
+    def test_async_call_times_out_at_deadline(self):
+        async def slow():
+            await asyncio.sleep(1)
+
+        async def run():
+            with request_deadline(0.05):
+                await self.policy.a_call(slow)
+
+        with self.assertRaises(ServiceUnavailableException):
+            asyncio.run(run())
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_then_recovers_through_probe(self):
+        breaker = CircuitBreaker("llm", failure_threshold=2, reset_timeout=0.05)
+        policy = RetryPolicy(attempts=2, base_delay=0.001, max_delay=0.001)
+
+        with self.assertRaises(ServiceUnavailableException):
+            policy.call(Flaky(HTTPError(502), HTTPError(502)), breaker=breaker)
+        self.assertEqual(breaker.state, "open")
+
+        fn = Flaky()
+        with self.assertRaises(ServiceUnavailableException):
+            policy.call(fn, breaker=breaker)
+        self.assertEqual(fn.calls, 0)
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, "half_open")
+        self.assertEqual(policy.call(fn, breaker=breaker), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker("llm", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        breaker.before_call()
+        with self.assertRaises(ServiceUnavailableException):
+            # Only one probe at a time
+            breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertEqual(breaker.stats()["times_opened"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# tests/test_response_cache.py
+import unittest
+import os
+import tempfile
+from services.response_cache import ResponseCache, MemoryCacheBackend, SQLiteCacheBackend
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def test_exact_hit_ignores_case_and_plurals(self):
+        cache = ResponseCache()
+        cache.set("Mathematics", "Quadratic Equations", "medium", "visual", "explanation")
+        self.assertEqual(cache.get("mathematics", "quadratic equation", "Medium", "visual"), "explanation")
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_word_order_does_not_matter(self):
+        cache = ResponseCache()
+        cache.set("Mathematics", "Quadratic equations", "medium", "visual", "explanation")
+        self.assertEqual(cache.get("Mathematics", "Equations, quadratic", "medium", "visual"), "explanation")
+
+    def test_related_topics_miss(self):
+        cache = ResponseCache()
+        cache.set("Mathematics", "Systems of nonlinear equations", "medium", "visual", "nonlinear")
+        cache.set("Mathematics", "Integration by parts", "medium", "visual", "parts")
+        cache.set("Mathematics", "Quadratic equations", "medium", "visual", "equations")
+        self.assertIsNone(cache.get("Mathematics", "Systems of linear equations", "medium", "visual"))
+        self.assertIsNone(cache.get("Mathematics", "Integration by substitution", "medium", "visual"))
+        self.assertIsNone(cache.get("Mathematics", "Quadratic inequalities", "medium", "visual"))
+        self.assertIsNone(cache.get("Mathematics", "quadratics", "medium", "visual"))
+
+    def test_context_is_part_of_the_key(self):
+        cache = ResponseCache()
+        cache.set("Physics", "Optics", "easy", "visual", "for alice", context="Student: I love cameras")
+        self.assertIsNone(cache.get("Physics", "Optics", "easy", "visual"))
+        self.assertIsNone(cache.get("Physics", "Optics", "easy", "visual", context="Student: what is light?"))
+        self.assertEqual(cache.get("Physics", "Optics", "easy", "visual", context="Student: I love cameras"),
+                         "for alice")
+
+    def test_different_topics_miss(self):
+        cache = ResponseCache()
+        cache.set("Mathematics", "Quadratic equations", "medium", "visual", "explanation")
+        cache.set("Chemistry", "Organic chemistry", "medium", "visual", "organic")
+        self.assertIsNone(cache.get("Mathematics", "Linear equations", "medium", "visual"))
+        self.assertIsNone(cache.get("Mathematics", "Quadratic equations", "hard", "visual"))
+        self.assertIsNone(cache.get("Chemistry", "Inorganic chemistry", "medium", "visual"))
+        self.assertEqual(cache.stats()["misses"], 3)
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(ttl=0)
+        cache.set("Physics", "Optics", "easy", "visual", "explanation")
+        self.assertIsNone(cache.get("Physics", "Optics", "easy", "visual"))
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(backend=MemoryCacheBackend(max_entries=2))
+        cache.set("Physics", "Optics", "easy", "visual", "1")
+        cache.set("Physics", "Mechanics", "easy", "visual", "2")
+        cache.get("Physics", "Optics", "easy", "visual")
+        cache.set("Physics", "Thermodynamics", "easy", "visual", "3")
+        self.assertIsNone(cache.get("Physics", "Mechanics", "easy", "visual"))
+        self.assertEqual(cache.get("Physics", "Optics", "easy", "visual"), "1")
+
+    def test_sqlite_backend_persists(self):
+        path = os.path.join(self.tmpdir.name, "cache.db")
+        ResponseCache(backend=SQLiteCacheBackend(path)).set("Biology", "Genetics", "medium", "visual", "genes")
+        cache = ResponseCache(backend=SQLiteCacheBackend(path))
+        self.assertEqual(cache.get("Biology", "genetics", "medium", "visual"), "genes")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+if __name__ == '__main__':
+    unittest.main()
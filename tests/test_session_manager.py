@@ -0,0 +1,150 @@
+# tests/test_session_manager.py
+import unittest
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from services.session_manager import SessionManager, ExpiryIndex
+from services.session_store import SQLiteSessionBackend
+
+class TestSessionManager(unittest.TestCase):
+    def setUp(self):
+        self.closed = []
+        self.manager = SessionManager(on_close=self.closed.append)
+
+    def test_student_index(self):
+        self.manager.create_session("s1", "alice", {})
+        self.manager.create_session("s2", "alice", {})
+        self.manager.create_session("s3", "bob", {})
+        self.assertEqual({s["session_id"] for s in self.manager.get_student_sessions("alice")}, {"s1", "s2"})
+        self.assertEqual(self.manager.get_student_session_count("bob"), 1)
+        self.manager.delete_session("s1")
+        self.assertEqual(self.manager.get_student_session_count("alice"), 1)
+        self.assertEqual(self.manager.get_session_stats()["students_count"], 2)
+
+    def test_stats(self):
+        manager = SessionManager()
+        for i in range(20):
+            manager.create_session(f"s{i}", f"student{i % 3}", {})
+        manager.delete_session("s0")
+        stats = manager.get_session_stats()
+        self.assertEqual(stats["total_sessions"], 19)
+        self.assertEqual(stats["students_count"], 3)
+        self.assertEqual(stats["sessions_created"], 20)
+        self.assertEqual(stats["sessions_deleted"], 1)
+        self.assertLessEqual(stats["oldest_session"], stats["newest_session"])
+
+    def test_stats_age_range_includes_imported_sessions(self):
+        self.manager.create_session("s1", "alice", {})
+        older = (datetime.now() - timedelta(hours=1)).isoformat()
+        self.manager.import_session_data({
+            "session_id": "s0", "student_id": "bob", "created_at": older,
+            "last_accessed": datetime.now().isoformat(), "status": "active", "data": {}
+        })
+        stats = self.manager.get_session_stats()
+        self.assertEqual(stats["oldest_session"], older)
+        self.assertEqual(stats["newest_session"], self.manager.get_session("s1")["created_at"])
+
+    def test_delete_calls_on_close(self):
+        self.manager.create_session("s1", "alice", {"agents": {}})
+        self.assertTrue(self.manager.delete_session("s1"))
+        self.assertFalse(self.manager.delete_session("s1"))
+        self.assertEqual([s["session_id"] for s in self.closed], ["s1"])
+
+    def test_expiry_calls_on_close(self):
+        self.manager.session_timeout = 0
+        self.manager.create_session("s1", "alice", {})
+        self.manager.cleanup_expired_sessions()
+        self.assertIsNone(self.manager.get_session("s1"))
+        self.assertEqual(self.manager.get_student_session_count("alice"), 0)
+        self.assertEqual([s["session_id"] for s in self.closed], ["s1"])
+
+    def test_touch_postpones_expiry(self):
+        self.manager.session_timeout = 0.05
+        self.manager.create_session("s1", "alice", {})
+        self.manager.create_session("s2", "bob", {})
+        time.sleep(0.03)
+        self.manager.get_session("s1")
+        time.sleep(0.03)
+        self.manager.cleanup_expired_sessions()
+        self.assertIsNotNone(self.manager.get_session("s1"))
+        self.assertEqual([s["session_id"] for s in self.closed], ["s2"])
+
+    def test_imported_session_keeps_idle_time(self):
+        stale = (datetime.now() - timedelta(seconds=self.manager.session_timeout + 1)).isoformat()
+        self.manager.import_session_data({
+            "session_id": "s1", "student_id": "alice", "created_at": stale,
+            "last_accessed": stale, "status": "active", "data": {}
+        })
+        self.manager.cleanup_expired_sessions()
+        self.assertEqual([s["session_id"] for s in self.closed], ["s1"])
+
+class TestSQLiteSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "sessions.db")
+        self.loaded = []
+
+    def worker(self, **kwargs):
+        def on_load(record):
+            self.loaded.append(record["session_id"])
+            return {"agents": "rebuilt"}
+        return SessionManager(backend=SQLiteSessionBackend(self.path), on_load=on_load, **kwargs)
+
+    def test_session_rehydrates_in_another_worker(self):
+        self.worker().create_session("s1", "alice", {"agents": "original"})
+        other = self.worker()
+        session = other.get_session("s1")
+        self.assertEqual(session["student_id"], "alice")
+        self.assertEqual(session["data"], {"agents": "rebuilt"})
+        other.get_session("s1")
+        self.assertEqual(self.loaded, ["s1"])
+        self.assertEqual(other.get_student_session_count("alice"), 1)
+
+    def test_delete_is_seen_by_other_workers(self):
+        first, second = self.worker(), self.worker(touch_interval=0)
+        first.create_session("s1", "alice", {})
+        self.assertIsNotNone(second.get_session("s1"))
+        first.delete_session("s1")
+        self.assertIsNone(second.get_session("s1"))
+        self.assertEqual(second.get_active_sessions_count(), 0)
+
+    def test_idle_worker_keeps_session_another_worker_uses(self):
+        idle, busy = self.worker(session_timeout=0.3), self.worker(session_timeout=0.3, touch_interval=0)
+        idle.create_session("s1", "alice", {})
+        for _ in range(4):
+            time.sleep(0.1)
+            self.assertIsNotNone(busy.get_session("s1"))
+        self.assertEqual(idle.get_session("s1")["data"], {"agents": "rebuilt"})
+        self.assertIsNotNone(busy.get_session("s1"))
+
+    def test_expired_records_are_not_loaded(self):
+        self.worker(session_timeout=0).create_session("s1", "alice", {})
+        time.sleep(0.01)
+        self.assertIsNone(self.worker(session_timeout=0).get_session("s1"))
+        self.assertEqual(self.loaded, [])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+class TestExpiryIndex(unittest.TestCase):
+    def test_pop_expired_reschedules_touched_keys(self):
+        index = ExpiryIndex()
+        index.touch("a", 1.0)
+        index.touch("b", 2.0)
+        index.touch("a", 5.0)
+        self.assertEqual(index.pop_expired(3.0), ["b"])
+        self.assertEqual(index.pop_expired(4.0), [])
+        self.assertEqual(index.pop_expired(5.0), ["a"])
+        self.assertEqual(len(index), 0)
+
+    def test_discarded_keys_are_skipped(self):
+        index = ExpiryIndex()
+        index.touch("a", 1.0)
+        index.discard("a")
+        index.touch("a", 3.0)
+        self.assertEqual(index.pop_expired(2.0), [])
+        self.assertEqual(index.pop_expired(3.0), ["a"])
+
+if __name__ == '__main__':
+    unittest.main()
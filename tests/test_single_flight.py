@@ -0,0 +1,54 @@
+# tests/test_single_flight.py
+import asyncio
+import threading
+import time
+import unittest
+from utils.single_flight import SingleFlight
+
+class TestSingleFlight(unittest.TestCase):
+    def test_threads_share_one_call(self):
+        flight = SingleFlight()
+        executions = []
+
+        def slow():
+            executions.append(1)
+            time.sleep(0.2)
+            return "explanation"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["explanation"] * 5)
+        self.assertEqual(len(executions), 1)
+        self.assertEqual(flight.stats()["shared"], 4)
+
+    def test_coroutines_share_one_call_and_errors(self):
+        flight = SingleFlight()
+        executions = []
+
+        async def slow(value):
+            executions.append(value)
+            await asyncio.sleep(0.05)
+            if value == "bad":
+                raise ValueError(value)
+            return value
+
+        async def run():
+            shared = await asyncio.gather(*[flight.a_do("a", lambda: slow("good")) for _ in range(3)])
+            failed = await asyncio.gather(*[flight.a_do("b", lambda: slow("bad")) for _ in range(2)],
+                                          return_exceptions=True)
+            again = await flight.a_do("a", lambda: slow("again"))
+            return shared, failed, again
+
+        shared, failed, again = asyncio.run(run())
+        self.assertEqual(shared, ["good"] * 3)
+        self.assertTrue(all(isinstance(e, ValueError) for e in failed))
+        self.assertEqual(again, "again")
+        self.assertEqual(executions, ["good", "bad", "again"])
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
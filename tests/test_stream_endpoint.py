@@ -0,0 +1,106 @@
+# tests/test_stream_endpoint.py
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+agent = app = client = None
+
+def setUpModule():
+    global agent, app, client, tmpdir, cwd
+    # Memories are written relative to the working directory
+    tmpdir = tempfile.TemporaryDirectory()
+    cwd = os.getcwd()
+    os.chdir(tmpdir.name)
+    os.environ.setdefault("LLM_PROVIDER", "stub")
+    import agent as agent_module
+    agent = agent_module
+    # AutoGen builds its clients eagerly; with the stub provider they are never called
+    agent.llm_config["config_list"][0].update(api_key="test-key", base_url="https://example.openai.azure.com/")
+    from fastapi.testclient import TestClient
+    import app as app_module
+    app = app_module
+    client = TestClient(app.app)
+
+def tearDownModule():
+    app.session_manager.stop_cleanup_thread()
+    os.chdir(cwd)
+    tmpdir.cleanup()
+
+def parse_events(body):
+    """(event, data) pairs from a Server-Sent Events body"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event = "message"
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((event, json.loads(line[len("data: "):])))
+    return events
+
+class TestStreamExplanationEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.reply = agent.async_llm.reply
+        self.stream_reply = agent.async_llm.stream_reply
+        self.session_id = client.post("/api/sessions", json={"student_id": "stream_student"}).json()["session_id"]
+        self.agents = app.session_manager.get_session(self.session_id)["data"]["agents"]
+
+    def tearDown(self):
+        agent.async_llm.reply = self.reply
+        agent.async_llm.stream_reply = self.stream_reply
+        client.delete(f"/api/sessions/{self.session_id}")
+
+    def stream(self, topic):
+        with client.stream("POST", f"/api/sessions/{self.session_id}/concepts/explain/stream",
+                           json={"subject": "Physics", "topic": topic}) as response:
+            self.assertEqual(response.status_code, 200)
+            return parse_events("".join(response.iter_text()))
+
+    def attempts(self, topic):
+        progress = self.agents["progress_memory"].get_progress_report()["subjects"]
+        return progress.get("Physics", {}).get(topic, {}).get("attempts", 0)
+
+    def test_completed_stream_is_recorded_once(self):
+        agent.async_llm.reply = "Waves carry energy. They have a wavelength and a frequency."
+        events = self.stream("Waves")
+
+        deltas = [data["delta"] for event, data in events if event == "message"]
+        self.assertGreater(len(deltas), 1)
+        event, done = events[-1]
+        self.assertEqual(event, "done")
+        self.assertEqual(done["explanation"], "".join(deltas))
+        messages = self.agents["conv_memory"].get_messages()
+        self.assertEqual([m["content"] for m in messages], [done["explanation"]])
+        self.assertEqual(self.attempts("Waves"), 1)
+
+    def test_failed_stream_records_nothing(self):
+        async def failing_stream(messages, **kwargs):
+            yield "Sound is a "
+            raise ConnectionResetError("upstream closed")
+
+        agent.async_llm.stream_reply = failing_stream
+        events = self.stream("Sound")
+
+        self.assertEqual(events[0], ("message", {"delta": "Sound is a "}))
+        self.assertEqual(events[-1][0], "error")
+        self.assertEqual(self.agents["conv_memory"].get_messages(), [])
+        self.assertEqual(self.attempts("Sound"), 0)
+
+    def test_disconnected_client_records_nothing(self):
+        agent.async_llm.reply = "Light is an electromagnetic wave. It travels fast."
+
+        async def read_first_chunk():
+            chunks = self.agents["a_stream_explanation"]("Physics", "Light")
+            first = await chunks.__anext__()
+            # What the server does when the client goes away mid-stream
+            await chunks.aclose()
+            return first
+
+        self.assertTrue(asyncio.run(read_first_chunk()))
+        self.assertEqual(self.agents["conv_memory"].get_messages(), [])
+        self.assertEqual(self.attempts("Light"), 0)
+
+if __name__ == "__main__":
+    unittest.main()
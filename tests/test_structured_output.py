@@ -0,0 +1,45 @@
+# tests/test_structured_output.py
+import unittest
+from utils.structured_output import StructuredOutputError, StructuredOutputParser
+
+class TestStructuredOutputParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = StructuredOutputParser()
+
+    def test_clean_json_inside_prose_and_fences(self):
+        self.assertEqual(self.parser.parse('Sure!\n```json\n{"a": "} not the end", "b": 2}\n```'),
+                         {"a": "} not the end", "b": 2})
+        self.assertEqual(self.parser.stats()["parsed"], 1)
+
+    def test_fences_inside_string_values(self):
+        reply = '{"question": "Sort xs", "solution": "Use:\\n```python\\nsorted(xs)\\n```"}'
+        self.assertEqual(self.parser.parse(reply)["solution"], "Use:\n```python\nsorted(xs)\n```")
+        self.assertEqual(self.parser.parse('Here you go: {"feedback": "Use ```x``` here"}'),
+                         {"feedback": "Use ```x``` here"})
+        self.assertEqual(self.parser.parse('Run ```pip install x``` first. {"a": 1}'), {"a": 1})
+
+    def test_repairs(self):
+        self.assertEqual(self.parser.parse('{"a": [1, 2,],}'), {"a": [1, 2]})
+        self.assertEqual(self.parser.parse("{'is_correct': True, 'feedback': 'It\\'s right'}"),
+                         {"is_correct": True, "feedback": "It's right"})
+        self.assertEqual(self.parser.parse('{"feedback": "solve \\(x^2\\)"}'), {"feedback": "solve \\(x^2\\)"})
+        self.assertEqual(self.parser.parse('{subject: "Physics"}'), {"subject": "Physics"})
+
+        stats = self.parser.stats()
+        self.assertEqual(stats["repaired"], 4)
+        self.assertEqual(stats["repair_rate"], 1.0)
+        self.assertEqual(stats["repairs"]["single_quotes"], 1)
+
+    def test_truncated_reply_keeps_complete_entries(self):
+        self.assertEqual(self.parser.parse('{"problems": [{"question": "Q1"}, {"question": "Q2", "corr'),
+                         {"problems": [{"question": "Q1"}]})
+        self.assertEqual(self.parser.stats()["repairs"], {"truncated": 1})
+
+    def test_expected_type_and_failures(self):
+        self.assertEqual(self.parser.parse('[1] then {"a": 1}', dict), {"a": 1})
+        with self.assertRaises(StructuredOutputError):
+            self.parser.parse("no json here")
+        self.assertEqual(self.parser.stats()["failed"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
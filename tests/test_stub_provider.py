@@ -0,0 +1,24 @@
+# tests/test_stub_provider.py
+import asyncio
+import unittest
+from llm_providers.stub_provider import StubProvider
+
+class TestStubProvider(unittest.TestCase):
+    def collect(self, provider, messages):
+        async def run():
+            return [chunk async for chunk in provider.stream_reply(messages)]
+        return asyncio.run(run())
+
+    def test_stream_matches_reply(self):
+        provider = StubProvider("Quadratics have degree two.", chunk_size=5)
+        chunks = self.collect(provider, [{"role": "user", "content": "Explain"}])
+        self.assertEqual(len(chunks), 6)
+        self.assertEqual("".join(chunks), asyncio.run(provider.generate_reply([])))
+        self.assertEqual(provider.calls, 2)
+
+    def test_callable_reply(self):
+        provider = StubProvider(lambda messages: messages[-1]["content"].upper())
+        self.assertEqual("".join(self.collect(provider, [{"role": "user", "content": "echo"}])), "ECHO")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# tests/test_write_behind.py
+import unittest
+import tempfile
+import threading
+import time
+from memory.progress_memory import ProgressMemory
+from memory.write_behind import WriteBehindFlusher
+
+class Target:
+    def __init__(self):
+        self.flushes = 0
+        self.flushed = threading.Event()
+
+    def flush(self):
+        self.flushes += 1
+        self.flushed.set()
+
+class TestWriteBehindFlusher(unittest.TestCase):
+    def test_flushes_after_max_pending(self):
+        flusher = WriteBehindFlusher(interval=60, max_pending=3)
+        target = Target()
+        flusher.mark_dirty(target)
+        flusher.mark_dirty(target)
+        self.assertFalse(target.flushed.wait(0.2))
+        flusher.mark_dirty(target)
+        self.assertTrue(target.flushed.wait(2))
+        self.assertEqual(target.flushes, 1)
+        flusher.stop()
+        self.assertEqual(target.flushes, 1)
+
+    def test_flushes_on_interval(self):
+        flusher = WriteBehindFlusher(interval=0.05, max_pending=1000)
+        target = Target()
+        flusher.mark_dirty(target)
+        self.assertTrue(target.flushed.wait(2))
+        flusher.stop()
+        self.assertEqual(target.flushes, 1)
+
+    def test_stop_flushes_pending_updates(self):
+        flusher = WriteBehindFlusher(interval=60, max_pending=1000)
+        targets = [Target(), Target()]
+        for target in targets:
+            flusher.mark_dirty(target)
+        self.assertEqual([t.flushes for t in targets], [0, 0])
+        flusher.stop()
+        self.assertEqual([t.flushes for t in targets], [1, 1])
+
+    def test_discarded_targets_are_not_flushed(self):
+        flusher = WriteBehindFlusher(interval=60, max_pending=1000)
+        target = Target()
+        flusher.mark_dirty(target)
+        flusher.discard(target)
+        flusher.stop()
+        self.assertEqual(target.flushes, 0)
+
+class TestProgressWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_no_update_lost_under_concurrent_flushes(self):
+        flusher = WriteBehindFlusher(interval=0.001, max_pending=5)
+        memory = ProgressMemory("alice", storage_path=self.tmpdir.name, flusher=flusher)
+        threads, updates = 8, 50
+        done = threading.Event()
+
+        def update():
+            for _ in range(updates):
+                memory.update_progress("Physics", "Optics", 1.0, True)
+
+        def flush():
+            # Direct flushes race with the background thread's
+            while not done.is_set():
+                memory.flush()
+                time.sleep(0.001)
+
+        flusher_thread = threading.Thread(target=flush)
+        flusher_thread.start()
+        workers = [threading.Thread(target=update) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        done.set()
+        flusher_thread.join()
+        flusher.stop()
+
+        reloaded = ProgressMemory("alice", storage_path=self.tmpdir.name, flusher=None)
+        self.assertEqual(reloaded.progress_data["Physics"]["Optics"].attempts, threads * updates)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,275 @@
+"""Retries with jittered backoff, per-request deadlines and circuit breakers for upstream calls"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import httpx
+import openai
+
+from utils.exceptions import ServiceUnavailableException
+
+logger = logging.getLogger(__name__)
+
+# Monotonic time by which the current request must finish, if it has a deadline
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    """Bound every retrying call made in this context (tasks inherit it) to ``seconds``"""
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+# Failures to reach the endpoint at all (APITimeoutError is an APIConnectionError)
+_TRANSIENT_ERRORS = (openai.APIConnectionError, httpx.TransportError, asyncio.TimeoutError)
+
+
+def is_transient(error: BaseException) -> bool:
+    """Connection errors, timeouts, 429s and 5xx are worth retrying; anything else is a bug or a bad request"""
+    if isinstance(error, _TRANSIENT_ERRORS):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def endpoint_name(config: Dict[str, Any]) -> str:
+    """Breaker name for an LLM config: one breaker per base URL and model"""
+    return f"{config.get('base_url') or config.get('api_type') or 'openai'}/{config.get('model', '')}"
+
+
+class CircuitBreaker:
+    """Fails fast while an upstream endpoint is down.
+
+    After ``failure_threshold`` consecutive transient failures the breaker
+    opens and calls raise ServiceUnavailableException without reaching the
+    endpoint. Once ``reset_timeout`` seconds have passed, a single probe call
+    is let through; its outcome closes the breaker or opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def before_call(self):
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == "closed":
+                return
+            # A probe that never reported back (e.g. cancelled) doesn't block the next one forever
+            if state == "half_open" and (not self._probing or now - self._probe_started >= self.reset_timeout):
+                self._probing = True
+                self._probe_started = now
+                return
+            self.rejected += 1
+            retry_after = max(self.reset_timeout - (now - self._opened_at), 0.0)
+        raise ServiceUnavailableException(f"{self.name} is unavailable; retry in {retry_after:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release_probe(self):
+        """Let another call probe, when this one ended without saying whether the endpoint is up"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    self.opened += 1
+                    logger.warning(f"Circuit breaker for {self.name} opened after {self.failures} failures")
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._state(time.monotonic()),
+                "consecutive_failures": self.failures,
+                "times_opened": self.opened,
+                "rejected": self.rejected
+            }
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if now - self._opened_at >= self.reset_timeout else "open"
+
+
+class CircuitBreakerRegistry:
+    """One breaker per endpoint name, created on first use"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.stats() for breaker in breakers}
+
+
+class RetryPolicy:
+    """Retries transient failures with full-jitter exponential backoff.
+
+    Every attempt goes through the breaker, and no attempt or backoff sleep
+    may run past the request deadline. When retries run out, or the
+    deadline leaves no room for another attempt, ServiceUnavailableException
+    is raised from the last error. Errors that aren't transient, such as a
+    400 from the API or a KeyError while reading the reply, are raised
+    unchanged at once and don't count against the breaker.
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn: Callable[..., Any], *args, breaker: Optional[CircuitBreaker] = None, **kwargs) -> Any:
+        for attempt in range(self.attempts):
+            self._check_deadline(breaker)
+            if breaker is not None:
+                breaker.before_call()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._failed(e, attempt, breaker)
+                time.sleep(delay)
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+    async def a_call(self, fn: Callable[..., Awaitable[Any]], *args, breaker: Optional[CircuitBreaker] = None,
+                     **kwargs) -> Any:
+        for attempt in range(self.attempts):
+            remaining = self._check_deadline(breaker)
+            if breaker is not None:
+                breaker.before_call()
+            try:
+                result = await asyncio.wait_for(fn(*args, **kwargs), timeout=remaining)
+            except Exception as e:
+                # Only the caller's own cancellation escapes; everything else is judged here
+                delay = self._failed(e, attempt, breaker)
+                await asyncio.sleep(delay)
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+    async def a_stream(self, stream: AsyncIterator[Any], breaker: Optional[CircuitBreaker] = None) -> AsyncIterator[Any]:
+        """Pass a stream through the breaker; streams are never retried once they start"""
+        self._check_deadline(breaker)
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            async for item in stream:
+                yield item
+        except Exception as e:
+            if breaker is not None:
+                if is_transient(e):
+                    breaker.record_failure()
+                else:
+                    breaker.release_probe()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"retries": self.retries, "exhausted": self.exhausted}
+
+    def _check_deadline(self, breaker: Optional[CircuitBreaker]) -> Optional[float]:
+        remaining = time_remaining()
+        if remaining is not None and remaining <= 0:
+            name = breaker.name if breaker is not None else "upstream call"
+            raise ServiceUnavailableException(f"Request deadline exceeded before {name} could respond")
+        return remaining
+
+    def _failed(self, error: Exception, attempt: int, breaker: Optional[CircuitBreaker]) -> float:
+        """Record a failed attempt and return the backoff before the next one, or raise"""
+        if isinstance(error, ServiceUnavailableException):
+            raise error
+        if isinstance(error, asyncio.TimeoutError) and time_remaining() is not None and time_remaining() <= 0:
+            raise ServiceUnavailableException("Request deadline exceeded waiting for the model") from error
+        if not is_transient(error):
+            # Says nothing about the endpoint's health, so it neither trips nor closes the breaker
+            if breaker is not None:
+                breaker.release_probe()
+            raise error
+        if breaker is not None:
+            breaker.record_failure()
+        delay = self.backoff(attempt)
+        remaining = time_remaining()
+        if attempt + 1 >= self.attempts or (remaining is not None and delay >= remaining):
+            with self._lock:
+                self.exhausted += 1
+            name = breaker.name if breaker is not None else "upstream call"
+            raise ServiceUnavailableException(f"{name} failed after {attempt + 1} attempt(s): {error}") from error
+        with self._lock:
+            self.retries += 1
+        logger.warning(f"Attempt {attempt + 1} failed ({error}); retrying in {delay:.2f}s")
+        return delay
+
+
+circuit_breakers = CircuitBreakerRegistry(
+    failure_threshold=int(os.getenv("CIRCUIT_BREAKER_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("CIRCUIT_BREAKER_RESET", "30"))
+)
+
+llm_retry = RetryPolicy(
+    attempts=int(os.getenv("LLM_RETRY_ATTEMPTS", "3")),
+    base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+    max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+)
@@ -0,0 +1,77 @@
+"""Request coalescing: concurrent calls with the same key share one execution"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces identical in-flight calls from threads and coroutines.
+
+    While a call for a key is running, other callers with the same key wait
+    for it and get its result (or exception) instead of starting their own.
+    Nothing is remembered once the call finishes; that is the caches' job.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def a_do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # Coroutines run on one event loop, so no lock is needed around the map
+        task = self._tasks.get(key)
+        with self._lock:
+            self.calls += 1
+            if task is not None:
+                self.shared += 1
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # A cancelled waiter must not cancel the call the others are waiting on
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "shared": self.shared,
+                "in_flight": len(self._calls) + len(self._tasks),
+                "shared_rate": self.shared / self.calls if self.calls else 0.0
+            }
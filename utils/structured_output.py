@@ -0,0 +1,208 @@
+"""Tolerant JSON extraction from LLM replies, with repair counters"""
+
+import json
+import re
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Request kwargs for providers that support OpenAI's JSON mode (the reply is one object)
+JSON_MODE = {"response_format": {"type": "json_object"}}
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.S)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_PYTHON_LITERAL = re.compile(r"\b(True|False|None)\b")
+_UNQUOTED_KEY = re.compile(r"([{,]\s*)([A-Za-z_][\w-]*)(\s*:)")
+_ESCAPE = re.compile(r'\\(u[0-9a-fA-F]{4}|["\\/bfnrt])?')
+_CLOSERS = {"{": "}", "[": "]"}
+_VALUE_START = ("{", "[", ",", ":")
+
+
+class StructuredOutputError(ValueError):
+    """Raised when no JSON value can be recovered from a reply"""
+
+
+def _scan(text: str, start: int) -> Tuple[int, List[str], Optional[str], Optional[Tuple[int, List[str]]]]:
+    """Walk a JSON value from ``start``, tracking strings and nesting.
+
+    Returns the end of the value (or of the text, if it was cut off), the
+    brackets still open, the quote of an unterminated string and where the
+    last complete nested value ended, with the brackets open around it.
+    """
+    stack: List[str] = []
+    quote: Optional[str] = None
+    escaped = False
+    previous = ""
+    last_complete = None
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote is not None:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+            continue
+        if char == '"' or (char == "'" and previous in _VALUE_START):
+            # An apostrophe only opens a string where a value could start
+            quote = char
+        elif char in _CLOSERS:
+            stack.append(char)
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return i + 1, [], None, last_complete
+            last_complete = (i + 1, list(stack))
+        if not char.isspace():
+            previous = char
+    return len(text), stack, quote, last_complete
+
+
+def _outside_strings(text: str, fix: Callable[[str], str]) -> str:
+    """Apply ``fix`` to the parts of ``text`` that aren't double-quoted strings"""
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text, flags=re.S)
+    return "".join(part if i % 2 else fix(part) for i, part in enumerate(parts))
+
+
+def _requote(text: str) -> str:
+    """Turn single-quoted strings into double-quoted ones"""
+    out = []
+    quote = None
+    previous = ""
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quote is None:
+            if char == '"' or (char == "'" and previous in _VALUE_START):
+                quote = char
+                char = '"'
+            elif not char.isspace():
+                previous = char
+            out.append(char)
+        elif char == "\\" and i + 1 < len(text):
+            following = text[i + 1]
+            # \' is not a JSON escape; inside double quotes it is just '
+            out.append("'" if following == "'" else char + following)
+            i += 2
+            continue
+        elif char == quote:
+            quote = None
+            previous = '"'
+            out.append('"')
+        else:
+            out.append('\\"' if char == '"' else char)
+        i += 1
+    return "".join(out)
+
+
+# Applied in order, each only if the reply still doesn't parse
+REPAIRS: List[Tuple[str, Callable[[str], str]]] = [
+    ("trailing_commas", lambda text: _outside_strings(text, lambda part: _TRAILING_COMMA.sub(r"\1", part))),
+    ("single_quotes", _requote),
+    ("invalid_escapes", lambda text: _ESCAPE.sub(lambda m: m.group(0) if m.group(1) else "\\\\", text)),
+    ("python_literals", lambda text: _outside_strings(
+        text, lambda part: _PYTHON_LITERAL.sub(lambda m: _PYTHON_LITERALS[m.group(1)], part))),
+    ("unquoted_keys", lambda text: _outside_strings(text, lambda part: _UNQUOTED_KEY.sub(r'\1"\2"\3', part))),
+]
+
+
+class StructuredOutputParser:
+    """Recovers JSON from model replies instead of re-asking the model.
+
+    The first object or array is located with a string-aware bracket scan, so
+    prose and code fences around it don't matter. If it doesn't parse, common
+    defects are repaired one at a time: trailing commas, single quotes,
+    invalid escapes (LaTeX backslashes), Python literals, unquoted keys and, for
+    replies cut off at max_tokens, unclosed strings and brackets.
+    """
+
+    def __init__(self):
+        self.parsed = 0
+        self.repaired = 0
+        self.failed = 0
+        self.repairs: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def parse(self, text: str, expect: Optional[type] = None) -> Any:
+        """The first JSON value in ``text``; ``expect`` (dict or list) picks its type"""
+        try:
+            value, repairs = self._parse(text or "", expect)
+        except StructuredOutputError:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            if repairs:
+                self.repaired += 1
+                self.repairs.update(repairs)
+            else:
+                self.parsed += 1
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.parsed + self.repaired + self.failed
+            return {
+                "parsed": self.parsed,
+                "repaired": self.repaired,
+                "failed": self.failed,
+                "repairs": dict(self.repairs),
+                "repair_rate": self.repaired / total if total else 0.0,
+                "failure_rate": self.failed / total if total else 0.0
+            }
+
+    def _parse(self, text: str, expect: Optional[type]) -> Tuple[Any, List[str]]:
+        repairs = []
+        openers = "{" if expect is dict else "[" if expect is list else "{["
+        start = next((i for i, char in enumerate(text) if char in openers), -1)
+        fenced = _FENCE.search(text)
+        # A fence inside the JSON (code in a string value) is not a wrapper around it
+        if fenced and (start == -1 or fenced.start() < start):
+            inner = fenced.group(1)
+            inner_start = next((i for i, char in enumerate(inner) if char in openers), -1)
+            if inner_start != -1:
+                text, start = inner, inner_start
+        if start == -1:
+            raise StructuredOutputError(f"No JSON found in response: {text[:200]}")
+
+        end, unclosed, quote, last_complete = _scan(text, start)
+        candidates = [text[start:end]]
+        if unclosed:
+            # Cut off mid-reply: close the open string and brackets, or else
+            # keep only the nested values that were finished
+            closed = candidates[0].rstrip() + (quote or "")
+            closed = re.sub(r"[,:]\s*$", "", closed.rstrip())
+            candidates = [closed + "".join(_CLOSERS[bracket] for bracket in reversed(unclosed))]
+            if last_complete is not None:
+                cut, still_open = last_complete
+                candidates.append(text[start:cut] + "".join(_CLOSERS[bracket] for bracket in reversed(still_open)))
+            repairs.append("truncated")
+
+        for candidate in candidates:
+            applied = list(repairs)
+            for name, repair in [(None, None)] + REPAIRS:
+                if repair is not None:
+                    fixed = repair(candidate)
+                    if fixed == candidate:
+                        continue
+                    candidate = fixed
+                    applied.append(name)
+                try:
+                    value = json.loads(candidate, strict=False)
+                except json.JSONDecodeError:
+                    continue
+                if expect is not None and not isinstance(value, expect):
+                    raise StructuredOutputError(f"Expected {expect.__name__}, got {type(value).__name__}")
+                return value, applied
+        raise StructuredOutputError(f"Invalid JSON in response: {text[:200]}")
+
+
+structured_output = StructuredOutputParser()
+
+
+def parse_json(text: str, expect: Optional[type] = None) -> Any:
+    """Parse with the shared parser, so repairs show up in its stats"""
+    return structured_output.parse(text, expect)